@@ -0,0 +1,297 @@
+"""
+AlgoArena End-to-End Load Test
+Runs socket_app in-process on a real port with the fake judge, then drives N
+rooms concurrently through identify -> join_room -> submit_code ->
+match_ended. Reports p50/p95/p99 per step, events per second, payload bytes
+received per room and memory, and can save / compare a JSON baseline to
+catch regressions
+
+Run from the backend folder:
+    python benchmarks/bench_arena.py --rooms 200 --latency-ms 50
+    python benchmarks/bench_arena.py --save-baseline
+    python benchmarks/bench_arena.py --compare      # exit 1 on regression
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import socket
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_arena.json")
+CONNECT_BATCH = 100
+STEPS = ["identify", "join", "submit", "match_ended"]
+
+sys.path.insert(0, BACKEND_DIR)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 2)
+
+
+# =====================================================
+# CLIENT
+# =====================================================
+class Player:
+    def __init__(self, username, latencies, counter):
+        import socketio
+
+        self.username = username
+        self.latencies = latencies
+        self.counter = counter
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.waiters = {}
+
+        for event in ("identified", "room_snapshot", "room_delta", "match_ended", "test_progress", "error"):
+            self.client.on(event, self._handler(event))
+
+    def _handler(self, event):
+        async def handle(data):
+            self.counter["events"] += 1
+            # JSON size of what the server sent, close to the bytes on the wire
+            self.counter["payload_bytes"] += len(json.dumps(data))
+            if event == "error":
+                self.counter["errors"] += 1
+            for predicate, future in list(self.waiters.get(event, [])):
+                if not future.done() and predicate(data):
+                    future.set_result(data)
+
+        return handle
+
+    def expect(self, event, predicate=lambda data: True):
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(event, []).append((predicate, future))
+        return future
+
+    async def step(self, name, emit_event, payload, event, predicate=lambda data: True):
+        # times one request/response round trip over the socket
+        future = self.expect(event, predicate)
+        start = time.perf_counter()
+        await self.client.emit(emit_event, payload)
+        result = await asyncio.wait_for(future, timeout=60)
+        self.latencies[name].append(time.perf_counter() - start)
+        return result
+
+    async def connect(self, url):
+        await self.client.connect(url, transports=["websocket"], wait_timeout=30)
+        await self.step("identify", "identify", {"username": self.username}, "identified")
+
+
+async def connect_room(url, n, latencies, counter):
+    alice = Player(f"alice-{n}", latencies, counter)
+    bob = Player(f"bob-{n}", latencies, counter)
+    await alice.connect(url)
+    await bob.connect(url)
+    return alice, bob
+
+
+async def play_room(http, rest_slots, alice, bob, latencies, counter):
+    try:
+        await _play_room(http, rest_slots, alice, bob, latencies, counter)
+    except asyncio.TimeoutError:
+        counter["timeouts"] += 1
+
+
+async def _play_room(http, rest_slots, alice, bob, latencies, counter):
+    # httpx's pool gets slow with thousands of queued requests, cap them client side
+    async with rest_slots:
+        response = await http.post("/rooms", json={"username": alice.username, "difficulty": "easy"})
+    room_id = response.json()["room_id"]
+
+    await alice.step("join", "join_room", {"room_id": room_id}, "room_snapshot")
+    await bob.step("join", "join_room", {"room_id": room_id}, "room_snapshot", lambda d: d["status"] == "active")
+
+    code = "def solution(**kwargs):\n    return None"
+    mine = lambda player: (lambda d: player.username in d.get("submissions", {}))
+    ended = alice.expect("match_ended")
+    await alice.step("submit", "submit_code", {"room_id": room_id, "code": code}, "room_delta", mine(alice))
+
+    start = time.perf_counter()
+    await bob.step("submit", "submit_code", {"room_id": room_id, "code": code}, "room_delta", mine(bob))
+    await asyncio.wait_for(ended, timeout=60)
+    latencies["match_ended"].append(time.perf_counter() - start)
+    counter["rooms_finished"] += 1
+
+
+# =====================================================
+# RUN
+# =====================================================
+async def run(args):
+    import httpx
+    import uvicorn
+
+    import main
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(uvicorn.Config(main.socket_app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.ensure_future(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    latencies = {step: [] for step in STEPS}
+    counter = {"events": 0, "payload_bytes": 0, "errors": 0, "timeouts": 0, "rooms_finished": 0}
+    rss_start = rss_mb()
+
+    # phase 1: connect + identify in batches so the burst doesn't overflow the listen backlog
+    players = []
+    for first in range(0, args.rooms, CONNECT_BATCH // 2):
+        batch = range(first, min(first + CONNECT_BATCH // 2, args.rooms))
+        players.extend(await asyncio.gather(*(connect_room(url, n, latencies, counter) for n in batch)))
+
+    # phase 2: every room plays at once
+    rest_slots = asyncio.Semaphore(CONNECT_BATCH)
+    async with httpx.AsyncClient(base_url=url, timeout=60) as http:
+        start = time.perf_counter()
+        events_before = counter["events"]
+        bytes_before = counter["payload_bytes"]
+        await asyncio.gather(
+            *(play_room(http, rest_slots, alice, bob, latencies, counter) for alice, bob in players)
+        )
+        elapsed = time.perf_counter() - start
+        played_events = counter["events"] - events_before
+        played_bytes = counter["payload_bytes"] - bytes_before
+    rss_end = rss_mb()
+
+    for alice, bob in players:
+        await alice.client.disconnect()
+        await bob.client.disconnect()
+    server.should_exit = True
+    await server_task
+
+    return {
+        "config": {
+            "rooms": args.rooms,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "room_store": main.room_store.name,
+        },
+        "results": {
+            "rooms_finished": counter["rooms_finished"],
+            "errors": counter["errors"],
+            "timeouts": counter["timeouts"],
+            "elapsed_sec": round(elapsed, 2),
+            "events": played_events,
+            "events_per_sec": round(played_events / elapsed, 1),
+            "payload_bytes_per_room": round(played_bytes / max(args.rooms, 1)),
+            "latency_ms": {
+                step: {f"p{p}": percentile(values, p) for p in (50, 95, 99)}
+                for step, values in latencies.items()
+            },
+            "rss_mb_start": round(rss_start, 1),
+            "rss_mb_end": round(rss_end, 1),
+            "rss_mb_peak": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "rss_kb_per_room": round((rss_end - rss_start) * 1024 / max(args.rooms, 1), 1),
+        },
+    }
+
+
+def report(run_data):
+    results = run_data["results"]
+    print(
+        f"Rooms finished: {results['rooms_finished']}  errors: {results['errors']}"
+        f"  timeouts: {results['timeouts']}  in {results['elapsed_sec']}s"
+    )
+    print(f"Events: {results['events']}  ({results['events_per_sec']}/s)")
+    print(f"Payload received: {results['payload_bytes_per_room']} bytes/room\n")
+    print(f"  {'step':<14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for step, pct in results["latency_ms"].items():
+        print(f"  {step:<14} {pct['p50']:>9} {pct['p95']:>9} {pct['p99']:>9}")
+    print(
+        f"\nRSS: {results['rss_mb_start']} MB -> {results['rss_mb_end']} MB"
+        f" (peak {results['rss_mb_peak']} MB, ~{results['rss_kb_per_room']} KB/room)"
+    )
+
+
+def compare(run_data, baseline, tolerance):
+    # slower p95s, fewer events/s or more memory than baseline * (1 + tolerance) fail
+    regressions = []
+    new, old = run_data["results"], baseline["results"]
+    for step in STEPS:
+        before, after = old["latency_ms"][step]["p95"], new["latency_ms"][step]["p95"]
+        if before and after and after > before * (1 + tolerance):
+            regressions.append(f"{step} p95 {before} -> {after} ms")
+    if new["events_per_sec"] < old["events_per_sec"] * (1 - tolerance):
+        regressions.append(f"events/s {old['events_per_sec']} -> {new['events_per_sec']}")
+    # older baselines didn't record payload size
+    old_bytes = old.get("payload_bytes_per_room")
+    if old_bytes and new["payload_bytes_per_room"] > old_bytes * (1 + tolerance):
+        regressions.append(f"bytes/room {old_bytes} -> {new['payload_bytes_per_room']}")
+    if new["rss_kb_per_room"] > max(old["rss_kb_per_room"], 1) * (1 + tolerance) + 64:
+        regressions.append(f"KB/room {old['rss_kb_per_room']} -> {new['rss_kb_per_room']}")
+    if new["errors"] or new["timeouts"] or new["rooms_finished"] < run_data["config"]["rooms"]:
+        regressions.append(
+            f"{new['errors']} errors, {new['timeouts']} timeouts, {new['rooms_finished']} rooms finished"
+        )
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake judge latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    # configured before main is imported: fake judge, throwaway databases
+    os.environ["JUDGE_EXECUTOR"] = "fake"
+    os.environ["FAKE_JUDGE_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_JUDGE_JITTER_MS"] = str(args.jitter_ms)
+    os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "arena.db"))
+    os.chdir(BACKEND_DIR)
+
+    # the server's [LOG] prints would drown the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        run_data = asyncio.run(run(args))
+    report(run_data)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(run_data, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["config"] != run_data["config"]:
+            print(f"\nBaseline was recorded with {baseline['config']}, comparing anyway")
+        regressions = compare(run_data, baseline, args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS vs baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions vs baseline")
+
+
+if __name__ == "__main__":
+    main_cli()
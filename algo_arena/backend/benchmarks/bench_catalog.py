@@ -0,0 +1,102 @@
+"""
+AlgoArena Catalog Micro-benchmark
+Compares the old linear scans of problems_db with ProblemCatalog lookups
+on a synthetic bank of 100k problems
+
+Run from the backend folder:
+    python benchmarks/bench_catalog.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import ProblemCatalog
+
+BANK_SIZE = 100_000
+LOOKUPS = 2_000
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+
+def make_bank(size):
+    bank = []
+    for n in range(size):
+        bank.append(
+            {
+                "id": f"synthetic_{n}",
+                "title": f"Synthetic Problem {n}",
+                "difficulty": DIFFICULTIES[n % 3],
+                "description": "Generated for benchmarking.",
+                "starter_code": "def solution(x):\n    pass",
+                "public_tests": [{"input": {"x": n}, "expected": n}],
+                "hidden_tests": [{"input": {"x": -n}, "expected": -n}],
+            }
+        )
+    return bank
+
+
+# =====================================================
+# OLD BEHAVIOUR (copied from main.py before the catalog)
+# =====================================================
+def linear_get(bank, problem_id):
+    return next((p for p in bank if p["id"] == problem_id), None)
+
+
+def linear_list(bank, difficulty, limit):
+    items = []
+    for i in bank:
+        if difficulty and i["difficulty"] != difficulty:
+            continue
+        items.append(i)
+        if len(items) >= limit:
+            break
+    return items
+
+
+def linear_random(bank, difficulty):
+    return random.choice([i for i in bank if i["difficulty"] == difficulty])
+
+
+def timed(label, fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / repeat * 1_000_000
+    print(f"  {label:<32} {per_call_us:>12.2f} us/call")
+    return per_call_us
+
+
+def run():
+    print(f"Building synthetic bank of {BANK_SIZE} problems...")
+    bank = make_bank(BANK_SIZE)
+
+    start = time.perf_counter()
+    catalog = ProblemCatalog(bank)
+    catalog.version  # hashed once per load; page cursors are pinned to it
+    print(f"ProblemCatalog built in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    ids = [f"synthetic_{random.randrange(BANK_SIZE)}" for _ in range(LOOKUPS)]
+    id_iter = iter(ids * 1000)
+
+    print("get by id (validate_submission / GET /problems/{id})")
+    old = timed("linear scan", lambda: linear_get(bank, next(id_iter)), 200)
+    new = timed("catalog.get", lambda: catalog.get(next(id_iter)), LOOKUPS)
+    print(f"  speedup: {old / new:.0f}x\n")
+
+    print("list hard problems, limit=10 (GET /problems)")
+    old = timed("linear scan", lambda: linear_list(bank, "hard", 10), LOOKUPS)
+    new = timed("catalog.page_summaries", lambda: catalog.page_summaries("hard", limit=10), LOOKUPS)
+    print(f"  speedup: {old / new:.0f}x\n")
+
+    print("random medium problem (POST /rooms)")
+    old = timed("linear filter + choice", lambda: linear_random(bank, "medium"), 20)
+    new = timed("catalog.random_problem", lambda: catalog.random_problem("medium"), LOOKUPS)
+    print(f"  speedup: {old / new:.0f}x")
+
+
+if __name__ == "__main__":
+    run()
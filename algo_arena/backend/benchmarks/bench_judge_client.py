@@ -0,0 +1,136 @@
+"""
+AlgoArena Judge HTTP Client Benchmark
+500 players submit at once against a local stub Piston server.
+Compares a fresh httpx.AsyncClient per submission (old behaviour) with
+the shared, pooled client used by PistonExecutor
+
+Run from the backend folder:
+    python benchmarks/bench_judge_client.py
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+
+from executors import PistonExecutor, ExecutorError
+
+PLAYERS = 500
+STUB_LATENCY_SEC = 0.02
+HARNESS = "def solution(s):\n    return s[::-1]\n" * 20
+
+
+# =====================================================
+# STUB PISTON SERVER
+# =====================================================
+async def stub_piston(scope, receive, send):
+    if scope["type"] != "http":
+        return
+    more = True
+    while more:
+        message = await receive()
+        more = message.get("more_body", False)
+
+    await asyncio.sleep(STUB_LATENCY_SEC)
+    body = json.dumps({"run": {"stdout": "{\"actual\": \"olleh\"}\n", "stderr": ""}}).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def serve_stub(sock):
+    uvicorn.Server(uvicorn.Config(stub_piston, log_level="warning", backlog=2048)).run(sockets=[sock])
+
+
+def start_stub_server():
+    # separate process so the stub doesn't compete with the client for the GIL
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+
+    process = multiprocessing.get_context("fork").Process(target=serve_stub, args=(sock,), daemon=True)
+    process.start()
+
+    url = f"http://127.0.0.1:{port}/api/v2/execute"
+    for _ in range(200):
+        try:
+            httpx.post(url, json={})
+            break
+        except httpx.TransportError:
+            time.sleep(0.05)
+    return process, url
+
+
+# =====================================================
+# OLD BEHAVIOUR (client per submission)
+# =====================================================
+class PerRequestPistonExecutor(PistonExecutor):
+    async def run(self, code: str) -> dict:
+        payload = {"language": self.language, "version": self.version, "files": [{"content": code}]}
+        async with httpx.AsyncClient() as client:
+            try:
+                response = await client.post(self.url, json=payload, timeout=10.0)
+                execution = response.json()
+            except Exception as e:
+                raise ExecutorError(e)
+        return execution.get("run", {})
+
+
+async def burst(executor, players):
+    latencies = []
+    errors = 0
+
+    async def one_player():
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await executor.run(HARNESS)
+        except ExecutorError:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+
+    await executor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*[one_player() for _ in range(players)])
+    elapsed = time.perf_counter() - start
+    await executor.close()
+
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "throughput_rps": players / elapsed,
+        "errors": errors,
+    }
+
+
+def report(label, stats):
+    print(
+        f"  {label:<28} p50 {stats['p50_ms']:8.1f} ms   p95 {stats['p95_ms']:8.1f} ms   "
+        f"{stats['throughput_rps']:8.1f} submissions/s   errors {stats['errors']}"
+    )
+
+
+async def run():
+    server, url = start_stub_server()
+    print(f"Stub Piston at {url} ({STUB_LATENCY_SEC * 1000:.0f} ms per run)")
+    print(f"{PLAYERS} players submitting at once, two rounds each\n")
+
+    for round_no in (1, 2):
+        print(f"Round {round_no}")
+        report("client per submission", await burst(PerRequestPistonExecutor(url), PLAYERS))
+        report("shared pooled client", await burst(PistonExecutor(url, max_connections=100), PLAYERS))
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,115 @@
+"""
+AlgoArena Matchmaking Load Test
+Starts the server, connects thousands of Socket.IO clients that each ask for
+a match, and reports time-to-match plus the server's queue-wait metrics
+
+Run from the backend folder:
+    python benchmarks/bench_matchmaking.py [clients]
+"""
+
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+import socketio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLIENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+CONNECT_BATCH = 100
+DIFFICULTIES = ["easy", "medium"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:socket_app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+class SimulatedPlayer:
+    def __init__(self, n):
+        self.username = f"player-{n}"
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.identified = asyncio.Event()
+        self.matched = asyncio.Event()
+        self.client.on("identified", lambda data: self.identified.set())
+        self.client.on("match_found", lambda data: self.matched.set())
+
+    async def connect(self, url):
+        await self.client.connect(url, transports=["websocket"], wait_timeout=30)
+        await self.client.emit("identify", {"username": self.username})
+        await self.identified.wait()
+
+    async def find_match(self, results):
+        start = time.perf_counter()
+        await self.client.emit("find_match", {"difficulty": random.choice(DIFFICULTIES)})
+        try:
+            await asyncio.wait_for(self.matched.wait(), timeout=60)
+            results.append(time.perf_counter() - start)
+        except asyncio.TimeoutError:
+            pass  # odd one out per difficulty never gets a partner
+
+
+async def run():
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = start_server(port)
+    print(f"Server on {url}, {CLIENTS} simulated clients\n")
+
+    results = []
+    players = [SimulatedPlayer(n) for n in range(CLIENTS)]
+    try:
+        # phase 1: ramp up connections in batches so the handshake isn't the benchmark
+        start = time.perf_counter()
+        failures = []
+        for batch_start in range(0, CLIENTS, CONNECT_BATCH):
+            batch = players[batch_start : batch_start + CONNECT_BATCH]
+            outcomes = await asyncio.gather(*[p.connect(url) for p in batch], return_exceptions=True)
+            failures += [o for o in outcomes if isinstance(o, BaseException)]
+        connected = [p for p in players if p.client.connected]
+        print(f"Connected:         {len(connected)} / {CLIENTS} in {time.perf_counter() - start:.2f} s")
+        if failures:
+            print(f"Failed clients:    {len(failures)} (first: {failures[0]!r})")
+
+        # phase 2: everyone asks for a match at once
+        start = time.perf_counter()
+        await asyncio.gather(*[p.find_match(results) for p in connected])
+        elapsed = time.perf_counter() - start
+
+        results.sort()
+        print(f"Matched players:   {len(results)} / {len(connected)}")
+        print(f"Wall time:         {elapsed:.2f} s  ({len(results) / 2 / elapsed:.1f} matches/s)")
+        if results:
+            print(f"Time to match p50: {statistics.median(results) * 1000:.1f} ms")
+            print(f"Time to match p95: {results[int(len(results) * 0.95) - 1] * 1000:.1f} ms")
+        print(f"\nServer stats: {httpx.get(f'{url}/matchmaking/stats').json()}")
+    finally:
+        for player in players:
+            if player.client.connected:
+                await player.client.disconnect()
+        server.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
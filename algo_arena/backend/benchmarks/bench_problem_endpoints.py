@@ -0,0 +1,139 @@
+"""
+AlgoArena Problem Endpoint Benchmark
+Request rate for GET /problems and GET /problems/{id} in-process, comparing
+clients that re-download every time with clients that send If-None-Match
+and get a 304, plus the CPU cost of a full download when the body is
+validated + encoded on every request vs served from the pre-rendered cache
+
+Run from the backend folder:
+    python benchmarks/bench_problem_endpoints.py [bank_size]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "arena.db"))
+
+import httpx
+from fastapi import FastAPI
+
+import main
+from catalog import ProblemCatalog
+from bench_catalog import make_bank
+
+REQUESTS = 2_000
+
+
+# =====================================================
+# OLD BEHAVIOUR (handlers before the render cache)
+# =====================================================
+legacy_app = FastAPI()
+legacy_app.user_middleware = main.app.user_middleware  # same CORS stack as main.app
+
+
+@legacy_app.get("/problems", response_model=main.ProblemResponse)
+def legacy_problems(difficulty: str = None, limit: int = 10, cursor: str = None):
+    items, next_cursor = main.problem_store.catalog.page_summaries(difficulty, cursor, limit)
+    return {"items": items, "count": len(items), "next_cursor": next_cursor}
+
+
+@legacy_app.get("/problems/{problem_id}", response_model=main.ProblemDetailsResponse)
+def legacy_problem(problem_id: str):
+    return main.problem_store.catalog.get(problem_id)
+
+
+async def call_asgi(app, path, query):
+    # drives the ASGI app directly so client overhead isn't counted
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [(b"host", b"bench")],
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 1234),
+        "root_path": "",
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def cpu_per_request(label, app, path, query=""):
+    await call_asgi(app, path, query)  # warm up / fill the cache
+    start = time.process_time()
+    for _ in range(REQUESTS):
+        await call_asgi(app, path, query)
+    per_request_us = (time.process_time() - start) / REQUESTS * 1_000_000
+    print(f"  {label:<28} {per_request_us:>9.0f} us CPU/req")
+    return per_request_us
+
+
+async def timed(label, client, path, params=None, conditional=False):
+    headers = {}
+    if conditional:
+        first = await client.get(path, params=params)
+        headers["If-None-Match"] = first.headers["etag"]
+
+    body_bytes = 0
+    status = None
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        response = await client.get(path, params=params, headers=headers)
+        body_bytes += len(response.content)
+        status = response.status_code
+    elapsed = time.perf_counter() - start
+
+    rate = REQUESTS / elapsed
+    print(f"  {label:<28} {status}  {rate:>9.0f} req/s  {body_bytes / REQUESTS:>8.0f} B/req")
+    return rate
+
+
+async def run(bank_size):
+    bank = make_bank(bank_size)
+    for problem in bank:
+        # closer to a real statement than the one-liner in bench_catalog
+        problem["description"] = "Return the answer for the given input. " * 40
+        problem["constraints"] = "1 <= n <= 10^5"
+        problem["public_tests"] = problem["public_tests"] * 5
+    main.problem_store.catalog = ProblemCatalog(bank)
+    print(f"Catalog: {bank_size} problems\n")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print("GET /problems?difficulty=hard&limit=50")
+        params = {"difficulty": "hard", "limit": 50}
+        full = await timed("full download", client, "/problems", params)
+        cached = await timed("If-None-Match -> 304", client, "/problems", params, conditional=True)
+        print(f"  speedup: {cached / full:.1f}x\n")
+
+        print("GET /problems/{id}")
+        path = f"/problems/{bank[bank_size // 2]['id']}"
+        full = await timed("full download", client, path)
+        cached = await timed("If-None-Match -> 304", client, path, conditional=True)
+        print(f"  speedup: {cached / full:.1f}x\n")
+
+    for label, path, query in (
+        ("GET /problems?limit=50", "/problems", "difficulty=hard&limit=50"),
+        ("GET /problems/{id}", path, ""),
+    ):
+        print(f"{label}, full download (server side only)")
+        old = await cpu_per_request("validate + encode", legacy_app, path, query)
+        new = await cpu_per_request("pre-rendered bytes", main.app, path, query)
+        print(f"  CPU saved: {(1 - new / old) * 100:.0f}%\n")
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
@@ -0,0 +1,245 @@
+"""
+AlgoArena Spectator Fan-out Benchmark
+Runs socket_app in-process on a real port with the fake judge, puts N
+spectator sockets (in a separate process, so decoding their updates doesn't
+load the server's event loop) on one room and has a player resubmit while they watch.
+Reports the player's submit -> room_delta latency with no spectators, with
+N throttled spectators and with N spectators and the throttle off, plus how
+many updates each spectator got and how far behind the player they were
+
+Run from the backend folder:
+    python benchmarks/bench_spectators.py --spectators 1000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONNECT_BATCH = 100
+
+sys.path.insert(0, BACKEND_DIR)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 2)
+
+
+# =====================================================
+# CLIENTS
+# =====================================================
+class Spectator:
+    def __init__(self):
+        import socketio
+
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.seen = {}  # room version -> when it first arrived
+        self.updates = 0
+        self.bytes = 0
+        self.ready = None
+        self.client.on("spectator_update", self.on_update)
+
+    async def on_update(self, data):
+        self.updates += 1
+        self.bytes += len(json.dumps(data))
+        self.seen.setdefault(data.get("version"), time.monotonic())
+        if self.ready is not None and not self.ready.done():
+            self.ready.set_result(True)
+
+    async def watch(self, url, room_id):
+        self.ready = asyncio.get_running_loop().create_future()
+        await self.client.connect(url, transports=["websocket"], wait_timeout=30)
+        await self.client.emit("spectate_room", {"room_id": room_id})
+        await asyncio.wait_for(self.ready, timeout=60)
+
+
+def watch_room(url, room_id, count, conn):
+    # child process: connect `count` spectators, report ready, then what they saw once told to stop
+    logging.getLogger("engineio.client").setLevel(logging.CRITICAL)  # 1000 disconnects are noisy
+
+    async def watch():
+        spectators = [Spectator() for _ in range(count)]
+        for first in range(0, count, CONNECT_BATCH):
+            await asyncio.gather(*(s.watch(url, room_id) for s in spectators[first : first + CONNECT_BATCH]))
+        for s in spectators:
+            s.updates = s.bytes = 0
+        conn.send("ready")
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+        conn.send([(s.updates, s.bytes, s.seen) for s in spectators])
+        for s in spectators:
+            await s.client.disconnect()
+
+    asyncio.run(watch())
+
+
+class Player:
+    def __init__(self, username):
+        import socketio
+
+        self.username = username
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.waiters = []
+        self.client.on("room_delta", self.on_delta)
+        self.client.on("room_snapshot", self.on_delta)
+
+    async def on_delta(self, data):
+        for predicate, future in list(self.waiters):
+            if not future.done() and predicate(data):
+                future.set_result(data)
+
+    async def wait_for(self, predicate, send):
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((predicate, future))
+        await send()
+        try:
+            return await asyncio.wait_for(future, timeout=60)
+        finally:
+            self.waiters.remove((predicate, future))
+
+    async def join(self, url, room_id):
+        await self.client.connect(url, transports=["websocket"], wait_timeout=30)
+        await self.client.emit("identify", {"username": self.username})
+        await self.wait_for(lambda d: True, lambda: self.client.emit("join_room", {"room_id": room_id}))
+
+
+# =====================================================
+# RUN
+# =====================================================
+async def play(http, url, spectator_count, submissions):
+    # one room, `spectator_count` watchers, alice resubmits `submissions` times
+    response = await http.post("/rooms", json={"username": "alice", "difficulty": "easy"})
+    room_id = response.json()["room_id"]
+    alice, bob = Player("alice"), Player("bob")
+    await alice.join(url, room_id)
+    await bob.join(url, room_id)
+
+    conn, child_conn = multiprocessing.Pipe()
+    watcher = multiprocessing.get_context("spawn").Process(
+        target=watch_room, args=(url, room_id, spectator_count, child_conn)
+    )
+    watcher.start()
+    await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+
+    code = "def solution(**kwargs):\n    return None"
+    latencies, seen_by_player = [], {}
+    start_all = time.perf_counter()
+    for n in range(submissions):
+        start = time.perf_counter()
+        delta = await alice.wait_for(
+            lambda d: "alice" in d.get("submissions", {}),
+            lambda: alice.client.emit("submit_code", {"room_id": room_id, "code": f"{code}  # {n}"}),
+        )
+        latencies.append(time.perf_counter() - start)
+        seen_by_player[delta["version"]] = time.monotonic()
+    elapsed = time.perf_counter() - start_all
+    await asyncio.sleep(1.0)  # the last throttled update
+
+    conn.send("stop")
+    watched = await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+    await asyncio.get_running_loop().run_in_executor(None, watcher.join)
+
+    lags = []
+    for _, _, seen in watched:
+        for version, seen_at in seen_by_player.items():
+            # a coalesced update covers every version up to its own
+            later = [t for v, t in seen.items() if v is not None and v >= version]
+            if later:
+                lags.append(max(min(later) - seen_at, 0))
+
+    for client in (alice, bob):
+        await client.client.disconnect()
+    return {
+        "spectators": spectator_count,
+        "submissions_per_sec": round(submissions / elapsed, 1),
+        "submit_p50_ms": percentile(latencies, 50),
+        "submit_p95_ms": percentile(latencies, 95),
+        "updates_per_spectator": round(sum(w[0] for w in watched) / max(spectator_count, 1), 1),
+        "kb_per_spectator": round(sum(w[1] for w in watched) / 1024 / max(spectator_count, 1), 1),
+        "lag_p50_ms": percentile(lags, 50),
+        "lag_p95_ms": percentile(lags, 95),
+    }
+
+
+async def run(args):
+    import httpx
+    import uvicorn
+
+    import main
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(uvicorn.Config(main.socket_app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.ensure_future(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    results = []
+    interval = main.spectator_feed.interval_sec
+    async with httpx.AsyncClient(base_url=url, timeout=60) as http:
+        for label, count, interval_sec in (
+            ("players only", 0, interval),
+            (f"throttled ({interval * 1000:g} ms)", args.spectators, interval),
+            ("no throttle", args.spectators, 0.0),
+        ):
+            main.spectator_feed.interval_sec = interval_sec
+            results.append((label, await play(http, url, count, args.submissions)))
+    stats = main.spectator_feed.stats()
+
+    server.should_exit = True
+    await server_task
+    return results, stats
+
+
+def report(results, stats):
+    print(f"  {'mode':<22} {'spect.':>7} {'sub/s':>7} {'submit p50':>11} {'p95':>8}"
+          f" {'upd/spect':>10} {'KB/spect':>9} {'lag p50':>9} {'p95':>8}")
+    for label, r in results:
+        print(
+            f"  {label:<22} {r['spectators']:>7} {r['submissions_per_sec']:>7} {r['submit_p50_ms']:>11}"
+            f" {r['submit_p95_ms']:>8} {r['updates_per_spectator']:>10} {r['kb_per_spectator']:>9}"
+            f" {r['lag_p50_ms'] or '-':>9} {r['lag_p95_ms'] or '-':>8}"
+        )
+    print(f"\nFeed: {stats['updates_published']} published, {stats['updates_emitted']} emitted, "
+          f"{stats['coalesced']} coalesced, {stats['emit_sec']}s emitting")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spectators", type=int, default=1000)
+    parser.add_argument("--submissions", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="fake judge latency")
+    args = parser.parse_args()
+
+    # configured before main is imported: fake judge, throwaway databases, no rate limits
+    # (one player resubmitting back to back would be throttled otherwise)
+    os.environ["JUDGE_EXECUTOR"] = "fake"
+    os.environ["FAKE_JUDGE_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["RATE_LIMIT_ENABLED"] = "0"
+    os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "arena.db"))
+    os.chdir(BACKEND_DIR)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results, stats = asyncio.run(run(args))
+    report(results, stats)
+
+
+if __name__ == "__main__":
+    main_cli()
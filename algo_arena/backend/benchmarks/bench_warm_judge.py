@@ -0,0 +1,98 @@
+"""
+AlgoArena Warm Judge Benchmark
+Cold runs (a full harness with the tests embedded, parsed and compiled on
+every submission) against warm runs (workers already hold the decoded suite,
+only the user's code is sent) on the local sandbox pool, for a small and a
+large test suite
+
+Run from the backend folder:
+    python benchmarks/bench_warm_judge.py
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from executors import LocalExecutor
+from harness import build_harness, suite_job
+
+WORKERS = 2
+SUBMISSIONS = 60
+USER_CODE = "def solution(nums, target):\n    return sum(nums) + target\n"
+
+
+def make_suite(tests, size):
+    rng = random.Random(tests * size)
+    suite = []
+    for _ in range(tests):
+        nums = [rng.randrange(-1000, 1000) for _ in range(size)]
+        target = rng.randrange(100)
+        suite.append({"input": {"nums": nums, "target": target}, "expected": sum(nums) + target})
+    return suite
+
+
+async def measure(executor, make_job, submissions):
+    # sequential latency first, then everyone at once for throughput
+    latencies = []
+    for n in range(submissions):
+        start = time.perf_counter()
+        result = await executor.run(make_job(n))
+        latencies.append(time.perf_counter() - start)
+        assert result["stderr"] == "", result["stderr"][:200]
+
+    start = time.perf_counter()
+    await asyncio.gather(*[executor.run(make_job(n)) for n in range(submissions)])
+    elapsed = time.perf_counter() - start
+
+    first = latencies[0]
+    latencies.sort()
+    return {
+        "first_ms": first * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "throughput": submissions / elapsed,
+    }
+
+
+def report(label, stats):
+    print(
+        f"  {label:<6} first {stats['first_ms']:8.1f} ms   p50 {stats['p50_ms']:8.1f} ms   "
+        f"p95 {stats['p95_ms']:8.1f} ms   {stats['throughput']:7.1f} submissions/s"
+    )
+
+
+async def run():
+    print(f"{WORKERS} sandbox workers, {SUBMISSIONS} submissions per mode\n")
+    for tests, size in ((10, 10), (200, 1000)):
+        suite = make_suite(tests, size)
+        print(f"{tests} tests x {size} ints ({len(build_harness(USER_CODE, suite)) // 1024} KB harness)")
+
+        cold = LocalExecutor(workers=WORKERS, timeout_sec=30)
+        await cold.start()
+        # a comment keeps every submission's code distinct, like real resubmits
+        cold_stats = await measure(cold, lambda n: build_harness(f"{USER_CODE}# {n}\n", suite), SUBMISSIONS)
+        await cold.close()
+
+        warm = LocalExecutor(workers=WORKERS, timeout_sec=30, preload_suites=True)
+        await warm.start()
+        warm_stats = await measure(
+            warm, lambda n: suite_job(f"{USER_CODE}# {n}\n", "bench", "v1", suite), SUBMISSIONS
+        )
+        await warm.close()
+
+        report("cold", cold_stats)
+        report("warm", warm_stats)
+        print(
+            f"  p50 speedup {cold_stats['p50_ms'] / warm_stats['p50_ms']:.1f}x, "
+            f"throughput {warm_stats['throughput'] / cold_stats['throughput']:.1f}x, "
+            f"suite sent {warm.counters['suite_misses']} times\n"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
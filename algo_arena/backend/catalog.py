@@ -0,0 +1,138 @@
+"""
+AlgoArena Problem Catalog
+Indexes the problem bank once at startup so lookups don't scan every problem
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import random
+from typing import Optional, List, Dict, Tuple
+
+from comparators import comparator_spec
+from languages import signature_spec
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# =====================================================
+# CATALOG
+# =====================================================
+class ProblemCatalog:
+    def __init__(self, problems: List[dict], version: Optional[str] = None):
+        self.problems = problems
+        self._version = version
+
+        # id -> hash of the problem's test suite / whole problem, filled in lazily
+        self._suite_versions: Dict[str, str] = {}
+        self._problem_etags: Dict[str, str] = {}
+
+        # id -> full problem (including hidden tests, used by the judge)
+        self.by_id: Dict[str, dict] = {}
+
+        # difficulty -> list of full problems (used when creating rooms)
+        self.by_difficulty: Dict[str, List[dict]] = {}
+
+        # ready-to-serve summaries, overall, per id and per difficulty
+        self.summaries: List[dict] = []
+        self.summary_by_id: Dict[str, dict] = {}
+        self.summaries_by_difficulty: Dict[str, List[dict]] = {}
+
+        for p in problems:
+            # a typo in a comparator should fail the (re)load, not every submission
+            comparator_spec(p.get("comparator"))
+            if "signature" in p:
+                signature_spec(p["signature"])
+            difficulty = p["difficulty"].lower()
+            summary = {"id": p["id"], "title": p["title"], "difficulty": difficulty}
+
+            self.by_id[p["id"]] = p
+            self.by_difficulty.setdefault(difficulty, []).append(p)
+            self.summaries.append(summary)
+            self.summary_by_id[p["id"]] = summary
+            self.summaries_by_difficulty.setdefault(difficulty, []).append(summary)
+
+    def __len__(self):
+        return len(self.problems)
+
+    @property
+    def version(self) -> str:
+        # changes whenever anything in the problem bank changes
+        if self._version is None:
+            raw = json.dumps(self.problems, sort_keys=True).encode()
+            self._version = hashlib.sha256(raw).hexdigest()
+        return self._version
+
+    def suite_version(self, problem_id: str) -> Optional[str]:
+        # changes only when the problem's tests (or how they're compared / typed) change
+        if problem_id not in self._suite_versions:
+            problem = self.by_id.get(problem_id)
+            if problem is None:
+                return None
+            tests = [
+                problem.get("public_tests", []),
+                problem.get("hidden_tests", []),
+                problem.get("comparator"),
+                problem.get("signature"),
+            ]
+            raw = json.dumps(tests, sort_keys=True).encode()
+            self._suite_versions[problem_id] = hashlib.sha256(raw).hexdigest()[:16]
+        return self._suite_versions[problem_id]
+
+    def problem_etag(self, problem_id: str) -> Optional[str]:
+        # strong validator for GET /problems/{id}: only this problem's content counts
+        if problem_id not in self._problem_etags:
+            problem = self.by_id.get(problem_id)
+            if problem is None:
+                return None
+            raw = json.dumps(problem, sort_keys=True).encode()
+            self._problem_etags[problem_id] = f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+        return self._problem_etags[problem_id]
+
+    def get(self, problem_id: str) -> Optional[dict]:
+        return self.by_id.get(problem_id)
+
+    def page_summaries(
+        self, difficulty: Optional[str] = None, cursor: Optional[str] = None, limit: int = 10
+    ) -> Tuple[List[dict], Optional[str]]:
+        # opaque cursor = where the previous page stopped, pinned to this catalog
+        # version and filter so it can't silently skip or repeat after a reload
+        difficulty = (difficulty or "").lower()
+        offset = self._decode_cursor(cursor, difficulty) if cursor else 0
+
+        items = self.summaries_by_difficulty.get(difficulty, []) if difficulty else self.summaries
+        page = items[offset : offset + max(limit, 0)]
+
+        next_offset = offset + len(page)
+        next_cursor = None
+        if page and next_offset < len(items):
+            next_cursor = self._encode_cursor(difficulty, next_offset)
+        return page, next_cursor
+
+    def _encode_cursor(self, difficulty: str, offset: int) -> str:
+        raw = json.dumps({"v": self.version[:12], "d": difficulty, "o": offset}).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def _decode_cursor(self, cursor: str, difficulty: str) -> int:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            data = json.loads(raw)
+            offset = int(data["o"])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor(cursor)
+
+        if data.get("v") != self.version[:12] or data.get("d") != difficulty or offset < 0:
+            raise InvalidCursor(cursor)
+        return offset
+
+    def random_problem(self, difficulty: str, language: str = "python") -> Optional[dict]:
+        # other languages need the problem's typed signature to generate a main()
+        bucket = self.by_difficulty.get(difficulty.lower())
+        if bucket and language != "python":
+            bucket = [p for p in bucket if "signature" in p]
+        if not bucket:
+            return None
+        return random.choice(bucket)
@@ -0,0 +1,116 @@
+"""
+AlgoArena Comparators
+How a test's actual value is checked against the expected one, per problem:
+
+    "comparator": "exact"                             (default) ==
+    "comparator": {"type": "float", "epsilon": 1e-6}  numbers within epsilon (abs or relative), recursively
+    "comparator": "unordered"                         same elements in any order (duplicates count)
+    "comparator": "set"                               same distinct elements
+
+compare() and diff() run inside the judge harness (their source is embedded
+in every cold harness), so they may only use the standard library
+"""
+
+import inspect
+import json
+from typing import Optional, Union
+
+COMPARATOR_TYPES = ("exact", "float", "unordered", "set")
+DEFAULT_EPSILON = 1e-6
+
+
+def comparator_spec(raw: Optional[Union[str, dict]]) -> dict:
+    # normalizes problems.json's "comparator" field; raises ValueError on anything unknown
+    if raw is None:
+        raw = "exact"
+    if isinstance(raw, str):
+        raw = {"type": raw}
+    if not isinstance(raw, dict) or raw.get("type") not in COMPARATOR_TYPES:
+        raise ValueError(f"Unknown comparator {raw!r} (expected one of {', '.join(COMPARATOR_TYPES)})")
+
+    epsilon = float(raw.get("epsilon", DEFAULT_EPSILON))
+    if epsilon < 0:
+        raise ValueError(f"Comparator epsilon must be >= 0, got {epsilon}")
+    return {"type": raw["type"], "epsilon": epsilon}
+
+
+# =====================================================
+# HARNESS SIDE (embedded in the submission)
+# =====================================================
+def canonical(value):
+    # order-independent key for one element of a collection
+    return json.dumps(value, sort_keys=True, default=repr)
+
+
+def compare(kind, actual, expected, epsilon):
+    def close(a, b):
+        if isinstance(a, bool) or isinstance(b, bool):
+            return type(a) is type(b) and a == b
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            return abs(a - b) <= epsilon * max(1.0, abs(a), abs(b))
+        if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+            return len(a) == len(b) and all(close(x, y) for x, y in zip(a, b))
+        if isinstance(a, dict) and isinstance(b, dict):
+            return a.keys() == b.keys() and all(close(a[k], b[k]) for k in a)
+        return a == b
+
+    if kind == "float":
+        return close(actual, expected)
+    if kind in ("unordered", "set"):
+        if not isinstance(actual, (list, tuple, set, frozenset)) or not isinstance(expected, list):
+            return False
+        if kind == "set":
+            return {canonical(x) for x in actual} == {canonical(x) for x in expected}
+        return sorted(canonical(x) for x in actual) == sorted(canonical(x) for x in expected)
+    return actual == expected
+
+
+def diff(kind, actual, expected, max_chars):
+    # what a failed test reports back: the actual value, cut to max_chars once
+    # serialized, plus missing / extra elements for the collection comparators
+    out = {}
+
+    def capped(key, value):
+        text = json.dumps(value, default=repr)
+        if len(text) <= max_chars:
+            out[key] = json.loads(text)
+        else:
+            out[key] = text[:max_chars] + "..."
+            out["truncated"] = True
+
+    capped("actual", actual)
+
+    collection = (list, tuple, set, frozenset)
+    if kind in ("unordered", "set") and isinstance(actual, collection) and isinstance(expected, list):
+        if kind == "set":
+            have = {canonical(x): x for x in actual}
+            want = {canonical(x): x for x in expected}
+            missing = [x for k, x in want.items() if k not in have]
+            extra = [x for k, x in have.items() if k not in want]
+        else:
+            have = {}
+            for x in actual:
+                have.setdefault(canonical(x), []).append(x)
+            missing = []
+            for x in expected:
+                bucket = have.get(canonical(x))
+                if bucket:
+                    bucket.pop()
+                else:
+                    missing.append(x)
+            extra = [x for bucket in have.values() for x in bucket]
+        capped("missing", missing[:5])
+        capped("extra", extra[:5])
+    return out
+
+
+def _harness_source() -> str:
+    # the functions above as harness code, renamed so they can't clash with the user's names
+    source = "\n\n".join(inspect.getsource(fn) for fn in (canonical, compare, diff))
+    for name in ("canonical", "compare", "diff"):
+        source = source.replace(f"{name}(", f"_arena_{name}(")
+    return source
+
+
+# read once: build_harness pastes it into every cold harness
+HARNESS_SOURCE = _harness_source()
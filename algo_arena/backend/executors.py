@@ -0,0 +1,452 @@
+"""
+AlgoArena Judge Executors
+Pluggable backends that run a generated harness and return its output
+
+Every executor returns a Piston-style "run" dict:
+    {"stdout": str, "stderr": str, "code": int | None, "signal": str | None}
+
+Cancelling the task awaiting run() / stream() abandons the run: the HTTP
+request is dropped, a local sandbox job is killed
+
+Executors with `preloads_suites` take a suite job (harness.suite_job) instead
+of a generated harness: warm workers keep decoded test suites per problem
+version, so a submission only ships the user's code
+
+Compiled languages are sent as native jobs (languages.native_job): Piston
+builds the sources remotely, executors with `runs_binaries` exec an artifact
+the server already compiled
+"""
+
+import ast
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import httpx
+
+import sandbox
+
+
+class ExecutorError(Exception):
+    """The execution engine could not run the code at all (not a user error)"""
+
+
+# =====================================================
+# BASE
+# =====================================================
+class Executor:
+    name = "base"
+    preloads_suites = False  # run() / stream() take harness.suite_job dicts instead of code
+    runs_binaries = False  # native jobs carry a compiled artifact's argv, not just sources
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def run(self, code: str) -> dict:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+    async def stream(self, code: str):
+        # yields ("stdout", line) as output arrives, then ("result", run_dict).
+        # backends that can't stream just replay stdout once the run is over
+        run_data = await self.run(code)
+        for line in run_data.get("stdout", "").splitlines():
+            yield "stdout", line
+        yield "result", run_data
+
+
+# =====================================================
+# PISTON (remote HTTP)
+# =====================================================
+class PistonExecutor(Executor):
+    name = "piston"
+
+    def __init__(
+        self,
+        url: Optional[str],
+        language="python",
+        version="3.10.0",
+        max_connections=100,
+        max_keepalive=20,
+        keepalive_expiry=30.0,
+        connect_timeout=3.0,
+        read_timeout=10.0,
+        pool_timeout=30.0,
+    ):
+        self.url = url
+        self.language = language
+        self.version = version
+
+        # max_connections is also the cap on concurrent requests to Piston:
+        # extra submissions queue on the semaphore, which is much cheaper than
+        # letting hundreds of requests wait inside the httpx connection pool
+        self.max_connections = max_connections
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout, pool=pool_timeout)
+        self.client: Optional[httpx.AsyncClient] = None
+        self._slots = None
+
+    async def start(self):
+        # one client for the whole app, so TCP connections are reused
+        if self.client is None:
+            self.client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._slots = asyncio.Semaphore(self.max_connections)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def run(self, code) -> dict:
+        await self.start()
+        if isinstance(code, dict):
+            # native job: Piston compiles the sources itself and feeds the tests on stdin
+            payload = {
+                "language": code["piston_language"],
+                "version": "*",
+                "files": [{"name": name, "content": body} for name, body in code["files"].items()],
+                "stdin": code["stdin"].decode("utf-8"),
+            }
+        else:
+            payload = {
+                "language": self.language,
+                "version": self.version,
+                "files": [{"content": code}],
+            }
+
+        async with self._slots:
+            try:
+                response = await self.client.post(self.url, json=payload)
+                # 429s and 5xx bodies aren't runs: surface them as an engine error, never a verdict
+                response.raise_for_status()
+                execution = response.json()
+            except Exception as e:
+                raise ExecutorError(e)
+
+        compiled = execution.get("compile") or {}
+        if compiled.get("code"):
+            output = compiled.get("stderr") or compiled.get("output") or ""
+            return {"stdout": "", "stderr": "Compilation failed:\n" + output, "code": compiled["code"], "signal": None}
+        if not isinstance(execution.get("run"), dict):
+            raise ExecutorError(f"Piston response has no run result: {str(execution)[:200]}")
+        return execution["run"]
+
+
+# =====================================================
+# LOCAL (pre-forked sandbox pool)
+# =====================================================
+class _Worker:
+    def __init__(self, limits, suite_cache_size=0, counters=None):
+        self.conn, child_conn = multiprocessing.Pipe()
+        # a fresh interpreter running sandbox.py, not a fork of the server (see sandbox.py)
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-s",
+                sandbox.__file__,
+                str(child_conn.fileno()),
+                json.dumps(limits),
+                str(suite_cache_size),
+            ],
+            pass_fds=(child_conn.fileno(),),
+            stdin=subprocess.DEVNULL,
+            env=sandbox.job_env(),
+        )
+        child_conn.close()
+        # cancel() runs on the event loop while execute() blocks in a helper thread
+        self.lock = threading.Lock()
+        self.current = None  # token of the job the worker is running
+        self.cancelled = None  # token of a job cancelled before it was sent
+        # suite keys the worker holds, kept in the same LRU order as its own cache
+        self.suite_cache_size = suite_cache_size
+        self.suites = OrderedDict()
+        self.counters = counters if counters is not None else {"suite_hits": 0, "suite_misses": 0}
+
+    def _suite_message(self, job):
+        # a suite's tests go down the pipe only the first time this worker needs them
+        if job["suite_key"] in self.suites:
+            self.suites.move_to_end(job["suite_key"])
+            self.counters["suite_hits"] += 1
+            tests = None
+        else:
+            self.suites[job["suite_key"]] = True
+            if len(self.suites) > self.suite_cache_size:
+                self.suites.popitem(last=False)
+            self.counters["suite_misses"] += 1
+            tests = job["tests"]
+        return ("suite", job["user_code"], job["suite_key"], tests, job["options"])
+
+    def execute(self, job, on_line=None, token=None):
+        # blocking round trip, called from a helper thread
+        with self.lock:
+            if token is not None and token is self.cancelled:
+                return {"stdout": "", "stderr": "Cancelled", "code": None, "signal": None}
+            if not isinstance(job, dict):
+                message = ("run", job)
+            elif job["kind"] == "native":
+                message = ("exec", job["argv"], job["stdin"], job["needs_threads"])
+            else:
+                message = self._suite_message(job)
+            self.conn.send((*message, on_line is not None))
+            self.current = token
+        try:
+            while True:
+                kind, value = self.conn.recv()
+                if kind == "result":
+                    return value
+                on_line(value)
+        finally:
+            with self.lock:
+                self.current = None
+
+    def cancel(self, token):
+        # kills the job if it is running, or stops it from starting
+        with self.lock:
+            if self.current is token:
+                self.conn.send("cancel")
+            else:
+                self.cancelled = token
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.conn.close()
+
+
+class LocalExecutor(Executor):
+    """
+    Pool of long-lived sandbox workers (sandbox.py), each forking a fresh job
+    per run. With `preload_suites` (JUDGE_EXECUTOR=warm) it judges suite jobs:
+    each worker keeps up to `suite_cache_size` decoded test suites, and the
+    harness code is already imported in it
+    """
+
+    name = "local"
+    runs_binaries = True
+
+    def __init__(
+        self,
+        workers=2,
+        timeout_sec=5.0,
+        cpu_sec=None,
+        memory_mb=256,
+        output_kb=1024,
+        preload_suites=False,
+        suite_cache_size=64,
+    ):
+        self.workers = workers
+        self.preloads_suites = preload_suites
+        self.suite_cache_size = max(1, suite_cache_size)
+        if preload_suites:
+            self.name = "warm"
+        self.counters = {"suite_hits": 0, "suite_misses": 0}
+        self.limits = {
+            "timeout_sec": timeout_sec,
+            "cpu_sec": cpu_sec or max(1, int(timeout_sec)),
+            "memory_mb": memory_mb,
+            "output_kb": output_kb,
+        }
+        self._pool = []
+        self._idle = None
+        self._threads = None
+        self._loop = None
+
+    async def start(self):
+        if self._idle is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._idle = asyncio.Queue()
+        self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="judge")
+        for _ in range(self.workers):
+            worker = self._spawn()
+            self._pool.append(worker)
+            self._idle.put_nowait(worker)
+
+    async def close(self):
+        if self._idle is None:
+            return
+        for worker in self._pool:
+            worker.stop()
+        self._threads.shutdown(wait=False)
+        self._pool = []
+        self._idle = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "preload_suites": self.preloads_suites,
+            "suite_cache_size": self.suite_cache_size,
+            **self.counters,
+        }
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self.limits, self.suite_cache_size, self.counters)
+
+    def _release(self, worker, future):
+        # called from the helper thread once the worker is really free again
+        if self._idle is None:
+            worker.stop()
+            return
+        if future.exception() is not None or not worker.alive():
+            worker.stop()
+            self._pool.remove(worker)
+            worker = self._spawn()
+            self._pool.append(worker)
+        self._loop.call_soon_threadsafe(self._idle.put_nowait, worker)
+
+    async def _submit(self, code, on_line=None) -> dict:
+        # code: harness source, or a harness.suite_job dict
+        await self.start()
+        worker = await self._idle.get()
+
+        token = object()
+        future = self._threads.submit(worker.execute, code, on_line, token)
+        future.add_done_callback(lambda f: self._release(worker, f))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # nobody wants the verdict any more: stop the job so the worker frees up
+            worker.cancel(token)
+            raise
+        except (EOFError, OSError) as e:
+            raise ExecutorError(f"sandbox worker died: {e}")
+
+    async def run(self, code) -> dict:
+        return await self._submit(code)
+
+    async def stream(self, code):
+        # lines are pushed from the helper thread onto an asyncio queue
+        loop = asyncio.get_running_loop()
+        lines = asyncio.Queue()
+        job = asyncio.ensure_future(
+            self._submit(code, lambda line: loop.call_soon_threadsafe(lines.put_nowait, line))
+        )
+        job.add_done_callback(lambda _: lines.put_nowait(None))
+
+        try:
+            while True:
+                line = await lines.get()
+                if line is None:
+                    break
+                yield "stdout", line
+
+            yield "result", await job
+        finally:
+            # the consumer was cancelled (or stopped reading): kill the job too
+            job.cancel()
+
+
+# =====================================================
+# FAKE (load testing)
+# =====================================================
+_HARNESS_TESTS = re.compile(r"^tests = json\.loads\((.*)\)$", re.MULTILINE)
+
+
+class FakeExecutor(Executor):
+    """
+    Doesn't run anything: waits `latency_ms` (+ up to `jitter_ms`) and prints
+    what the harness would print, with each test passing at `pass_rate`.
+    Lets benchmarks load the arena itself without Piston or a sandbox
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_ms=50.0, jitter_ms=0.0, pass_rate=1.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.pass_rate = pass_rate
+        self.random = random.Random(seed)
+        self.runs = 0
+
+    def _tests(self, code: str) -> list:
+        # the harness embeds its tests as tests = json.loads('<json>')
+        match = _HARNESS_TESTS.search(code)
+        return json.loads(ast.literal_eval(match.group(1))) if match else []
+
+    async def run(self, code: str) -> dict:
+        if isinstance(code, dict):
+            raise ExecutorError("the fake executor only judges Python harnesses")
+        delay_ms = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        await asyncio.sleep(delay_ms / 1000)
+        self.runs += 1
+
+        lines = []
+        tests = self._tests(code)
+        bits = 0
+        for i in range(len(tests)):
+            passed = self.random.random() < self.pass_rate
+            bits |= passed << i
+            line = {
+                "ok": int(passed),
+                "time_ms": round(delay_ms / max(len(tests), 1), 3),
+                "cpu_ms": 0.0,
+                "rss_kb": 10240,
+            }
+            if not passed:
+                line["diff"] = {"actual": None}
+            lines.append(json.dumps(line))
+        lines.append(json.dumps({"bitmap": format(bits, "x"), "passed": bin(bits).count("1"), "total": len(tests)}))
+        return {"stdout": "\n".join(lines) + "\n", "stderr": "", "code": 0, "signal": None}
+
+
+# =====================================================
+# FACTORY
+# =====================================================
+def create_executor(kind: Optional[str] = None) -> Executor:
+    kind = (kind or os.getenv("JUDGE_EXECUTOR", "piston")).lower()
+
+    if kind == "piston":
+        return PistonExecutor(
+            os.getenv("PISTON_API_URL"),
+            max_connections=int(os.getenv("PISTON_MAX_CONNECTIONS", "100")),
+            max_keepalive=int(os.getenv("PISTON_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("PISTON_KEEPALIVE_EXPIRY_SEC", "30")),
+            connect_timeout=float(os.getenv("PISTON_CONNECT_TIMEOUT_SEC", "3")),
+            read_timeout=float(os.getenv("PISTON_READ_TIMEOUT_SEC", "10")),
+        )
+
+    if kind in ("local", "warm"):
+        return LocalExecutor(
+            workers=int(os.getenv("LOCAL_EXECUTOR_WORKERS", "2")),
+            timeout_sec=float(os.getenv("LOCAL_EXECUTOR_TIMEOUT_SEC", "5")),
+            memory_mb=int(os.getenv("LOCAL_EXECUTOR_MEMORY_MB", "256")),
+            preload_suites=kind == "warm",
+            suite_cache_size=int(os.getenv("WARM_SUITE_CACHE_SIZE", "64")),
+        )
+
+    if kind == "fake":
+        return FakeExecutor(
+            latency_ms=float(os.getenv("FAKE_JUDGE_LATENCY_MS", "50")),
+            jitter_ms=float(os.getenv("FAKE_JUDGE_JITTER_MS", "0")),
+            pass_rate=float(os.getenv("FAKE_JUDGE_PASS_RATE", "1.0")),
+        )
+
+    raise ValueError(f"Unknown JUDGE_EXECUTOR '{kind}' (expected 'piston', 'local', 'warm' or 'fake')")
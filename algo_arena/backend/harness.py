@@ -0,0 +1,365 @@
+"""
+AlgoArena Judge Harness
+Runs every test against a Python submission, compares each answer with the
+problem's comparator and prints as little as possible:
+
+    one line per test      {"ok": 1, "time_ms": .., "cpu_ms": .., "rss_kb": ..}
+                           failures add "diff" (the first `max_diffs` only)
+                           or "error" (exception text, capped)
+    one summary line       {"bitmap": "<hex>", "passed": k, "total": n}
+                           bit i of the bitmap is set when test i passed
+
+Per-test lines keep streaming progress working; the summary tells a
+complete run from one that died part way
+
+The submission never shares a process with the judge: run_tests() starts a
+player, a fresh interpreter that loads the code and answers one test at a
+time over a pipe, seeing only the inputs. Comparing, timing and printing stay
+in the judge. Only the judge holds stdout and the expected answers, so a
+submission can't print a verdict, skip a test, patch the comparator or look
+up what it should return
+
+A cold run embeds the source of run_tests(), with the comparators, the tests
+and the code, in one script (build_harness). Warm sandbox workers call it
+directly, on test suites they already decoded (suite_job)
+"""
+
+import inspect
+import json
+from typing import List, Optional, Tuple
+
+from comparators import HARNESS_SOURCE, comparator_spec, compare, diff
+
+MAX_DIFFS = 5
+DIFF_MAX_CHARS = 256
+
+
+def player():
+    # the submission's process, a fresh interpreter run_tests() execs: nothing the judge
+    # holds (the expected answers above all) was ever in its memory. It reads the code,
+    # then one test input at a time (marshalled by the judge), and writes one JSON answer
+    # per line; its prints go nowhere and it can't start processes
+    import builtins
+    import marshal
+    import os
+    import sys
+
+    def default(v):
+        # what JSON has no type for: sets become lists, anything else its repr
+        return list(v) if isinstance(v, (set, frozenset)) else repr(v)
+
+    try:
+        # json.dumps() through the C encoder it uses, without importing json (re, enum, ...)
+        from _json import encode_basestring_ascii, make_encoder
+
+        def encode(v):
+            # same settings as json.dumps(v, default=default); a fresh encoder drops circular-check leftovers
+            encoder = make_encoder({}, default, encode_basestring_ascii, None, ": ", ", ", False, False, True)
+            return "".join(encoder(v, 0))
+
+    except ImportError:
+        from json import dumps
+
+        def encode(v):
+            return dumps(v, default=default)
+
+    commands, answers = os.fdopen(int(sys.argv[1]), "rb"), os.fdopen(int(sys.argv[2]), "w")
+
+    def receive():
+        # one length-prefixed marshal frame from the judge, None once it closed the pipe
+        size = commands.readline()
+        return marshal.loads(commands.read(int(size))) if size else None
+
+    code = 1
+    try:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), 1)
+        try:
+            import resource
+
+            resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+        except (ImportError, ValueError, OSError):
+            pass
+        answers.write("started\n")
+        answers.flush()
+        # started without site (faster): import from where the judge did
+        sys.path[:], user_code = receive()
+        namespace = {"__name__": "__main__", "__builtins__": builtins}
+        exec(compile(user_code, "<submission>", "exec"), namespace)
+        answers.write("ready\n")
+        answers.flush()
+        while True:
+            kwargs = receive()
+            if kwargs is None:
+                break  # no more tests
+            try:
+                if "solution" not in namespace:
+                    raise NameError("name 'solution' is not defined")
+                # Dynamic call: assumes a function named 'solution'
+                out = {"actual": namespace["solution"](**kwargs)}
+            except Exception as e:
+                out = {"error": str(e) or type(e).__name__}
+            try:
+                text = encode(out)
+            except (ValueError, TypeError, RecursionError) as e:
+                text = encode({"error": f"Unserializable result: {e}"})
+            answers.write(text + "\n")
+            answers.flush()
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 0
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+# what run_tests() execs the player with, read once
+PLAYER_SOURCE = inspect.getsource(player) + "\n\nplayer()\n"
+
+
+def run_tests(user_code, tests, kind, epsilon, max_diffs, diff_max_chars):
+    # One flushed line per test, so streaming executors can report progress as it happens
+    # Each line carries the wall time the judge waited for the answer, the player's CPU
+    # time and how far its peak RSS grew once the interpreter was up (KB, from /proc:
+    # None where there is none)
+    import json
+    import marshal
+    import os
+    import signal
+    import sys
+    from time import perf_counter
+
+    def proc(pid, name):
+        # reads /proc/<pid>/<name> afresh on every call, through one fd
+        try:
+            fd = os.open(f"/proc/{pid}/{name}", os.O_RDONLY)
+        except OSError:
+            return lambda: ""
+        return lambda: os.pread(fd, 4096, 0).decode()
+
+    def cpu_ms(schedstat):
+        # time the player spent on a CPU (ns in /proc)
+        stat = schedstat()
+        return int(stat.split()[0]) / 1e6 if stat else None
+
+    def peak_rss_kb(status):
+        for line in status().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+        return None
+
+    def send(value):
+        data = marshal.dumps(value)
+        commands.write(b"%d\n" % len(data) + data)
+        commands.flush()
+
+    def gone(pid):
+        # the player died: a signal (CPU limit, crash) ends the judge the same way, with the
+        # reason on stderr; any other exit just leaves the remaining tests without a line
+        _, status = os.waitpid(pid, 0)
+        if os.WIFSIGNALED(status):
+            sig = signal.Signals(os.WTERMSIG(status))
+            reason = "Time limit exceeded" if sig == signal.SIGXCPU else f"Process killed by {sig.name}"
+            print(reason, file=sys.stderr, flush=True)
+            os._exit(1)
+        sys.stdout.flush()
+        os._exit(os.WEXITSTATUS(status))
+
+    sys.stdout.flush()
+    command_r, command_w = os.pipe()
+    answer_r, answer_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # the exec drops this process's memory, only the player's pipe ends survive it
+        try:
+            os.set_inheritable(command_r, True)
+            os.set_inheritable(answer_w, True)
+            argv = [sys.executable, "-S", "-c", PLAYER_SOURCE, str(command_r), str(answer_w)]
+            os.execv(sys.executable, argv)
+        finally:
+            os._exit(127)
+    os.close(command_r)
+    os.close(answer_w)
+    commands, answers = os.fdopen(command_w, "wb"), os.fdopen(answer_r)
+
+    # the interpreter's own memory isn't the submission's: only what loading and running it adds counts
+    schedstat, status = proc(pid, "schedstat"), proc(pid, "status")
+    if answers.readline() != "started\n":
+        gone(pid)
+    baseline_kb = peak_rss_kb(status)
+    try:
+        send((sys.path, user_code))
+    except BrokenPipeError:
+        gone(pid)
+    if answers.readline() != "ready\n":
+        gone(pid)  # the code didn't load: its traceback is on stderr
+
+    cpu = cpu_ms(schedstat)
+    bits, passed, diffs = 0, 0, 0
+    for i, t in enumerate(tests):
+        wall = perf_counter()
+        try:
+            # only the input crosses to the player
+            send(t["input"])
+        except BrokenPipeError:
+            gone(pid)
+        line = answers.readline()
+        elapsed = perf_counter() - wall
+        if not line:
+            gone(pid)
+        try:
+            answer = json.loads(line)
+            if not isinstance(answer, dict):
+                raise ValueError(line)
+        except ValueError:
+            answer = {"error": "Unreadable answer"}
+
+        err = answer.get("error")
+        ok = err is None and compare(kind, answer.get("actual"), t["expected"], epsilon)
+        out = {"ok": 1 if ok else 0}
+        if ok:
+            bits |= 1 << i
+            passed += 1
+        elif err is not None:
+            out["error"] = str(err)[:diff_max_chars]
+        elif diffs < max_diffs:
+            diffs += 1
+            out["diff"] = diff(kind, answer.get("actual"), t["expected"], diff_max_chars)
+        # the player waits for the next index meanwhile: its CPU time only moves while answering
+        cpu_after = cpu_ms(schedstat)
+        out["time_ms"] = round(elapsed * 1000, 3)
+        out["cpu_ms"] = round(cpu_after - cpu, 3) if cpu is not None else None
+        peak_kb = peak_rss_kb(status)
+        out["rss_kb"] = max(peak_kb - baseline_kb, 0) if peak_kb is not None and baseline_kb is not None else None
+        cpu = cpu_after
+        print(json.dumps(out, default=repr), flush=True)
+
+    commands.close()
+    os.waitpid(pid, 0)
+    print(json.dumps({"bitmap": format(bits, "x"), "passed": passed, "total": len(tests)}), flush=True)
+
+
+def _embedded_run_tests() -> str:
+    # run_tests as harness code, calling the embedded _arena_* comparators
+    source = inspect.getsource(run_tests)
+    for name in ("run_tests", "compare", "diff"):
+        source = source.replace(f"{name}(", f"_arena_{name}(")
+    return source
+
+
+# everything in a cold harness but the tests and the call, built once
+HARNESS_PRELUDE = (
+    f"import json\n{HARNESS_SOURCE}\n\nPLAYER_SOURCE = {PLAYER_SOURCE!r}\n\n{_embedded_run_tests()}\n"
+)
+
+
+def build_harness(
+    user_code: str,
+    all_tests: list,
+    comparator=None,
+    max_diffs: int = MAX_DIFFS,
+    diff_max_chars: int = DIFF_MAX_CHARS,
+) -> str:
+    # the whole judge as one script, for executors that start from nothing (cold)
+    spec = comparator_spec(comparator)
+
+    full_code = HARNESS_PRELUDE
+    # decode with json.loads so true/false/null in tests stay valid Python
+    full_code += f"tests = json.loads({json.dumps(all_tests)!r})\n"
+    # the submission is only a string here: it runs in the player process
+    full_code += (
+        f"_arena_run_tests({user_code!r}, tests, {spec['type']!r}, {spec['epsilon']!r}, "
+        f"{max_diffs!r}, {diff_max_chars!r})\n"
+    )
+    return full_code
+
+
+def suite_job(
+    user_code: str,
+    problem_id: str,
+    suite_version: str,
+    all_tests: list,
+    comparator=None,
+    max_diffs: int = MAX_DIFFS,
+    diff_max_chars: int = DIFF_MAX_CHARS,
+) -> dict:
+    # what a warm executor gets instead of a harness: the code and which suite to
+    # run it against; `tests` only travels to workers that don't hold that version yet
+    spec = comparator_spec(comparator)
+    return {
+        "kind": "suite",
+        "user_code": user_code,
+        "suite_key": (problem_id, suite_version),
+        "tests": all_tests,
+        "options": (spec["type"], spec["epsilon"], max_diffs, diff_max_chars),
+    }
+
+
+# =====================================================
+# GRADING (server side)
+# =====================================================
+def grade_test(test: dict, line: str) -> dict:
+    # one per-test line of harness output -> the test result clients see
+    try:
+        data = json.loads(line)
+        passed = bool(data["ok"])
+    except (ValueError, TypeError, KeyError):
+        data, passed = {"error": "Execution Error"}, False
+
+    diff = data.get("diff") or {}
+    result = {
+        "input": test["input"],
+        "expected": test["expected"],
+        # only failures report what the solution returned
+        "actual": diff.get("actual"),
+        "passed": passed,
+        "time_ms": data.get("time_ms"),
+        "cpu_ms": data.get("cpu_ms"),
+        "rss_kb": data.get("rss_kb"),
+    }
+    if data.get("error"):
+        result["error"] = data["error"]
+    for key in ("truncated", "missing", "extra"):
+        if key in diff:
+            result[key] = diff[key]
+    return result
+
+
+def parse_summary(line: str) -> Optional[dict]:
+    try:
+        data = json.loads(line)
+        return {"bits": int(data["bitmap"], 16), "passed": int(data["passed"]), "total": int(data["total"])}
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+def grade_run(all_tests: list, stdout_lines: List[str], graded: Optional[list] = None) -> Tuple[list, bool]:
+    # grades whatever the stream didn't already cover (tests without a line are
+    # execution errors) and tells whether the run was complete: exactly one line
+    # per test, then a summary that agrees with them. A run that died part way
+    # keeps the verdicts it printed; output the judge can't have written fails every test
+    test_results = list(graded or [])
+    for i in range(len(test_results), len(all_tests)):
+        line = stdout_lines[i] if i < len(stdout_lines) else ""
+        test_results.append(grade_test(all_tests[i], line))
+
+    if len(stdout_lines) <= len(all_tests):
+        return test_results, False
+    summary = parse_summary(stdout_lines[len(all_tests)])
+    bits = sum(1 << i for i, result in enumerate(test_results) if result["passed"])
+    if len(stdout_lines) == len(all_tests) + 1 and summary == {
+        "bits": bits,
+        "passed": sum(1 for result in test_results if result["passed"]),
+        "total": len(all_tests),
+    }:
+        return test_results, True
+
+    for result in test_results:
+        result["passed"] = False
+        result["error"] = "Unexpected judge output"
+    return test_results, False
@@ -0,0 +1,250 @@
+"""
+AlgoArena Submission History
+Append-only archive of every judged submission. Handlers only queue rows in
+memory; one background task writes them to SQLite (WAL) in batches from a
+worker thread, so the event loop never waits on disk. Reads page through a
+player's history newest-first with a keyset cursor
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from catalog import InvalidCursor
+
+COLUMNS = (
+    "submission_id",
+    "username",
+    "room_id",
+    "problem_id",
+    "problem_version",
+    "status",
+    "total_passed",
+    "total_tests",
+    "execution_time_ms",
+    "cpu_time_ms",
+    "peak_memory_kb",
+    "code",
+    "test_results",
+    "submitted_at",
+)
+# the player's source and the per-test results (hidden tests' inputs and expected
+# answers included) stay in the archive: for_player only returns them when asked
+PRIVATE_COLUMNS = ("code", "test_results")
+
+
+class SubmissionHistory:
+    def __init__(
+        self,
+        path: str = "arena.db",
+        batch_size: int = 200,
+        flush_interval_sec: float = 0.05,
+        max_pending: int = 50000,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_sec = flush_interval_sec
+        self.max_pending = max_pending
+        self._local = threading.local()
+        self.pending: List[tuple] = []
+        self.task = None
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+        self.recorded = 0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self.last_batch_ms = None
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS submissions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                submission_id TEXT NOT NULL UNIQUE,
+                username TEXT NOT NULL,
+                room_id TEXT,
+                problem_id TEXT,
+                problem_version TEXT,
+                status TEXT,
+                total_passed INTEGER,
+                total_tests INTEGER,
+                execution_time_ms REAL,
+                cpu_time_ms REAL,
+                peak_memory_kb INTEGER,
+                code TEXT,
+                test_results TEXT,
+                submitted_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS submissions_user_id ON submissions (username, id);
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    # =====================================================
+    # WRITES
+    # =====================================================
+    def record(self, submission: dict) -> bool:
+        # never blocks: the row waits in memory until the writer picks it up
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            print(f"[LOG] Submission history backlog full, dropped {submission.get('submission_id')}")
+            return False
+
+        row = dict(submission)
+        row["test_results"] = json.dumps(row.get("test_results") or [], default=str)
+        submitted_at = row.get("submitted_at")
+        row["submitted_at"] = submitted_at.isoformat() if hasattr(submitted_at, "isoformat") else submitted_at
+        self.pending.append(tuple(row.get(column) for column in COLUMNS))
+        self.recorded += 1
+
+        if len(self.pending) >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def start(self):
+        if self.task is None:
+            # fresh primitives for the loop we're starting on (tests run several loops)
+            self._wake = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self.task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        # whatever is still queued goes to disk before shutdown
+        await self.flush()
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_sec)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        written = 0
+        async with self._flush_lock:
+            while self.pending:
+                batch = self.pending[: self.batch_size]
+                del self.pending[: len(batch)]
+                try:
+                    await asyncio.to_thread(self._write, batch)
+                except Exception as e:
+                    # keep the rows and retry on the next tick
+                    self.pending[:0] = batch
+                    self.write_errors += 1
+                    print(f"[LOG] Submission history write failed: {e}")
+                    break
+                written += len(batch)
+        return written
+
+    def _write(self, batch: List[tuple]):
+        start = time.perf_counter()
+        conn = self._conn()
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # a retried batch may already be on disk, submission_id keeps it idempotent
+            conn.executemany(
+                f"INSERT OR IGNORE INTO submissions ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                batch,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self.batches += 1
+        self.written += len(batch)
+        self.last_batch_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    # =====================================================
+    # READS
+    # =====================================================
+    def for_player(
+        self, username: str, cursor: Optional[str] = None, limit: int = 20, include_private: bool = False
+    ) -> Tuple[list, Optional[str]]:
+        # newest first; the cursor is the last row id seen, so every page is an index range scan
+        columns = COLUMNS if include_private else tuple(c for c in COLUMNS if c not in PRIVATE_COLUMNS)
+        before = self._decode_cursor(cursor, username) if cursor else None
+        query = f"SELECT id, {', '.join(columns)} FROM submissions WHERE username = ?"
+        params = [username]
+        if before is not None:
+            query += " AND id < ?"
+            params.append(before)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._conn().execute(query, params).fetchall()
+        items = []
+        for row in rows[:limit]:
+            item = dict(zip(columns, row[1:]))
+            if include_private:
+                item["test_results"] = json.loads(item["test_results"] or "[]")
+            items.append(item)
+
+        next_cursor = self._encode_cursor(username, rows[limit - 1][0]) if len(rows) > limit else None
+        return items, next_cursor
+
+    @staticmethod
+    def _encode_cursor(username: str, row_id: int) -> str:
+        raw = json.dumps({"u": username, "b": row_id}).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, username: str) -> int:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            data = json.loads(raw)
+            row_id = int(data["b"])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor(cursor)
+
+        if data.get("u") != username or row_id < 1:
+            raise InvalidCursor(cursor)
+        return row_id
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "batch_size": self.batch_size,
+            "flush_interval_sec": self.flush_interval_sec,
+            "pending": len(self.pending),
+            "recorded": self.recorded,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+            "last_batch_ms": self.last_batch_ms,
+        }
+
+
+def create_submission_history() -> SubmissionHistory:
+    return SubmissionHistory(
+        path=os.getenv("SUBMISSION_HISTORY_PATH", os.getenv("ROOM_STORE_PATH", "arena.db")),
+        batch_size=int(os.getenv("SUBMISSION_HISTORY_BATCH_SIZE", "200")),
+        flush_interval_sec=float(os.getenv("SUBMISSION_HISTORY_FLUSH_SEC", "0.05")),
+        max_pending=int(os.getenv("SUBMISSION_HISTORY_MAX_PENDING", "50000")),
+    )
@@ -0,0 +1,91 @@
+"""
+AlgoArena HTTP Caching Helpers
+ETags + conditional GETs for payloads that only change with the problem bank,
+so browsers and proxies can revalidate instead of re-downloading, and a
+cache of those payloads already rendered to JSON bytes
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from fastapi import Response
+
+
+def make_etag(*parts: str) -> str:
+    # strong ETag: same parts -> byte-identical response
+    raw = "\x1f".join(parts).encode()
+    return f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cache_control(max_age_sec: int) -> str:
+    return f"public, max-age={max_age_sec}"
+
+
+def not_modified(headers: dict) -> Response:
+    # 304 carries the validators again but no body
+    return Response(status_code=304, headers=headers)
+
+
+class RenderCache:
+    """
+    JSON bodies rendered once per catalog version. Endpoints still declare
+    their response_model (for the OpenAPI schema) but return the cached bytes
+    as a raw Response, which skips FastAPI's validate + encode step
+    """
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> bytes
+        self.catalog_version = None
+        self.hits = 0
+        self.misses = 0
+        # sync endpoints run in FastAPI's threadpool
+        self._lock = threading.Lock()
+
+    def get_or_render(self, catalog_version: str, key: Hashable, render: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            if catalog_version != self.catalog_version:
+                self.entries.clear()
+                self.catalog_version = catalog_version
+
+            body = self.entries.get(key)
+            if body is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return body
+            self.misses += 1
+
+        # rendering happens outside the lock; two threads may render the
+        # same key once, which is harmless
+        body = render()
+        with self._lock:
+            if catalog_version == self.catalog_version:
+                self.entries[key] = body
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return body
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
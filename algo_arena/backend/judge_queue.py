@@ -0,0 +1,170 @@
+"""
+AlgoArena Judge Queue
+Central bounded queue in front of the executor: a fixed number of workers
+run judge jobs, and new jobs are refused (with a retry-after hint) once too
+many are already waiting. A job whose submitter stops waiting is dropped
+from the queue, or cancelled on its worker (and so in the executor) if it
+already started
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Awaitable, Dict, Hashable
+
+
+class JudgeQueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Judge queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SubmissionSuperseded(Exception):
+    """The same player submitted again in the same room before this one was judged"""
+
+
+class JudgeQueue:
+    def __init__(self, workers=16, max_depth=200):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.queue = None
+        self.tasks = []
+        self.in_flight = 0
+
+        # sizing numbers for the executor fleet
+        self.accepted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.cancelled = {"queued": 0, "running": 0}
+        self.wasted_run_sec = 0.0  # executor time spent on runs nobody waited for
+        self.recent_waits = deque(maxlen=500)  # seconds spent queued
+        self.recent_runs = deque(maxlen=500)  # seconds spent executing
+
+    def start(self):
+        if self.queue is not None:
+            return
+        self.queue = asyncio.Queue()
+        self.tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.queue = None
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+    def retry_after(self) -> int:
+        # rough time for the current backlog to drain, at least a second
+        run_sec = sum(self.recent_runs) / len(self.recent_runs) if self.recent_runs else 1.0
+        return max(1, math.ceil(self.depth * run_sec / self.workers))
+
+    async def submit(self, fn, *args):
+        # runs `await fn(*args)` on a judge worker and returns its result
+        self.start()
+        if self.depth >= self.max_depth:
+            self.rejected += 1
+            raise JudgeQueueFull(self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((future, fn, args, time.monotonic()))
+        self.accepted += 1
+        return await future
+
+    async def _worker(self):
+        while True:
+            future, fn, args, enqueued_at = await self.queue.get()
+            if future.cancelled():
+                # the submitter went away while we were queued
+                self.cancelled["queued"] += 1
+                continue
+
+            started_at = time.monotonic()
+            self.recent_waits.append(started_at - enqueued_at)
+            self.in_flight += 1
+            # the submitter giving up cancels the run itself, freeing the executor
+            job = asyncio.ensure_future(fn(*args))
+            future.add_done_callback(lambda f, job=job: job.cancel() if f.cancelled() else None)
+            try:
+                result = await job
+            except asyncio.CancelledError:
+                if future.cancelled() and job.cancelled():
+                    self.cancelled["running"] += 1
+                    self.wasted_run_sec += time.monotonic() - started_at
+                    continue
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self.in_flight -= 1
+            # cancelled runs are counted above: completed and recent_runs are finished ones only
+            self.completed += 1
+            self.recent_runs.append(time.monotonic() - started_at)
+
+    def stats(self) -> dict:
+        waits = sorted(self.recent_waits)
+
+        def pct(p):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))] * 1000, 2)
+
+        return {
+            "workers": self.workers,
+            "max_depth": self.max_depth,
+            "depth": self.depth,
+            "in_flight": self.in_flight,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "cancelled_queued": self.cancelled["queued"],
+            "cancelled_running": self.cancelled["running"],
+            "wasted_run_sec": round(self.wasted_run_sec, 3),
+            "wait_ms_p50": pct(0.50),
+            "wait_ms_p95": pct(0.95),
+            "wait_ms_max": pct(1.0),
+            "retry_after_sec": self.retry_after(),
+        }
+
+
+class InFlightSubmissions:
+    """
+    At most one judge run per key (room, player): starting a new one cancels
+    the previous run, whose caller gets SubmissionSuperseded instead of a verdict
+    """
+
+    def __init__(self):
+        self.tasks: Dict[Hashable, asyncio.Task] = {}
+        self.superseded = 0
+        self._replaced = set()
+
+    async def run(self, key: Hashable, coro: Awaitable):
+        previous = self.tasks.get(key)
+        if previous is not None and not previous.done():
+            self._replaced.add(previous)
+            previous.cancel()
+            self.superseded += 1
+
+        task = self.tasks[key] = asyncio.ensure_future(coro)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if task in self._replaced:
+                raise SubmissionSuperseded()
+            raise
+        finally:
+            self._replaced.discard(task)
+            if self.tasks.get(key) is task:
+                del self.tasks[key]
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self.tasks), "superseded": self.superseded}
@@ -0,0 +1,658 @@
+"""
+AlgoArena Languages
+Python submissions run through the in-process harness (harness.py). Every
+other language has an adapter: it generates a main() around the player's
+`solution`, knows how to compile it, and how to run the result. Problems opt
+in with a typed signature in problems.json:
+
+    "signature": {"params": {"nums": "int[]", "target": "int"}, "returns": "int[]"}
+
+    types: int, long, double, bool, string, and arrays of them (int[], string[], ...)
+
+The generated program reads the tests from stdin (length-prefixed tokens,
+see encode_tests) and prints one line per test, {"actual": <json>, "time_ms",
+"cpu_ms", "rss_kb"} or {"error": "..."}. NativeGrader turns those into the
+usual harness lines, running the comparators on the server
+
+Compiled artifacts are cached on disk by sha256(language, toolchain version,
+sources), so judging the same code again skips the compiler; compile errors
+are cached the same way
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import resource
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from comparators import comparator_spec, compare, diff
+from harness import DIFF_MAX_CHARS, MAX_DIFFS
+from sandbox import JVM_BASE_MEMORY_MB, JVM_ENV, JVM_TASKS, job_env, nproc_limit, user_tasks
+
+SCALAR_TYPES = ("int", "long", "double", "bool", "string")
+
+
+class CompileError(Exception):
+    def __init__(self, output: str):
+        super().__init__("Compilation failed")
+        self.output = output
+
+
+def signature_spec(raw: dict) -> dict:
+    # normalizes problems.json's "signature"; raises ValueError on anything unknown
+    if not isinstance(raw, dict) or not isinstance(raw.get("params"), dict) or "returns" not in raw:
+        raise ValueError(f"Signature needs 'params' and 'returns', got {raw!r}")
+    for name, kind in [*raw["params"].items(), ("return value", raw["returns"])]:
+        if not isinstance(kind, str) or kind.removesuffix("[]") not in SCALAR_TYPES:
+            raise ValueError(f"Unsupported type {kind!r} for {name} (expected {', '.join(SCALAR_TYPES)} or arrays)")
+    return {"params": list(raw["params"].items()), "returns": raw["returns"]}
+
+
+# =====================================================
+# TEST ENCODING (stdin of the generated program)
+# =====================================================
+def _encode_value(value, kind: str, out: List[bytes]):
+    if kind.endswith("[]"):
+        out.append(str(len(value)).encode())
+        for item in value:
+            _encode_value(item, kind[:-2], out)
+    elif kind == "string":
+        raw = value.encode("utf-8")
+        out.append(str(len(raw)).encode() + b":" + raw)
+    elif kind == "bool":
+        out.append(b"1" if value else b"0")
+    elif kind == "double":
+        out.append(repr(float(value)).encode())
+    else:
+        out.append(str(int(value)).encode())
+
+
+def encode_tests(tests: list, signature: dict) -> bytes:
+    # whitespace-separated tokens: the test count, then every parameter of every
+    # test in signature order; strings are <byte length>:<bytes>, arrays <length> items...
+    out = [str(len(tests)).encode()]
+    for test in tests:
+        for name, kind in signature["params"]:
+            _encode_value(test["input"][name], kind, out)
+    return b"\n".join(out) + b"\n"
+
+
+# =====================================================
+# GRADING (server side)
+# =====================================================
+class NativeGrader:
+    """
+    Turns the generated program's lines into harness lines (the same shape
+    build_harness prints), so grade_test / grade_run work unchanged
+    """
+
+    def __init__(self, all_tests: list, comparator=None, max_diffs=MAX_DIFFS, diff_max_chars=DIFF_MAX_CHARS):
+        spec = comparator_spec(comparator)
+        self.tests = all_tests
+        self.kind, self.epsilon = spec["type"], spec["epsilon"]
+        self.max_diffs = max_diffs
+        self.diff_max_chars = diff_max_chars
+        self.lines: List[str] = []
+        self.bits, self.passed, self.diffs = 0, 0, 0
+
+    def line(self, raw: str) -> str:
+        index = len(self.lines)
+        try:
+            data = json.loads(raw)
+            if not isinstance(data, dict):
+                raise ValueError(raw)
+        except ValueError:
+            self.lines.append(raw)  # grade_test reports it as an execution error
+            return raw
+
+        out = {"ok": 0}
+        test = self.tests[index]
+        if "error" in data:
+            out["error"] = str(data["error"])[: self.diff_max_chars]
+        elif compare(self.kind, data.get("actual"), test["expected"], self.epsilon):
+            out["ok"] = 1
+            self.bits |= 1 << index
+            self.passed += 1
+        elif self.diffs < self.max_diffs:
+            self.diffs += 1
+            out["diff"] = diff(self.kind, data.get("actual"), test["expected"], self.diff_max_chars)
+        for key in ("time_ms", "cpu_ms", "rss_kb"):
+            out[key] = data.get(key)
+
+        line = json.dumps(out)
+        self.lines.append(line)
+        return line
+
+    def translate(self, stdout_lines: List[str]) -> List[str]:
+        # whatever line() hasn't seen yet, plus the summary once every test reported
+        for raw in stdout_lines[len(self.lines) : len(self.tests)]:
+            self.line(raw)
+        if len(self.lines) < len(self.tests):
+            return list(self.lines)
+        summary = {"bitmap": format(self.bits, "x"), "passed": self.passed, "total": len(self.tests)}
+        return self.lines + [json.dumps(summary)]
+
+
+# =====================================================
+# ADAPTERS
+# =====================================================
+class LanguageAdapter:
+    name = "base"
+    piston_language = ""
+    compiler = ""  # looked up on PATH
+    version_flag = "--version"
+    # runtimes that start their own threads (the JVM): run and compile under the sandbox's JVM limits
+    needs_threads = False
+
+    def __init__(self):
+        self._toolchain_version = None
+
+    def available(self) -> bool:
+        return shutil.which(self.compiler) is not None
+
+    def toolchain_version(self) -> str:
+        if self._toolchain_version is None:
+            probe = subprocess.run(
+                [self.compiler, self.version_flag], capture_output=True, text=True, timeout=30
+            )
+            output = (probe.stdout or probe.stderr).strip()
+            self._toolchain_version = output.splitlines()[0] if output else "unknown"
+        return self._toolchain_version
+
+    def sources(self, user_code: str, signature: dict) -> Dict[str, str]:
+        # file name -> content, compiled together in one directory
+        raise NotImplementedError
+
+    def compile_argv(self) -> List[str]:
+        raise NotImplementedError
+
+    def run_argv(self, artifact_dir: str, memory_mb: int) -> List[str]:
+        raise NotImplementedError
+
+
+CPP_TYPES = {"int": "int", "long": "long long", "double": "double", "bool": "bool", "string": "string"}
+
+CPP_MAIN = r"""
+// ===== AlgoArena harness =====
+namespace arena {
+template <class T> void read(istream& in, T& v) {
+    if constexpr (is_same_v<T, bool>) { int b; in >> b; v = b != 0; }
+    else if constexpr (is_same_v<T, string>) {
+        size_t n; char colon; in >> n; in.get(colon);
+        v.resize(n); in.read(&v[0], n);
+    }
+    else if constexpr (is_arithmetic_v<T>) { in >> v; }
+    else {
+        size_t n; in >> n; v.resize(n);
+        for (size_t i = 0; i < n; i++) { typename T::value_type x; read(in, x); v[i] = x; }
+    }
+}
+
+void write_string(ostream& out, const string& s) {
+    out << '"';
+    for (unsigned char c : s) {
+        if (c == '"' || c == '\\') out << '\\' << c;
+        else if (c == '\n') out << "\\n";
+        else if (c < 0x20) { char buf[8]; snprintf(buf, sizeof buf, "\\u%%04x", c); out << buf; }
+        else out << c;
+    }
+    out << '"';
+}
+
+template <class T> void write(ostream& out, const T& v) {
+    if constexpr (is_same_v<T, bool>) out << (v ? "true" : "false");
+    else if constexpr (is_integral_v<T>) out << (long long)v;
+    else if constexpr (is_floating_point_v<T>) {
+        if (isfinite(v)) out << setprecision(17) << v; else out << "null";
+    }
+    else if constexpr (is_convertible_v<T, string>) write_string(out, string(v));
+    else {
+        out << '[';
+        bool first = true;
+        for (const auto& x : v) {
+            if (!first) out << ',';
+            first = false;
+            write(out, (typename T::value_type)x);
+        }
+        out << ']';
+    }
+}
+
+// peak RSS of this program (VmHWM, KB); getrusage's maxrss would also count the worker it was exec'd from
+long peak_rss_kb() {
+    ifstream status("/proc/self/status");
+    string line;
+    while (getline(status, line))
+        if (line.rfind("VmHWM:", 0) == 0) return stol(line.substr(6));
+    return -1;
+}
+
+void write_rss(ostream& out, long baseline) {
+    long peak = peak_rss_kb();
+    if (peak < 0 || baseline < 0) out << "null";
+    else out << max(peak - baseline, 0L);
+}
+}  // namespace arena
+
+int main() {
+    ios::sync_with_stdio(false);
+    long baseline_kb = arena::peak_rss_kb();  // the runtime itself doesn't count
+    size_t tests; cin >> tests;
+    for (size_t t = 0; t < tests; t++) {
+%(read_args)s
+        auto wall = chrono::steady_clock::now();
+        clock_t cpu = clock();
+        ostringstream line;
+        try {
+            auto res = solution(%(call_args)s);
+            line << "{\"actual\":";
+            arena::write(line, res);
+        } catch (const exception& e) {
+            line << "{\"error\":";
+            arena::write_string(line, e.what());
+        } catch (...) {
+            line << "{\"error\":\"unknown exception\"";
+        }
+        double ms = chrono::duration<double, milli>(chrono::steady_clock::now() - wall).count();
+        double cpu_ms = 1000.0 * (clock() - cpu) / CLOCKS_PER_SEC;
+        line << ",\"time_ms\":" << ms << ",\"cpu_ms\":" << cpu_ms << ",\"rss_kb\":";
+        arena::write_rss(line, baseline_kb);
+        line << "}";
+        cout << line.str() << endl;
+    }
+}
+"""
+
+
+class CppAdapter(LanguageAdapter):
+    name = "cpp"
+    piston_language = "c++"
+    compiler = "g++"
+    flags = ["-std=c++17", "-O2", "-pipe"]
+
+    def cpp_type(self, kind: str) -> str:
+        if kind.endswith("[]"):
+            return f"vector<{self.cpp_type(kind[:-2])}>"
+        return CPP_TYPES[kind]
+
+    def starter_code(self, signature: dict) -> str:
+        params = ", ".join(f"{self.cpp_type(kind)} {name}" for name, kind in signature["params"])
+        return f"{self.cpp_type(signature['returns'])} solution({params}) {{\n    // Your code here\n}}\n"
+
+    def sources(self, user_code: str, signature: dict) -> Dict[str, str]:
+        read_args = "\n".join(
+            f"        {self.cpp_type(kind)} arg{i}; arena::read(cin, arg{i});"
+            for i, (_, kind) in enumerate(signature["params"])
+        )
+        call_args = ", ".join(f"arg{i}" for i in range(len(signature["params"])))
+        main = CPP_MAIN % {"read_args": read_args, "call_args": call_args}
+        return {"solution.cpp": "#include <bits/stdc++.h>\nusing namespace std;\n\n" + user_code + "\n" + main}
+
+    def compile_argv(self) -> List[str]:
+        return [self.compiler, *self.flags, "-o", "solution", "solution.cpp"]
+
+    def run_argv(self, artifact_dir: str, memory_mb: int) -> List[str]:
+        return [os.path.join(artifact_dir, "solution")]
+
+
+JAVA_TYPES = {"int": "int", "long": "long", "double": "double", "bool": "boolean", "string": "String"}
+JAVA_READERS = {"int": "readInt", "long": "readLong", "double": "readDouble", "bool": "readBool", "string": "readString"}
+
+JAVA_MAIN = r"""
+import java.io.*;
+import java.lang.management.*;
+import java.lang.reflect.Array;
+import java.nio.charset.StandardCharsets;
+
+// ===== AlgoArena harness =====
+public class Main {
+    static InputStream in = new BufferedInputStream(System.in);
+
+    static String token() throws IOException {
+        StringBuilder sb = new StringBuilder();
+        int c = in.read();
+        while (c == ' ' || c == '\n' || c == '\r' || c == '\t') c = in.read();
+        while (c != -1 && c != ' ' && c != '\n' && c != ':') { sb.append((char) c); c = in.read(); }
+        return sb.toString();
+    }
+
+    static int readInt() throws IOException { return Integer.parseInt(token()); }
+    static long readLong() throws IOException { return Long.parseLong(token()); }
+    static double readDouble() throws IOException { return Double.parseDouble(token()); }
+    static boolean readBool() throws IOException { return readInt() != 0; }
+    static String readString() throws IOException {
+        int n = readInt();  // token() consumed the ':'
+        byte[] raw = in.readNBytes(n);
+        return new String(raw, StandardCharsets.UTF_8);
+    }
+%(array_readers)s
+    static String json(Object v) {
+        if (v == null) return "null";
+        if (v instanceof Boolean || v instanceof Integer || v instanceof Long) return v.toString();
+        if (v instanceof Double) {
+            double d = (Double) v;
+            return Double.isFinite(d) ? Double.toString(d) : "null";
+        }
+        if (v instanceof String) {
+            StringBuilder sb = new StringBuilder("\"");
+            for (char c : ((String) v).toCharArray()) {
+                if (c == '"' || c == '\\') sb.append('\\').append(c);
+                else if (c == '\n') sb.append("\\n");
+                else if (c < 0x20) sb.append(String.format("\\u%%04x", (int) c));
+                else sb.append(c);
+            }
+            return sb.append('"').toString();
+        }
+        if (v.getClass().isArray()) {
+            StringBuilder sb = new StringBuilder("[");
+            for (int i = 0; i < Array.getLength(v); i++) {
+                if (i > 0) sb.append(',');
+                sb.append(json(Array.get(v, i)));
+            }
+            return sb.append(']').toString();
+        }
+        if (v instanceof Iterable) {
+            StringBuilder sb = new StringBuilder("[");
+            boolean first = true;
+            for (Object x : (Iterable<?>) v) {
+                if (!first) sb.append(',');
+                first = false;
+                sb.append(json(x));
+            }
+            return sb.append(']').toString();
+        }
+        return json(v.toString());
+    }
+
+    public static void main(String[] args) throws Exception {
+        ThreadMXBean threads = ManagementFactory.getThreadMXBean();
+        PrintStream out = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        int tests = readInt();
+        for (int t = 0; t < tests; t++) {
+%(read_args)s
+            long wall = System.nanoTime();
+            long cpu = threads.getCurrentThreadCpuTime();
+            String line;
+            try {
+                Object res = new Solution().solution(%(call_args)s);
+                line = "{\"actual\":" + json(res);
+            } catch (Throwable e) {
+                line = "{\"error\":" + json(String.valueOf(e));
+            }
+            double ms = (System.nanoTime() - wall) / 1e6;
+            double cpuMs = (threads.getCurrentThreadCpuTime() - cpu) / 1e6;
+            out.println(line + ",\"time_ms\":" + ms + ",\"cpu_ms\":" + cpuMs + ",\"rss_kb\":null}");
+        }
+    }
+}
+"""
+
+JAVA_ARRAY_READER = """
+    static %(type)s[] %(reader)sArray() throws IOException {
+        %(type)s[] v = new %(type)s[readInt()];
+        for (int i = 0; i < v.length; i++) v[i] = %(reader)s();
+        return v;
+    }
+"""
+
+
+# keep a JVM's fixed reservations small enough to run under RLIMIT_AS: one GC and
+# JIT thread set, a 64 MB class space and code cache instead of 1 GB and 240 MB
+JVM_FLAGS = [
+    "-XX:+UseSerialGC",
+    "-XX:ActiveProcessorCount=1",
+    "-XX:CompressedClassSpaceSize=64m",
+    "-XX:ReservedCodeCacheSize=64m",
+]
+# javac's heap, otherwise a quarter of the machine's memory
+JAVAC_HEAP_MB = 512
+
+
+class JavaAdapter(LanguageAdapter):
+    name = "java"
+    piston_language = "java"
+    compiler = "javac"
+    version_flag = "-version"
+    needs_threads = True
+
+    def java_type(self, kind: str) -> str:
+        if kind.endswith("[]"):
+            return self.java_type(kind[:-2]) + "[]"
+        return JAVA_TYPES[kind]
+
+    def starter_code(self, signature: dict) -> str:
+        params = ", ".join(f"{self.java_type(kind)} {name}" for name, kind in signature["params"])
+        return (
+            "class Solution {\n"
+            f"    public {self.java_type(signature['returns'])} solution({params}) {{\n"
+            "        // Your code here\n    }\n}\n"
+        )
+
+    def sources(self, user_code: str, signature: dict) -> Dict[str, str]:
+        read_args = "\n".join(
+            f"            {self.java_type(kind)} arg{i} = "
+            f"{JAVA_READERS[kind.removesuffix('[]')]}{'Array' if kind.endswith('[]') else ''}();"
+            for i, (_, kind) in enumerate(signature["params"])
+        )
+        array_readers = "".join(
+            JAVA_ARRAY_READER % {"type": JAVA_TYPES[kind], "reader": JAVA_READERS[kind]} for kind in SCALAR_TYPES
+        )
+        call_args = ", ".join(f"arg{i}" for i in range(len(signature["params"])))
+        main = JAVA_MAIN % {"read_args": read_args, "call_args": call_args, "array_readers": array_readers}
+        # Main.java first: Piston runs the first file
+        return {"Main.java": main, "Solution.java": user_code}
+
+    def compile_argv(self) -> List[str]:
+        jvm = [f"-J-Xmx{JAVAC_HEAP_MB}m", *(f"-J{flag}" for flag in JVM_FLAGS)]
+        return [self.compiler, *jvm, "-encoding", "UTF-8", "-d", ".", "Main.java", "Solution.java"]
+
+    def run_argv(self, artifact_dir: str, memory_mb: int) -> List[str]:
+        java = shutil.which("java") or "java"
+        return [java, f"-Xmx{memory_mb}m", "-Xss64m", *JVM_FLAGS, "-cp", artifact_dir, "Main"]
+
+
+ADAPTERS: Dict[str, LanguageAdapter] = {adapter.name: adapter for adapter in (CppAdapter(), JavaAdapter())}
+LANGUAGES = ("python", *ADAPTERS)
+
+
+def get_adapter(language: str) -> Optional[LanguageAdapter]:
+    return ADAPTERS.get(language)
+
+
+def native_job(
+    adapter: LanguageAdapter, files: Dict[str, str], tests: list, signature: dict,
+    artifact_dir: Optional[str] = None, memory_mb: int = 256,
+) -> dict:
+    # what an executor runs for a compiled language: the artifact's argv when
+    # the server compiled it, the sources for executors that build remotely
+    return {
+        "kind": "native",
+        "language": adapter.name,
+        "piston_language": adapter.piston_language,
+        "files": files,
+        "argv": adapter.run_argv(artifact_dir, memory_mb) if artifact_dir else None,
+        "stdin": encode_tests(tests, signature),
+        "needs_threads": adapter.needs_threads,
+    }
+
+
+# =====================================================
+# COMPILE CACHE
+# =====================================================
+def _limit_compiler(memory_mb: int, cpu_sec: int, tasks: Optional[int] = None):
+    def apply():
+        resource.setrlimit(resource.RLIMIT_AS, (memory_mb * 1024 * 1024,) * 2)
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_sec, cpu_sec + 1))
+        if tasks is not None:
+            resource.setrlimit(resource.RLIMIT_NPROC, nproc_limit(tasks))
+
+    return apply
+
+
+class CompileCache:
+    """
+    <root>/<key>/ holds one compiled program (or its compile_error.txt). A
+    directory only appears once complete (built next to it, then renamed),
+    so several workers can share `root`. The least recently used entries
+    beyond `max_entries` are deleted
+    """
+
+    ERROR_FILE = "compile_error.txt"
+
+    def __init__(self, root: str, max_entries: int = 256, timeout_sec: float = 30.0, memory_mb: int = 2048):
+        self.root = root
+        self.max_entries = max_entries
+        self.timeout_sec = timeout_sec
+        self.memory_mb = memory_mb
+        os.makedirs(root, exist_ok=True)
+
+        # key -> artifact dir, least recently used first (seeded from what's on disk)
+        existing = [e for e in os.scandir(root) if e.is_dir() and ".tmp-" not in e.name]
+        self.entries: "OrderedDict[str, str]" = OrderedDict(
+            (e.name, e.path) for e in sorted(existing, key=lambda e: e.stat().st_mtime)
+        )
+        self.compiling: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.evicted = 0
+        self.compile_sec = 0.0
+
+    def key(self, adapter: LanguageAdapter, files: Dict[str, str]) -> str:
+        raw = json.dumps([adapter.name, adapter.toolchain_version(), adapter.compile_argv(), files], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def get(self, adapter: LanguageAdapter, files: Dict[str, str]) -> str:
+        # artifact directory for these sources, compiling at most once; raises CompileError
+        key = await asyncio.to_thread(self.key, adapter, files)
+        path = os.path.join(self.root, key)
+
+        if key in self.entries or os.path.isdir(path):
+            self.hits += 1
+            self.entries[key] = path
+            self.entries.move_to_end(key)
+        elif key in self.compiling:
+            # the same code is being compiled for someone else right now
+            self.hits += 1
+            shared = self.compiling[key]
+            try:
+                await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise
+                return await self.get(adapter, files)  # its submitter gave up, compile it ourselves
+        else:
+            self.misses += 1
+            future = self.compiling[key] = asyncio.get_running_loop().create_future()
+            try:
+                await self._compile(adapter, files, path)
+                future.set_result(path)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                future.exception()  # retrieved: nobody else may be waiting
+                raise
+            finally:
+                del self.compiling[key]
+            self.entries[key] = path
+            self._evict()
+
+        error_path = os.path.join(path, self.ERROR_FILE)
+        if os.path.exists(error_path):
+            with open(error_path, encoding="utf-8", errors="replace") as f:
+                raise CompileError(f.read())
+        return path
+
+    async def _compile(self, adapter: LanguageAdapter, files: Dict[str, str], path: str):
+        workdir = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+        os.makedirs(workdir)
+        for name, content in files.items():
+            with open(os.path.join(workdir, name), "w", encoding="utf-8") as f:
+                f.write(content)
+
+        cpu_sec = int(self.timeout_sec)
+        # diagnostics go back to the player: compilers see no more of the server's
+        # environment than a worker does (#include "/proc/self/environ")
+        env = job_env()
+        if adapter.needs_threads:
+            # javac is a JVM: the same overhead and thread allowance as a Java run
+            tasks = await asyncio.to_thread(user_tasks)
+            limits = _limit_compiler(self.memory_mb + JVM_BASE_MEMORY_MB, cpu_sec, tasks + JVM_TASKS)
+            env.update(JVM_ENV)
+        else:
+            limits = _limit_compiler(self.memory_mb, cpu_sec)
+
+        started = time.monotonic()
+        process = await asyncio.create_subprocess_exec(
+            *adapter.compile_argv(),
+            cwd=workdir,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True,
+            preexec_fn=limits,
+            env=env,
+        )
+        try:
+            output, _ = await asyncio.wait_for(process.communicate(), self.timeout_sec)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            shutil.rmtree(workdir, ignore_errors=True)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            # not cached: a slow compile under load may well succeed next time
+            self.failures += 1
+            raise CompileError(f"Compilation timed out after {self.timeout_sec:g}s")
+        finally:
+            self.compile_sec += time.monotonic() - started
+
+        if process.returncode != 0:
+            self.failures += 1
+            with open(os.path.join(workdir, self.ERROR_FILE), "w", encoding="utf-8") as f:
+                f.write(output.decode("utf-8", errors="replace")[:8192])
+        try:
+            os.rename(workdir, path)
+        except OSError:
+            # another worker finished the same key first, theirs is just as good
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _evict(self):
+        while len(self.entries) > self.max_entries:
+            _, path = self.entries.popitem(last=False)
+            shutil.rmtree(path, ignore_errors=True)
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        return {
+            "root": self.root,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "compile_failures": self.failures,
+            "evicted": self.evicted,
+            "compile_sec": round(self.compile_sec, 3),
+        }
+
+
+def create_compile_cache() -> CompileCache:
+    return CompileCache(
+        root=os.getenv("COMPILE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "algoarena-compile")),
+        max_entries=int(os.getenv("COMPILE_CACHE_MAX_ENTRIES", "256")),
+        timeout_sec=float(os.getenv("COMPILE_TIMEOUT_SEC", "30")),
+    )
@@ -1,24 +1,88 @@
-from fastapi import FastAPI, Query, HTTPException
-import json
+from fastapi import FastAPI, Query, HTTPException, Request, Response
+import asyncio
+import math
 from typing import Optional, List, Any, Dict
 from pydantic import BaseModel
 import uuid
-import random
 from datetime import datetime
 import socketio
-import httpx
 from dotenv import load_dotenv
 import os
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from catalog import InvalidCursor
+from problem_store import create_problem_store
+from executors import create_executor, ExecutorError
+from harness import build_harness, suite_job, grade_test, grade_run
+from languages import (
+    LANGUAGES,
+    CompileError,
+    NativeGrader,
+    create_compile_cache,
+    get_adapter,
+    native_job,
+    signature_spec,
+)
+from result_cache import SubmissionCache
+from judge_queue import JudgeQueue, JudgeQueueFull, InFlightSubmissions, SubmissionSuperseded
+from room_store import create_room_store, RoomNotFound, RoomFull, RoomNotActive
+from sweeper import RoomSweeper
+from matchmaking import Matchmaker
+from pubsub import create_client_manager
+from ratings import create_rating_service
+from history import create_submission_history
+from rate_limit import create_rate_limiter, limit_socketio
+from room_sync import RoomBroadcaster, room_snapshot, submission_summary, submission_summaries
+from spectators import SpectatorsFull, create_spectator_feed, spectator_channel
+from http_cache import make_etag, etag_matches, cache_control, not_modified, RenderCache
+from metrics import (
+    Registry,
+    MetricsMiddleware,
+    instrument_executor,
+    instrument_socketio,
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+)
 
 # =====================================================
 # APP
 # =====================================================
-app = FastAPI()
 load_dotenv()
 
+# judge backend: "piston" (remote HTTP, default) or "local" (pre-forked sandbox pool)
+judge_executor = create_executor()
+
+# every cache miss goes through this bounded queue instead of hitting the executor directly
+judge_queue = JudgeQueue(
+    workers=int(os.getenv("JUDGE_WORKERS", "16")),
+    max_depth=int(os.getenv("JUDGE_QUEUE_MAX_DEPTH", "200")),
+)
+
+# one judge run per (room, player): resubmitting cancels the run still in progress
+inflight_submissions = InFlightSubmissions()
+
+# C++ / Java builds by sha256(language, toolchain, sources): re-judging the same code skips the compiler
+compile_cache = create_compile_cache()
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # opens the shared Piston HTTP client / forks the local sandbox workers
+    await judge_executor.start()
+    judge_queue.start()
+    room_sweeper.start()
+    problem_store.start()
+    submission_history.start()
+    print(f"[LOG] Judge executor ready: {judge_executor.name}")
+    yield
+    await spectator_feed.stop()
+    await submission_history.stop()
+    await problem_store.stop()
+    await room_sweeper.stop()
+    await judge_queue.stop()
+    await judge_executor.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add this block!
 app.add_middleware(
@@ -38,6 +102,13 @@ class TestResults(BaseModel):
     expected: Any
     actual: Any
     passed: bool
+    time_ms: Optional[float] = None
+    cpu_ms: Optional[float] = None
+    # failures only: exception text, or what the comparator saw (capped in the harness)
+    error: Optional[str] = None
+    truncated: Optional[bool] = None
+    missing: Optional[List[Any]] = None
+    extra: Optional[List[Any]] = None
 
 
 # What a problem summary looks like
@@ -81,6 +152,7 @@ class CreateRoomRequest(BaseModel):
     username: str
     difficulty: str
     time_limit_sec: int = 600
+    language: str = "python"  # both players submit in the room's language
 
 
 class JoinRoomRequest(BaseModel):
@@ -96,7 +168,9 @@ class SubmissionResponse(BaseModel):
     status: str
     total_passed: int
     total_tests: int
-    execution_time_ms: int
+    execution_time_ms: float
+    cpu_time_ms: Optional[float] = None
+    peak_memory_kb: Optional[int] = None
     test_results: List[TestResults]
 
 
@@ -104,6 +178,7 @@ class SubmissionResponse(BaseModel):
 class ProblemResponse(BaseModel):
     items: List[ProblemSummary]
     count: int
+    next_cursor: Optional[str] = None
 
 
 class ProblemDetailsResponse(BaseModel):
@@ -128,6 +203,7 @@ class RoomStatusResponse(BaseModel):
     status: str
     created_at: datetime
     time_limit_sec: int
+    language: str = "python"
     problem: ProblemShort
     players: List[PlayerStatus]
 
@@ -135,66 +211,300 @@ class RoomStatusResponse(BaseModel):
 # =====================================================
 # DATA
 # =====================================================
-with open("problems.json", "r") as f:
-    problems_db = json.load(f)
+# problems.json imported into SQLite (+ FTS5 search) and re-imported when the
+# file changes; problem_store.catalog is always the current indexed bank
+problem_store = create_problem_store()
+
+# problem payloads only change with the catalog, so clients may reuse them
+PROBLEM_LIST_CACHE_CONTROL = cache_control(int(os.getenv("PROBLEM_LIST_MAX_AGE_SEC", "60")))
+PROBLEM_DETAIL_CACHE_CONTROL = cache_control(int(os.getenv("PROBLEM_DETAIL_MAX_AGE_SEC", "300")))
+
+# problem payloads rendered to JSON bytes once per catalog version
+problem_render_cache = RenderCache(max_entries=int(os.getenv("PROBLEM_RENDER_CACHE_SIZE", "2048")))
 
+# failed tests report at most this many diffs, each cut to this many characters
+JUDGE_MAX_DIFFS = int(os.getenv("JUDGE_MAX_DIFFS", "5"))
+JUDGE_DIFF_MAX_CHARS = int(os.getenv("JUDGE_DIFF_MAX_CHARS", "256"))
 
-rooms_db = {}
+# heap handed to runtimes that manage their own (java -Xmx); the sandbox caps the JVM's
+# address space at LOCAL_EXECUTOR_MEMORY_MB plus sandbox.JVM_BASE_MEMORY_MB
+JUDGE_NATIVE_MEMORY_MB = int(os.getenv("JUDGE_NATIVE_MEMORY_MB", "256"))
 
-online_users = {}
+# identical resubmissions are answered from here instead of re-running the judge
+submission_cache = SubmissionCache(
+    max_entries=int(os.getenv("SUBMISSION_CACHE_SIZE", "1024")),
+    ttl_sec=float(os.getenv("SUBMISSION_CACHE_TTL_SEC", "600")),
+)
+
+# rooms + socket presence: "memory" (single process, default) or "sqlite"
+# (shared by several uvicorn workers, survives restarts) via ROOM_STORE
+room_store = create_room_store()
+
+# evicts idle rooms (optionally archiving them) and stale presence entries
+room_sweeper = RoomSweeper(
+    room_store,
+    ttl_by_status={
+        "finished": float(os.getenv("ROOM_TTL_FINISHED_SEC", "600")),
+        "abandoned": float(os.getenv("ROOM_TTL_ABANDONED_SEC", "300")),
+        "waiting": float(os.getenv("ROOM_TTL_WAITING_SEC", "3600")),
+        "active": float(os.getenv("ROOM_TTL_ACTIVE_SEC", "7200")),
+    },
+    interval_sec=float(os.getenv("SWEEP_INTERVAL_SEC", "30")),
+    presence_ttl_sec=float(os.getenv("PRESENCE_TTL_SEC", "120")),
+    archive_dir=os.getenv("ROOM_ARCHIVE_DIR"),
+    live_sids=lambda: [sid for sid, _ in sio.manager.get_participants("/", None)],
+)
+
+# per-difficulty FIFO queues for the find_match socket event
+matchmaker = Matchmaker()
+# the time limit a find_match client asks for is clamped into this range
+MATCH_TIME_LIMIT_MIN_SEC = int(os.getenv("MATCH_TIME_LIMIT_MIN_SEC", "60"))
+MATCH_TIME_LIMIT_MAX_SEC = int(os.getenv("MATCH_TIME_LIMIT_MAX_SEC", "3600"))
+
+# Elo ratings: SQLite table + in-memory rank index (RATINGS_DB_PATH, RATING_K_FACTOR)
+ratings = create_rating_service()
+
+# every judged submission, appended in batches by a background writer (SUBMISSION_HISTORY_PATH)
+submission_history = create_submission_history()
+
+# room state goes out as numbered deltas, at most one per room per ROOM_DELTA_WINDOW_MS
+# (later changes in the window are merged into the next one)
+room_broadcaster = RoomBroadcaster(
+    emit=lambda event, payload, room_id: sio.emit(event, payload, room=room_id),
+    window_sec=float(os.getenv("ROOM_DELTA_WINDOW_MS", "20")) / 1000,
+)
+
+# token buckets per username (REST and sockets share it) and per socket id
+# (RATE_LIMIT_PER_SEC, RATE_LIMIT_BURST, RATE_LIMIT_COSTS="submit_code=5,...")
+rate_limiter = create_rate_limiter()
+
+
+# =====================================================
+# METRICS
+# =====================================================
+# everything is recorded by wrappers (middleware, socket handlers, executor),
+# gauges are read when /metrics is scraped
+metrics = Registry()
+
+http_request_seconds = metrics.histogram(
+    "arena_http_request_seconds", "REST request latency", ["method", "route", "status"]
+)
+socket_event_seconds = metrics.histogram(
+    "arena_socket_event_seconds", "Socket.IO handler latency", ["event"]
+)
+socket_event_errors = metrics.counter(
+    "arena_socket_event_errors_total", "Socket.IO handlers that raised", ["event"]
+)
+judge_seconds = metrics.histogram(
+    "arena_judge_seconds", "Time spent inside the judge executor", ["executor"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
+)
+executor_errors = metrics.counter(
+    "arena_executor_errors_total", "Judge runs the executor could not complete", ["executor"]
+)
+metrics.gauge(
+    "arena_connected_sockets",
+    "Sockets connected to this worker",
+    lambda: len(sio.manager.rooms.get("/", {}).get(None, {})),
+)
+metrics.gauge(
+    "arena_rooms",
+    "Rooms by status",
+    lambda: {
+        **{status: 0 for status in ("waiting", "active", "finished", "abandoned")},
+        **room_store.count_by_status(),
+    },
+    ["status"],
+)
+rate_limited = metrics.counter(
+    "arena_rate_limited_total", "Requests and socket events refused by the rate limiter", ["operation"]
+)
+metrics.gauge("arena_rate_limit_buckets", "Token buckets held for active users and sockets", lambda: len(rate_limiter.buckets))
+metrics.counter(
+    "arena_submissions_superseded_total",
+    "Submissions replaced by a newer one from the same player before their verdict",
+    collect=lambda: inflight_submissions.superseded,
+)
+metrics.counter(
+    "arena_judge_cancelled_total",
+    "Judge jobs cancelled while queued or while running on the executor",
+    ["stage"],
+    collect=lambda: judge_queue.cancelled,
+)
+metrics.counter(
+    "arena_judge_wasted_seconds_total",
+    "Executor time spent on runs that were cancelled before finishing",
+    collect=lambda: judge_queue.wasted_run_sec,
+)
+metrics.gauge("arena_judge_queue_depth", "Submissions waiting for a judge worker", lambda: judge_queue.depth)
+metrics.gauge("arena_judge_in_flight", "Submissions being judged", lambda: judge_queue.in_flight)
+metrics.gauge(
+    "arena_submission_history_pending",
+    "Judged submissions not yet written to the history table",
+    lambda: len(submission_history.pending),
+)
+metrics.gauge(
+    "arena_spectators",
+    "Spectator sockets connected to this worker",
+    lambda: sum(len(sids) for sids in spectator_feed.spectators.values()),
+)
+metrics.counter(
+    "arena_spectator_updates_total",
+    "spectator_update fan-outs sent (each covers every change merged since the last)",
+    collect=lambda: spectator_feed.emitted,
+)
+
+app.add_middleware(MetricsMiddleware, histogram=http_request_seconds)
+instrument_executor(judge_executor, judge_seconds, executor_errors)
 
 
 # =====================================================
 # HELPERS
 # =====================================================
+def enforce_rate_limit(operation: str, username: str):
+    # REST callers are keyed by username only (sockets also by sid, see limit_socketio)
+    retry_after = rate_limiter.acquire([("user", username)], operation)
+    if retry_after:
+        rate_limited.inc(operation=operation)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, slow down",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+def check_language(language: str):
+    if language not in LANGUAGES:
+        raise HTTPException(status_code=400, detail=f"Unsupported language, pick one of {', '.join(LANGUAGES)}")
+    # a local sandbox compiles on this machine, Piston brings its own toolchains
+    adapter = get_adapter(language)
+    if adapter is not None and judge_executor.runs_binaries and not adapter.available():
+        raise HTTPException(status_code=400, detail=f"No {adapter.compiler} on this judge, {language} is unavailable")
 
 
-async def validate_submission(problem_id: str, user_code: str):
+
+async def validate_submission(
+    problem_id: str, user_code: str, on_progress=None, problem_version=None, language: str = "python"
+):
+    # on_progress: optional async callback, awaited once per finished test with
+    # {"test_index", "total_tests", "passed", "time_ms", "cpu_ms"} (streaming judge mode)
+    # Raises JudgeQueueFull when the judge is saturated
+    # problem_version: the bank version the room was created with (None = current)
+    # language: "python" or one of languages.ADAPTERS (the room's language)
+
     # 1. Fetch full problem data (including hidden tests)
-    problem = next((p for p in problems_db if p["id"] == problem_id), None)
+    catalog = problem_store.catalog_for(problem_version)
+    problem = catalog.get(problem_id)
     if not problem:
         return {"status": "error", "message": "Problem database mismatch"}
 
+    # Same problem + same tests + same code = same verdict, skip the run
+    submission_cache.sync_catalog(problem_store.catalog)
+    cache_key = submission_cache.key(problem_id, catalog.suite_version(problem_id), user_code, language)
+    cached = submission_cache.get(cache_key)
+    if cached:
+        return dict(cached)
+
+    # Cache miss: wait for a judge worker (or get refused if the queue is full)
+    result = await judge_queue.submit(
+        run_judge, problem, user_code, on_progress, catalog.suite_version(problem_id), language
+    )
+
+    # only clean verdicts of complete runs are cached: errors, timeouts and runs
+    # that died before the harness printed its summary may be transient
+    complete = result.pop("complete", False)
+    if complete and result["status"] in ("passed", "failed"):
+        submission_cache.put(cache_key, result)
+
+    return dict(result)
+
+
+def compile_failed(output: str, total_tests: int) -> dict:
+    return {
+        "status": "error",
+        "message": f"Compilation failed:\n{output}",
+        "total_passed": 0,
+        "total_tests": total_tests,
+        "execution_time_ms": 0,
+        "cpu_time_ms": 0,
+        "peak_memory_kb": None,
+        "test_results": [],
+    }
+
+
+async def run_judge(problem: dict, user_code: str, on_progress=None, suite_version=None, language="python"):
     # Combine public and hidden tests for the final judge
     all_tests = problem.get("public_tests", []) + problem.get("hidden_tests", [])
 
     test_results = []
-    passed_count = 0
-
-    # 2. Prepare the Wrapper Script
-    # We wrap the user's code to execute each test case and print results in a parsable way
-    # This example assumes Python.
-    full_code = user_code + "\n\n"
-    full_code += "import json\n"
-    full_code += f"tests = {json.dumps(all_tests)}\n"
-    full_code += "results = []\n"
-    full_code += "for t in tests:\n"
-    full_code += "    try:\n"
-    full_code += "        # Dynamic call: assumes a function named 'solution'\n"
-    full_code += "        res = solution(**t['input'])\n"
-    full_code += "        print(json.dumps({'actual': res}))\n"
-    full_code += "    except Exception as e:\n"
-    full_code += "        print(json.dumps({'error': str(e)}))\n"
-
-    # 3. Call Piston API
-    PISTON_URL = os.getenv("PISTON_API_URL")
-    payload = {
-        "language": "python",
-        "version": "3.10.0",
-        "files": [{"content": full_code}],
-    }
+    # compiled languages print raw answers, compared here before grading
+    grader = None
+
+    # 2. Prepare the Wrapper Script (compares in the sandbox, prints verdicts + capped diffs),
+    # or, for warm executors that already hold this suite version, just the code
+    if language != "python":
+        adapter = get_adapter(language)
+        signature = signature_spec(problem["signature"])
+        files = adapter.sources(user_code, signature)
+        artifact = None
+        if judge_executor.runs_binaries:
+            try:
+                artifact = await compile_cache.get(adapter, files)
+            except CompileError as e:
+                return compile_failed(e.output, len(all_tests))
+        full_code = native_job(adapter, files, all_tests, signature, artifact, JUDGE_NATIVE_MEMORY_MB)
+        grader = NativeGrader(
+            all_tests, problem.get("comparator"), max_diffs=JUDGE_MAX_DIFFS, diff_max_chars=JUDGE_DIFF_MAX_CHARS
+        )
+    elif judge_executor.preloads_suites and suite_version is not None:
+        full_code = suite_job(
+            user_code,
+            problem["id"],
+            suite_version,
+            all_tests,
+            problem.get("comparator"),
+            max_diffs=JUDGE_MAX_DIFFS,
+            diff_max_chars=JUDGE_DIFF_MAX_CHARS,
+        )
+    else:
+        full_code = build_harness(
+            user_code,
+            all_tests,
+            problem.get("comparator"),
+            max_diffs=JUDGE_MAX_DIFFS,
+            diff_max_chars=JUDGE_DIFF_MAX_CHARS,
+        )
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(PISTON_URL, json=payload, timeout=10.0)
-            execution = response.json()
-        except Exception as e:
-            return {"status": "error", "message": f"Execution engine unreachable: {e}"}
+    # 3. Run it on the configured executor (Piston or local sandbox)
+    # 4. Compare Actual vs Expected, test by test as lines come in when streaming
+    try:
+        if on_progress is None:
+            run_data = await judge_executor.run(full_code)
+        else:
+            async for kind, value in judge_executor.stream(full_code):
+                if kind == "result":
+                    run_data = value
+                elif len(test_results) < len(all_tests):
+                    if grader is not None:
+                        value = grader.line(value)
+                    graded = grade_test(all_tests[len(test_results)], value)
+                    test_results.append(graded)
+                    await on_progress(
+                        {
+                            "test_index": len(test_results) - 1,
+                            "total_tests": len(all_tests),
+                            "passed": graded["passed"],
+                            "time_ms": graded["time_ms"],
+                            "cpu_ms": graded["cpu_ms"],
+                        }
+                    )
+    except ExecutorError as e:
+        return {"status": "error", "message": f"Execution engine unreachable: {e}"}
 
-    # 4. Parse Output
-    run_data = execution.get("run", {})
     stdout_lines = run_data.get("stdout", "").strip().split("\n")
     stderr = run_data.get("stderr", "")
+    if grader is not None:
+        stdout_lines = grader.translate(stdout_lines)
 
     if stderr:
         return {
@@ -203,46 +513,113 @@ async def validate_submission(problem_id: str, user_code: str):
             "total_passed": 0,
             "total_tests": len(all_tests),
             "execution_time_ms": 0,
+            "cpu_time_ms": 0,
+            "peak_memory_kb": None,
             "test_results": [],
         }
 
-    # 5. Compare Actual vs Expected
-    for i, test in enumerate(all_tests):
-        try:
-            actual_data = json.loads(stdout_lines[i])
-            actual_val = actual_data.get("actual")
-
-            is_passed = actual_val == test["expected"]
-            if is_passed:
-                passed_count += 1
-
-            test_results.append(
-                {
-                    "input": test["input"],
-                    "expected": test["expected"],
-                    "actual": actual_val,
-                    "passed": is_passed,
-                }
-            )
-        except:
-            test_results.append(
-                {
-                    "input": test["input"],
-                    "expected": test["expected"],
-                    "actual": "Execution Error",
-                    "passed": False,
-                }
-            )
+    # 5. Grade whatever the stream didn't already cover; complete = one line per test + a matching summary
+    test_results, complete = grade_run(all_tests, stdout_lines, test_results)
+
+    passed_count = sum(1 for t in test_results if t["passed"])
+
+    # 6. Totals measured inside the harness (not the executor's own overhead)
+    rss_values = [t.pop("rss_kb") for t in test_results]
+    rss_values = [kb for kb in rss_values if kb is not None]
 
     return {
         "status": "passed" if passed_count == len(all_tests) else "failed",
         "total_passed": passed_count,
         "total_tests": len(all_tests),
-        "execution_time_ms": 100,  # Piston doesn't always provide raw MS, can be estimated
+        "execution_time_ms": round(sum(t["time_ms"] or 0 for t in test_results), 3),
+        "cpu_time_ms": round(sum(t["cpu_ms"] or 0 for t in test_results), 3),
+        "peak_memory_kb": max(rss_values) if rss_values else None,
         "test_results": test_results,
+        # popped by validate_submission: did the harness get to its summary line?
+        "complete": complete,
     }
 
 
+def decide_winner(submissions: dict):
+    # more tests passed wins, equal scores go to the faster total runtime
+    # (measured inside the harness); returns (winner or None for a tie, tiebreak)
+    p1, p2 = list(submissions.keys())[:2]
+    score1 = submissions[p1]["total_passed"]
+    score2 = submissions[p2]["total_passed"]
+
+    if score1 > score2:
+        return p1, None
+    if score2 > score1:
+        return p2, None
+
+    time1 = submissions[p1].get("execution_time_ms")
+    time2 = submissions[p2].get("execution_time_ms")
+    if score1 > 0 and time1 is not None and time2 is not None and time1 != time2:
+        return (p1 if time1 < time2 else p2), "execution_time"
+    return None, None  # Tie
+
+
+def archive_submission(room: dict, submission: dict):
+    # queued in memory, the history writer puts it on disk in the next batch
+    submission_history.record(
+        {
+            "room_id": room["room_id"],
+            "problem_id": room["problem"]["id"],
+            "problem_version": room.get("problem_version"),
+            **submission,
+        }
+    )
+
+
+def build_room(
+    problem: dict,
+    usernames: List[str],
+    time_limit_sec: int = 600,
+    problem_version: Optional[str] = None,
+    language: str = "python",
+) -> dict:
+    # generate room id
+    room_id = str(uuid.uuid4())[:8]  # Short unique ID like 'a1b2c3d4'
+
+    # create the room object (only the problem summary, the judge looks up the rest)
+    return {
+        "room_id": room_id,
+        "status": "active" if len(usernames) == 2 else "waiting",
+        "created_at": datetime.now(),
+        "time_limit_sec": time_limit_sec,
+        "language": language,
+        "problem": {
+            "id": problem["id"],
+            "title": problem["title"],
+            "difficulty": problem["difficulty"],
+        },
+        # pinned: a problems.json reload doesn't change this room's tests
+        "problem_version": problem_version,
+        "players": [{"username": u, "joined_at": datetime.now()} for u in usernames],
+        # bumped by every join / leave / submit, numbers the room_delta events
+        "version": 0,
+    }
+
+
+async def publish_players(room: dict, message: Optional[str] = None):
+    changes = {"status": room["status"], "players": [p["username"] for p in room["players"]]}
+    if message:
+        changes["message"] = message
+    if spectator_feed.wants(room["room_id"]):
+        spectator_feed.publish(room["room_id"], room_snapshot(room))
+    await room_broadcaster.publish(room["room_id"], room["version"], changes)
+
+
+async def publish_submission(room: dict, username: str, finished: bool):
+    changes = {"submissions": {username: submission_summary(room["submissions"][username])}}
+    if finished:
+        # the only status change a submission can cause
+        changes["status"] = room["status"]
+    if spectator_feed.wants(room["room_id"]):
+        spectator_feed.publish(room["room_id"], room_snapshot(room))
+    await room_broadcaster.publish(room["room_id"], room["version"], changes)
+
+
 # =====================================================
 # ENDPOINTS
 # =====================================================
@@ -253,102 +630,218 @@ def health():
     return {"Status": "Ok", "Service": "algoarena-backend"}
 
 
-@app.get("/problems", response_model=ProblemResponse)
-def get_problems(difficulty: Optional[str] = None, limit: int = 10):
-    filtered_items = []
+@app.get("/metrics")
+def get_metrics():
+    # Prometheus text format
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
 
-    for i in problems_db:
-        # filtering logic
-        if difficulty and i["difficulty"] != difficulty.lower():
-            continue
 
-        filtered_items.append(i)
+@app.get("/judge/stats")
+def judge_stats():
+    return {
+        "executor": judge_executor.name,
+        "executor_stats": judge_executor.stats(),
+        "queue": judge_queue.stats(),
+        "in_flight_submissions": inflight_submissions.stats(),
+        "cache": submission_cache.stats(),
+        "history": submission_history.stats(),
+        "room_deltas": room_broadcaster.stats(),
+        "spectators": spectator_feed.stats(),
+        "problem_render_cache": problem_render_cache.stats(),
+        "compile_cache": compile_cache.stats(),
+    }
 
-        if len(filtered_items) >= limit:
-            break
 
-    return {"items": filtered_items, "count": len(filtered_items)}
+@app.get("/sweeper/stats")
+def sweeper_stats():
+    return {
+        "room_store": room_store.name,
+        "online_users": room_store.online_count(),
+        **room_sweeper.stats(),
+    }
 
 
-@app.get("/problems/{problem_id}", response_model=ProblemDetailsResponse)
-def get_problem_by_id(problem_id: str):
-    # search for the problem in our database
+@app.get("/rate_limits/stats")
+def rate_limit_stats():
+    return rate_limiter.stats()
 
-    for i in problems_db:
-        if i["id"] == problem_id:
-            return i
 
-    raise HTTPException(status_code=404, detail="Problem not found")
+@app.get("/problems/stats")
+def problem_store_stats():
+    return problem_store.stats()
 
 
-@app.post("/rooms", response_model=RoomStatusResponse, status_code=201)
-def create_room(request: CreateRoomRequest):
-    # pick a random problem matchin the difficulty
-    matching_problems = [
-        i for i in problems_db if i["difficulty"] == request.difficulty.lower()
-    ]
+@app.get("/matchmaking/stats")
+def matchmaking_stats():
+    return matchmaker.stats()
 
-    if not matching_problems:
-        raise HTTPException(
-            status_code=404, detail="No problems found for this difficuly"
+
+@app.get("/leaderboard")
+def get_leaderboard(offset: int = Query(0, ge=0), limit: int = Query(20, ge=1, le=100)):
+    # pick up rating changes other workers made since the last request
+    ratings.sync()
+    return {
+        "items": ratings.leaderboard(offset, limit),
+        "offset": offset,
+        "limit": limit,
+        "total": len(ratings),
+    }
+
+
+@app.get("/players/{username}/rank")
+def get_player_rank(username: str):
+    ratings.sync()
+    player = ratings.rank(username)
+    if player is None:
+        raise HTTPException(status_code=404, detail="Player has no rated matches")
+
+    return {**player, "total": len(ratings)}
+
+
+@app.get("/players/{username}/submissions")
+async def get_player_submissions(
+    username: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    # newest first; rows show up once the history writer's next batch lands
+    # public: verdicts and timings only, never the code or the per-test results
+    try:
+        items, next_cursor = await asyncio.to_thread(submission_history.for_player, username, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return {"items": items, "count": len(items), "next_cursor": next_cursor}
+
+
+# async: nothing here blocks, so skip the threadpool hop a plain def costs
+@app.get("/problems", response_model=ProblemResponse)
+async def get_problems(
+    request: Request,
+    difficulty: Optional[str] = None,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+):
+    # the page is fully determined by catalog version + query, so is its ETag
+    catalog = problem_store.catalog
+    difficulty = (difficulty or "").lower()
+    etag = make_etag(catalog.version, difficulty, str(limit), cursor or "")
+    headers = {"ETag": etag, "Cache-Control": PROBLEM_LIST_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(headers)
+
+    def render():
+        filtered_items, next_cursor = catalog.page_summaries(difficulty, cursor, limit)
+        page = ProblemResponse(items=filtered_items, count=len(filtered_items), next_cursor=next_cursor)
+        return page.model_dump_json().encode()
+
+    try:
+        body = problem_render_cache.get_or_render(
+            catalog.version, ("list", difficulty, limit, cursor), render
         )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid or expired cursor")
 
-    selected_problem = random.choice(matching_problems)
+    return Response(content=body, media_type="application/json", headers=headers)
 
-    # generate room id
-    room_id = str(uuid.uuid4())[:8]  # Short unique ID like 'a1b2c3d4'
 
-    # create the room object
-    new_room = {
-        "room_id": room_id,
-        "status": "waiting",
-        "created_at": datetime.now(),
-        "time_limit_sec": request.time_limit_sec,
-        "problem": selected_problem,
-        "players": [{"username": request.username, "joined_at": datetime.now()}],
+@app.get("/problems/search", response_model=ProblemResponse)
+def search_problems(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    # FTS5 over title, description and constraints of the current bank
+    items = problem_store.search(q, limit)
+    return {"items": items, "count": len(items)}
+
+
+@app.get("/problems/{problem_id}", response_model=ProblemDetailsResponse)
+async def get_problem_by_id(problem_id: str, request: Request, language: str = Query("python")):
+    # look up the problem in our catalog
+    catalog = problem_store.catalog
+    problem = catalog.get(problem_id)
+    if not problem:
+        raise HTTPException(status_code=404, detail="Problem not found")
+
+    # other languages get starter code generated from the problem's signature
+    adapter = get_adapter(language)
+    if adapter is not None and "signature" in problem:
+        problem = {**problem, "starter_code": adapter.starter_code(signature_spec(problem["signature"]))}
+    elif language != "python":
+        raise HTTPException(status_code=404, detail=f"Problem not available in {language}")
+
+    etag = catalog.problem_etag(problem_id)
+    headers = {
+        "ETag": etag if language == "python" else f'{etag[:-1]}-{language}"',
+        "Cache-Control": PROBLEM_DETAIL_CACHE_CONTROL,
     }
+    # a matching ETag skips sending the body altogether
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return not_modified(headers)
 
-    rooms_db[room_id] = new_room
+    # validated against ProblemDetailsResponse once, then served as bytes
+    body = problem_render_cache.get_or_render(
+        catalog.version,
+        ("detail", problem_id, language),
+        lambda: ProblemDetailsResponse.model_validate(problem).model_dump_json().encode(),
+    )
+    return Response(content=body, media_type="application/json", headers=headers)
 
-    return new_room
 
+@app.post("/rooms", response_model=RoomStatusResponse, status_code=201)
+def create_room(request: CreateRoomRequest):
+    enforce_rate_limit("create_room", request.username)
 
-@app.post("/rooms/{room_id}/join", response_model=RoomStatusResponse)
-def join_room(room_id: str, request: JoinRoomRequest):
+    check_language(request.language)
 
-    # check if room exits
-    if room_id not in rooms_db:
-        raise HTTPException(status_code=404, detail="Room not found")
+    # pick a random problem matchin the difficulty (with a signature, for compiled languages)
+    catalog = problem_store.catalog
+    selected_problem = catalog.random_problem(request.difficulty, request.language)
+
+    if not selected_problem:
+        raise HTTPException(
+            status_code=404, detail="No problems found for this difficuly"
+        )
 
-    room = rooms_db[room_id]
+    new_room = build_room(
+        selected_problem, [request.username], request.time_limit_sec, catalog.version, request.language
+    )
 
-    # check if full
-    if len(room["players"]) >= 2:
-        raise HTTPException(status_code=409, detail="Room full")
+    return room_store.create(new_room)
 
-    # add second player
-    room["players"].append({"username": request.username, "joined_at": datetime.now()})
 
-    room["status"] = "active"
+@app.post("/rooms/{room_id}/join", response_model=RoomStatusResponse)
+async def join_room(room_id: str, request: JoinRoomRequest):
+    enforce_rate_limit("join_room", request.username)
+
+    # add second player (atomic: two joins can't both get the last seat).
+    # store writes wait on SQLite's write lock, so they run off the event loop
+    try:
+        room = await asyncio.to_thread(room_store.join, room_id, request.username)
+    except RoomNotFound:
+        raise HTTPException(status_code=404, detail="Room not found")
+    except RoomFull:
+        raise HTTPException(status_code=409, detail="Room full")
 
+    # sockets already in the room see the new player like a socket join
+    await publish_players(room)
     return room
 
 
 @app.get("/rooms/{room_id}", response_model=RoomStatusResponse)
 def get_room_status(room_id: str):
     # look for room
-    if room_id not in rooms_db:
+    room = room_store.get(room_id)
+    if room is None:
         raise HTTPException(status_code=404, detail="Room not found")
 
-    return rooms_db[room_id]
+    return room
 
 
 @app.post("/rooms/{room_id}/submit", response_model=SubmissionResponse)
 async def submit_code(room_id: str, request: SubmissionRequest):
-    if room_id not in rooms_db:
+    enforce_rate_limit("submit_code", request.username)
+    room = room_store.get(room_id)
+    if room is None:
         raise HTTPException(status_code=404, detail="Room not fount")
 
-    room = rooms_db[room_id]
     # test
     if room["status"] != "active":
         raise HTTPException(status_code=400, detail="Room is not active")
@@ -360,7 +853,33 @@ async def submit_code(room_id: str, request: SubmissionRequest):
             status_code=403, detail="User is not a participant in this room"
         )
 
-    result = await validate_submission(room["problem"]["id"], request.code)
+    async def report_progress(progress):
+        spectator_feed.publish(room_id, {"progress": {request.username: progress}})
+        await sio.emit(
+            "test_progress",
+            {"room_id": room_id, "username": request.username, **progress},
+            room=room_id,
+        )
+
+    try:
+        result = await inflight_submissions.run(
+            (room_id, request.username),
+            validate_submission(
+                room["problem"]["id"],
+                request.code,
+                on_progress=report_progress,
+                problem_version=room.get("problem_version"),
+                language=room.get("language", "python"),
+            ),
+        )
+    except JudgeQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Judge is busy, try again shortly",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except SubmissionSuperseded:
+        raise HTTPException(status_code=409, detail="Replaced by a newer submission")
 
     # MOCK RESULT FOR TESTING:
     # result = {
@@ -380,16 +899,33 @@ async def submit_code(room_id: str, request: SubmissionRequest):
         **result,
     }
 
-    if "submissions" not in room:
-        room["submissions"] = {}
+    # the match may have ended while we were judging
+    try:
+        room, finished = await asyncio.to_thread(room_store.submit, room_id, request.username, submission_data)
+    except RoomNotActive:
+        raise HTTPException(status_code=400, detail="Room is not active")
 
-    room["submissions"][request.username] = submission_data
+    archive_submission(room, submission_data)
+    await publish_submission(room, request.username, finished)
 
-    if len(room["submissions"]) == len(room["players"]):
-        room["status"] = "finished"
+    if finished:
+        winner, tiebreak = decide_winner(room["submissions"])
+        players = list(room["submissions"].keys())
+        rating_changes = await asyncio.to_thread(ratings.record_match, players[0], players[1], winner)
+        spectator_feed.publish(
+            room_id, {"result": {"winner": winner, "tiebreak": tiebreak, "ratings": rating_changes}}
+        )
+        # summaries only: each player's own code and test output came back in their response
+        await room_broadcaster.flush(room_id)
         await sio.emit(
             "match_finished",
-            {"room_id": room_id, "results": room["submissions"]},
+            {
+                "room_id": room_id,
+                "winner": winner,
+                "tiebreak": tiebreak,
+                "results": submission_summaries(room),
+                "ratings": rating_changes,
+            },
             room=room_id,
         )
 
@@ -400,9 +936,23 @@ async def submit_code(room_id: str, request: SubmissionRequest):
 # SOCKETS
 # =====================================================
 # create socket IO server
-sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+# SOCKETIO_MANAGER=sqlite fans room broadcasts out to every worker process
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    cors_allowed_origins="*",
+    client_manager=create_client_manager(),
+)
 socket_app = socketio.ASGIApp(sio, app)
 
+# spectators get coalesced spectator_update events, at most one per room per
+# SPECTATOR_UPDATE_INTERVAL_MS, sent SPECTATOR_BATCH_SIZE sockets at a time with
+# SPECTATOR_BATCH_PAUSE_MS in between; behind a cross-worker bus every room goes to its
+# spectator channel instead, its watchers may be on another worker
+spectator_feed = create_spectator_feed(
+    emit=lambda event, payload, to: sio.emit(event, payload, to=to),
+    watched_only=type(sio.manager) is socketio.AsyncManager,
+)
+
 
 @sio.event
 async def connect(sid, environ):
@@ -420,7 +970,7 @@ async def identify(sid, data):
     await sio.save_session(sid, {"username": username})
 
     # track them globally for logging
-    online_users[sid] = username
+    await asyncio.to_thread(room_store.set_online, sid, username)
 
     print(f"[LOG] Socket {sid} identified as {username}")
 
@@ -438,35 +988,67 @@ async def join_room(sid, data):
         await sio.emit("error", {"detail": "You must identify first!"}, to=sid)
         return
 
-    if room_id not in rooms_db:
+    try:
+        room = await asyncio.to_thread(room_store.join, room_id, username)
+    except RoomNotFound:
         await sio.emit("error", {"detail": "Room not found"}, to=sid)
         return
-
-    room = rooms_db[room_id]
-    player_names = [p["username"] for p in room["players"]]
-
-    if username not in player_names:
-        if len(room["players"]) >= 2:
-            await sio.emit("error", {"detail": "Room is full"}, to=sid)
-            return
-        room["players"].append({"username": username, "joined_at": datetime.now()})
+    except RoomFull:
+        await sio.emit("error", {"detail": "Room is full"}, to=sid)
+        return
 
     # IMPORTANT: Update the session to include room_id so disconnect works!
     await sio.save_session(sid, {"username": username, "room_id": room_id})
 
+    # everyone already in the room gets the change, the joiner gets the whole room
+    # (the delta is flushed before entering so the joiner doesn't get it twice)
+    await publish_players(room)
+    await room_broadcaster.flush(room_id)
     await sio.enter_room(sid, room_id)
 
-    if len(room["players"]) == 2:
-        room["status"] = "active"
+    print(f"[LOG] {username} joined room {room_id}. Status: {room['status']}")
+    await sio.emit("room_snapshot", room_snapshot(room), to=sid)
 
-    update_payload = {
-        "room_id": room_id,
-        "status": room["status"],
-        "players": [p["username"] for p in room["players"]],
-    }
 
-    print(f"[LOG] {username} joined room {room_id}. Status: {room['status']}")
-    await sio.emit("room_update", update_payload, room=room_id)
+@sio.event
+async def room_sync(sid, data):
+    # a client that missed a delta (version gap) asks for the full state again
+    session = await sio.get_session(sid)
+    room_id = data.get("room_id")
+    if not room_id or session.get("room_id") != room_id:
+        return await sio.emit("error", {"detail": "Not in this room"}, to=sid)
+
+    room = room_store.get(room_id)
+    if room is None:
+        return await sio.emit("error", {"detail": "Room not found"}, to=sid)
+    await sio.emit("room_snapshot", room_snapshot(room), to=sid)
+
+
+@sio.event
+async def spectate_room(sid, data):
+    # watch a match without taking a seat (no identify needed); one room per socket
+    room_id = data.get("room_id")
+    room = room_store.get(room_id) if room_id else None
+    if room is None:
+        return await sio.emit("error", {"detail": "Room not found"}, to=sid)
+
+    try:
+        previous = spectator_feed.add(room_id, sid)
+    except SpectatorsFull:
+        return await sio.emit("error", {"detail": "Too many spectators in this room"}, to=sid)
+    if previous is not None:
+        await sio.leave_room(sid, spectator_channel(previous))
+    await sio.enter_room(sid, spectator_channel(room_id))
+
+    # the whole state now, throttled updates from here on
+    await sio.emit("spectator_update", {**spectator_feed.current(room_id), **room_snapshot(room)}, to=sid)
+
+
+@sio.event
+async def stop_spectating(sid, data=None):
+    room_id = spectator_feed.remove(sid)
+    if room_id is not None:
+        await sio.leave_room(sid, spectator_channel(room_id))
 
 
 @sio.event
@@ -476,35 +1058,18 @@ async def disconnect(sid):
     room_id = session.get("room_id")
 
     print(f"[LOG] {username} disconnected from room {room_id}")
+    await asyncio.to_thread(room_store.set_offline, sid)
+    matchmaker.cancel(sid)
+    rate_limiter.forget(("sid", sid))
+    spectator_feed.remove(sid)
 
-    if room_id and room_id in rooms_db:
-        room = rooms_db[room_id]
-        old_status = room["status"]  # Remember what it was
-
-        # Remove the player
-        room["players"] = [p for p in room["players"] if p["username"] != username]
-
-        if len(room["players"]) == 0:
-            room["status"] = "abandoned"
-        else:
-            # Logic Change:
-            if old_status == "active":
-                # If they were mid-game, don't let a new person join an old match
-                room["status"] = "abandoned"
-            else:
-                # If they were just waiting in the lobby, stay in waiting mode
-                room["status"] = "waiting"
+    # Remove the player (active -> abandoned, waiting stays waiting)
+    room = await asyncio.to_thread(room_store.leave, room_id, username) if room_id else None
 
+    if room:
         # Notify the survivor
-        await sio.emit(
-            "room_update",
-            {
-                "room_id": room_id,
-                "status": room["status"],
-                "players": [p["username"] for p in room["players"]],
-                "message": f"Opponent {username} disconnected. Room is now {room['status']}.",
-            },
-            room=room_id,
+        await publish_players(
+            room, message=f"Opponent {username} disconnected. Room is now {room['status']}."
         )
 
 
@@ -520,64 +1085,168 @@ async def submit_code(sid, data):
             "error", {"detail": "Missing session or room data"}, to=sid
         )
 
-    if room_id not in rooms_db:
+    room = room_store.get(room_id)
+    if room is None:
         return await sio.emit("error", {"detail": "Room not found"}, to=sid)
 
-    room = rooms_db[room_id]
-
     # 1. Logic Check
     if room["status"] != "active":
         return await sio.emit("error", {"detail": "Match is not active"}, to=sid)
+    if username not in [p["username"] for p in room["players"]]:
+        return await sio.emit("error", {"detail": "Only the room's players can submit"}, to=sid)
 
     # 2. Validate Code
     # Note: Using the function we built in Task 2/3
-    result = await validate_submission(room["problem"]["id"], user_code)
+    # Event A: test_progress (Broadcast to room as each test finishes)
+    async def report_progress(progress):
+        spectator_feed.publish(room_id, {"progress": {username: progress}})
+        await sio.emit(
+            "test_progress",
+            {"room_id": room_id, "username": username, **progress},
+            room=room_id,
+        )
 
-    # 3. Store Result
-    if "submissions" not in room:
-        room["submissions"] = {}
+    try:
+        result = await inflight_submissions.run(
+            (room_id, username),
+            validate_submission(
+                room["problem"]["id"],
+                user_code,
+                on_progress=report_progress,
+                problem_version=room.get("problem_version"),
+                language=room.get("language", "python"),
+            ),
+        )
+    except JudgeQueueFull as e:
+        return await sio.emit(
+            "judge_busy",
+            {"room_id": room_id, "retry_after": e.retry_after},
+            to=sid,
+        )
+    except SubmissionSuperseded:
+        # the newer submission reports the verdict, this one just stops
+        return await sio.emit("submission_superseded", {"room_id": room_id}, to=sid)
 
+    # 3. Store Result
     submission_entry = {
+        "submission_id": str(uuid.uuid4()),
         "username": username,
         "status": result["status"],
         "total_passed": result["total_passed"],
         "total_tests": result["total_tests"],
+        "execution_time_ms": result.get("execution_time_ms"),
+        "peak_memory_kb": result.get("peak_memory_kb"),
         "submitted_at": datetime.now().isoformat(),
     }
-    room["submissions"][username] = submission_entry
+    try:
+        room, both_submitted = await asyncio.to_thread(room_store.submit, room_id, username, submission_entry)
+    except RoomNotActive:
+        return await sio.emit("error", {"detail": "Match is not active"}, to=sid)
 
-    # 4. Event B: submission_update (Broadcast to room)
-    both_submitted = len(room["submissions"]) == len(room["players"])
+    # the room only keeps the latest entry per player, the archive keeps every one
+    archive_submission(room, {**result, **submission_entry, "code": user_code})
 
-    update_payload = {
-        "room_id": room_id,
-        "submissions": room["submissions"],
-        "both_submitted": both_submitted,
-    }
-    await sio.emit("submission_update", update_payload, room=room_id)
+    # 4. Event B: room_delta with just this player's submission (Broadcast to room)
+    await publish_submission(room, username, both_submitted)
 
     # 5. Event C: match_ended (If both submitted)
     if both_submitted:
-        room["status"] = "finished"
-
-        # Determine winner logic
+        winner, tiebreak = decide_winner(room["submissions"])
         players = list(room["submissions"].keys())
-        p1, p2 = players[0], players[1]
-        score1 = room["submissions"][p1]["total_passed"]
-        score2 = room["submissions"][p2]["total_passed"]
-
-        winner = None
-        if score1 > score2:
-            winner = p1
-        elif score2 > score1:
-            winner = p2
-        else:
-            winner = None  # Tie
+        rating_changes = await asyncio.to_thread(ratings.record_match, players[0], players[1], winner)
 
         end_payload = {
             "room_id": room_id,
             "winner": winner,
             "reason": "both_submitted",
-            "final_scores": room["submissions"],
+            "tiebreak": tiebreak,
+            "final_scores": submission_summaries(room),
+            "ratings": rating_changes,
         }
+        spectator_feed.publish(
+            room_id, {"result": {"winner": winner, "tiebreak": tiebreak, "ratings": rating_changes}}
+        )
+        # the last submission's delta goes out first
+        await room_broadcaster.flush(room_id)
         await sio.emit("match_ended", end_payload, room=room_id)
+
+
+def is_connected(sid: str) -> bool:
+    return sio.manager.is_connected(sid, "/")
+
+
+@sio.event
+async def find_match(sid, data):
+    session = await sio.get_session(sid)
+    username = session.get("username")
+    difficulty = (data.get("difficulty") or "").lower()
+
+    if not username:
+        return await sio.emit("error", {"detail": "You must identify first!"}, to=sid)
+
+    catalog = problem_store.catalog
+    if not catalog.by_difficulty.get(difficulty):
+        return await sio.emit(
+            "error", {"detail": "No problems found for this difficulty"}, to=sid
+        )
+
+    time_limit = data.get("time_limit_sec", 600)
+    if type(time_limit) is not int:
+        return await sio.emit(
+            "error", {"detail": "time_limit_sec must be a whole number of seconds"}, to=sid
+        )
+    time_limit = min(max(time_limit, MATCH_TIME_LIMIT_MIN_SEC), MATCH_TIME_LIMIT_MAX_SEC)
+
+    opponent = matchmaker.find(sid, username, difficulty, is_live=is_connected)
+
+    if opponent is None:
+        # nobody waiting yet, tell the player they're in line
+        await sio.emit(
+            "match_queued",
+            {"difficulty": difficulty, "position": matchmaker.waiting(difficulty)},
+            to=sid,
+        )
+        return
+
+    # pair them: room with a random problem, both sockets moved in, already active
+    problem = catalog.random_problem(difficulty)
+    room = build_room(problem, [opponent["username"], username], time_limit, catalog.version)
+    room = await asyncio.to_thread(room_store.create, room)
+    room_id = room["room_id"]
+    players = ((opponent["sid"], opponent["username"]), (sid, username))
+
+    # either socket can drop while the room is written, before its session points
+    # at the room: abandon the room and put whoever is still here back in line
+    if not all(is_connected(player_sid) for player_sid, _ in players):
+        for player_sid, player_name in players:
+            if not is_connected(player_sid):
+                await asyncio.to_thread(room_store.leave, room_id, player_name)
+        for player_sid, _ in players:
+            if is_connected(player_sid):
+                await find_match(player_sid, {"difficulty": difficulty, "time_limit_sec": time_limit})
+        return
+
+    for player_sid, player_name in players:
+        await sio.save_session(player_sid, {"username": player_name, "room_id": room_id})
+        await sio.enter_room(player_sid, room_id)
+
+    print(f"[LOG] Matched {opponent['username']} vs {username} in room {room_id}")
+    await sio.emit(
+        "match_found",
+        {"room_id": room_id, "difficulty": difficulty, "problem": room["problem"]},
+        room=room_id,
+    )
+    # both players are new to the room, so both get the full state
+    await sio.emit("room_snapshot", room_snapshot(room), room=room_id)
+
+
+@sio.event
+async def cancel_match(sid, data=None):
+    if matchmaker.cancel(sid):
+        await sio.emit("match_cancelled", {"ok": True}, to=sid)
+
+
+# rate-limit, then time, every socket handler above (must stay below the last @sio.event);
+# refused events get a "rate_limited" {event, retry_after} and count in the timings too
+limit_socketio(sio, rate_limiter, on_limited=lambda event: rate_limited.inc(operation=event))
+instrument_socketio(sio, socket_event_seconds, socket_event_errors)
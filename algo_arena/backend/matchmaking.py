@@ -0,0 +1,84 @@
+"""
+AlgoArena Matchmaking
+Per-difficulty FIFO queues: the first waiting player is paired with the
+next one who asks for the same difficulty, all in O(1)
+
+The queues are per process; with several workers each worker matches the
+players connected to it
+"""
+
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Optional
+
+
+class Matchmaker:
+    def __init__(self):
+        self.queues = {}  # difficulty -> OrderedDict(sid -> entry), oldest first
+        self.queued_sids = {}  # sid -> difficulty, for O(1) cancel
+
+        self.enqueued = 0
+        self.cancelled = 0
+        self.matches = 0
+        self.recent_waits = deque(maxlen=1000)  # seconds the first player waited
+
+    def find(
+        self, sid: str, username: str, difficulty: str, is_live: Optional[Callable[[str], bool]] = None
+    ) -> Optional[dict]:
+        # returns the opponent's entry if a match was made, else queues the player
+        self.cancel(sid, count=False)
+        queue = self.queues.setdefault(difficulty, OrderedDict())
+
+        # a player who dropped before their disconnect handler ran is not an opponent
+        while queue and is_live is not None and not is_live(next(iter(queue))):
+            self.cancel(next(iter(queue)))
+
+        if queue:
+            opponent_sid, opponent = next(iter(queue.items()))
+            # never pair two tabs of the same player
+            if opponent["username"] != username:
+                queue.popitem(last=False)
+                del self.queued_sids[opponent_sid]
+                self.matches += 1
+                self.recent_waits.append(time.monotonic() - opponent["queued_at"])
+                return opponent
+
+        queue[sid] = {
+            "sid": sid,
+            "username": username,
+            "difficulty": difficulty,
+            "queued_at": time.monotonic(),
+        }
+        self.queued_sids[sid] = difficulty
+        self.enqueued += 1
+        return None
+
+    def cancel(self, sid: str, count: bool = True) -> bool:
+        difficulty = self.queued_sids.pop(sid, None)
+        if difficulty is None:
+            return False
+        del self.queues[difficulty][sid]
+        if count:
+            self.cancelled += 1
+        return True
+
+    def waiting(self, difficulty: str) -> int:
+        return len(self.queues.get(difficulty, ()))
+
+    def stats(self) -> dict:
+        waits = sorted(self.recent_waits)
+
+        def pct(p):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))] * 1000, 2)
+
+        return {
+            "waiting": {d: len(q) for d, q in self.queues.items()},
+            "enqueued": self.enqueued,
+            "cancelled": self.cancelled,
+            "matches": self.matches,
+            "wait_ms_p50": pct(0.50),
+            "wait_ms_p95": pct(0.95),
+            "wait_ms_max": pct(1.0),
+        }
@@ -0,0 +1,257 @@
+"""
+AlgoArena Metrics
+A small Prometheus-style registry (counters, gauges, histograms; gauges and
+some counters are read from a callback at scrape time), rendered in the text
+exposition format, plus the hooks that feed it: an ASGI
+middleware for REST latency, wrappers for Socket.IO event handlers and for
+the judge executor. Handlers themselves never time anything
+"""
+
+import bisect
+import inspect
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from executors import Executor, ExecutorError
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _render_collected(metric):
+    value = metric.collect()
+    if not metric.labelnames:
+        yield f"{metric.name} {_format_value(value)}"
+        return
+    for key, v in value.items():
+        key = key if isinstance(key, tuple) else (key,)
+        yield f"{metric.name}{_format_labels(metric.labelnames, key)} {_format_value(v)}"
+
+
+# =====================================================
+# METRIC TYPES
+# =====================================================
+class Counter:
+    """
+    Incremented with inc(), or, when `collect` is given, read from it at
+    scrape time like a Gauge (for totals another component already keeps)
+    """
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, help_text: str, labelnames: Iterable[str] = (), collect: Optional[Callable] = None
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[tuple, float] = {}
+        self.collect = collect
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        if self.collect is not None:
+            yield from _render_collected(self)
+            return
+        for key, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge:
+    """
+    Read at scrape time from `collect`, which returns a number or, for
+    labelled gauges, {label value(s): number}
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, collect: Callable, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self):
+        return _render_collected(self)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self.counts: Dict[tuple, list] = {}
+        self.sums: Dict[tuple, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.counts[key] = [0] * (len(self.buckets) + 1)
+            self.sums[key] = 0.0
+        # one bucket per observation; cumulative totals are built at render time
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def render(self):
+        for key, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {self.sums[key]!r}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # one broken collector shouldn't take the whole scrape down
+                print(f"[LOG] Metric {metric.name} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+# =====================================================
+# HOOKS
+# =====================================================
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: times every HTTP request and labels it with the
+    route template (/rooms/{room_id}), never the raw path
+    """
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            self.histogram.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status["code"],
+            )
+
+
+def instrument_socketio(sio, histogram: Histogram, errors: Counter, namespace: str = "/"):
+    # wraps every handler registered so far; call after the last @sio.event
+    for event, handler in list(sio.handlers.get(namespace, {}).items()):
+        sio.handlers[namespace][event] = _timed_handler(event, handler, histogram, errors)
+
+
+def _timed_handler(event, handler, histogram, errors):
+    # Socket.IO passes extra args (auth, disconnect reason) when a handler
+    # accepts them, so hand the original exactly as many as it declares
+    params = inspect.signature(handler).parameters.values()
+    if any(p.kind == p.VAR_POSITIONAL for p in params):
+        max_args = None
+    else:
+        max_args = sum(1 for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD))
+
+    async def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            result = handler(*args[:max_args])
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        except Exception:
+            errors.inc(event=event)
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start, event=event)
+
+    return wrapper
+
+
+def instrument_executor(executor, histogram: Histogram, errors: Counter):
+    # judge latency = time inside the executor (queue wait is tracked by JudgeQueue)
+    run, stream = executor.run, executor.stream
+
+    async def timed_run(code: str) -> dict:
+        start = time.perf_counter()
+        try:
+            return await run(code)
+        except ExecutorError:
+            errors.inc(executor=executor.name)
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start, executor=executor.name)
+
+    async def timed_stream(code: str):
+        start = time.perf_counter()
+        try:
+            async for item in stream(code):
+                yield item
+        except ExecutorError:
+            errors.inc(executor=executor.name)
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start, executor=executor.name)
+
+    executor.run = timed_run
+    # the base stream() is built on run(), which is already timed
+    if type(executor).stream is not Executor.stream:
+        executor.stream = timed_stream
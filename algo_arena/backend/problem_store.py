@@ -0,0 +1,277 @@
+"""
+AlgoArena Problem Store
+Imports problems.json into SQLite (one row set per file version, plus an
+FTS5 index for search) and watches the file: when it changes the new bank is
+imported in one transaction and swapped in, while rooms that started on an
+older version keep judging against the version they were created with
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from catalog import ProblemCatalog
+
+DEFAULT_PROBLEMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "problems.json")
+
+
+class ProblemStore:
+    def __init__(
+        self,
+        json_path: str = DEFAULT_PROBLEMS_PATH,
+        db_path: str = "arena.db",
+        poll_interval_sec: float = 2.0,
+        keep_versions: int = 10,
+        pinned_cache_size: int = 8,
+    ):
+        self.json_path = json_path
+        self.db_path = db_path
+        self.poll_interval_sec = poll_interval_sec
+        self.keep_versions = keep_versions
+        self.pinned_cache_size = pinned_cache_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.task = None
+
+        # older versions still used by live rooms, loaded back from SQLite on demand
+        self.pinned = OrderedDict()  # version -> ProblemCatalog
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_reload = None
+        self._file_stamp = None
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS problem_versions (
+                version TEXT PRIMARY KEY,
+                imported_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS problems (
+                version TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (version, id)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS problems_fts USING fts5(
+                version UNINDEXED,
+                problem_id UNINDEXED,
+                title,
+                description,
+                constraints,
+                tokenize = 'porter unicode61'
+            );
+            """
+        )
+
+        # the current catalog; replaced wholesale, never mutated
+        self._file_stamp = self._stamp()
+        self.catalog = self._load_file()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    # =====================================================
+    # IMPORT / RELOAD
+    # =====================================================
+    def _stamp(self):
+        st = os.stat(self.json_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load_file(self) -> ProblemCatalog:
+        with open(self.json_path, "rb") as f:
+            raw = f.read()
+        catalog = ProblemCatalog(json.loads(raw), version=hashlib.sha256(raw).hexdigest())
+        self._import(catalog)
+        return catalog
+
+    def _import(self, catalog: ProblemCatalog):
+        # the whole version goes in under one write lock: readers see all of it or none
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM problem_versions WHERE version = ?", (catalog.version,)
+            ).fetchone()
+            if not exists:
+                conn.executemany(
+                    "INSERT INTO problems (version, position, id, data) VALUES (?, ?, ?, ?)",
+                    [(catalog.version, n, p["id"], json.dumps(p)) for n, p in enumerate(catalog.problems)],
+                )
+                conn.executemany(
+                    "INSERT INTO problems_fts (version, problem_id, title, description, constraints)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            catalog.version,
+                            p["id"],
+                            p.get("title", ""),
+                            p.get("description", ""),
+                            "\n".join(p.get("constraints") or []),
+                        )
+                        for p in catalog.problems
+                    ],
+                )
+                conn.execute(
+                    "INSERT INTO problem_versions (version, imported_at) VALUES (?, ?)",
+                    (catalog.version, time.time()),
+                )
+            else:
+                # re-imported (e.g. a reverted edit): make it the newest again
+                conn.execute(
+                    "UPDATE problem_versions SET imported_at = ? WHERE version = ?",
+                    (time.time(), catalog.version),
+                )
+            self._prune(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def _prune(self, conn):
+        stale = [
+            row[0]
+            for row in conn.execute(
+                "SELECT version FROM problem_versions ORDER BY imported_at DESC LIMIT -1 OFFSET ?",
+                (self.keep_versions,),
+            )
+        ]
+        for version in stale:
+            conn.execute("DELETE FROM problems WHERE version = ?", (version,))
+            conn.execute("DELETE FROM problems_fts WHERE version = ?", (version,))
+            conn.execute("DELETE FROM problem_versions WHERE version = ?", (version,))
+
+    def reload_if_changed(self) -> bool:
+        # cheap stat() check first; only a changed file is read and hashed
+        try:
+            stamp = self._stamp()
+            if stamp == self._file_stamp:
+                return False
+            # recorded up front so a broken file is retried only once it changes again
+            self._file_stamp = stamp
+            catalog = self._load_file()
+        except (OSError, ValueError, KeyError, TypeError, sqlite3.Error) as e:
+            # a half-written or broken file keeps the previous bank in service
+            self.reload_errors += 1
+            print(f"[LOG] Problem bank reload failed, keeping {self.catalog.version[:12]}: {e}")
+            return False
+
+        if catalog.version == self.catalog.version:
+            return False
+
+        with self._lock:
+            old = self.catalog
+            self.pinned[old.version] = old
+            self._trim_pinned()
+            self.catalog = catalog
+        self.reloads += 1
+        self.last_reload = time.time()
+        print(f"[LOG] Problem bank reloaded: {old.version[:12]} -> {catalog.version[:12]} ({len(catalog)} problems)")
+        return True
+
+    # =====================================================
+    # LOOKUPS
+    # =====================================================
+    def catalog_for(self, version: Optional[str]) -> ProblemCatalog:
+        # the catalog a room was created with; None/unknown falls back to current
+        current = self.catalog
+        if not version or version == current.version:
+            return current
+
+        with self._lock:
+            catalog = self.pinned.get(version)
+            if catalog is not None:
+                self.pinned.move_to_end(version)
+                return catalog
+
+        rows = self._conn().execute(
+            "SELECT data FROM problems WHERE version = ? ORDER BY position", (version,)
+        ).fetchall()
+        if not rows:
+            return current
+
+        catalog = ProblemCatalog([json.loads(row[0]) for row in rows], version=version)
+        with self._lock:
+            self.pinned[version] = catalog
+            self._trim_pinned()
+        return catalog
+
+    def _trim_pinned(self):
+        while len(self.pinned) > self.pinned_cache_size:
+            self.pinned.popitem(last=False)
+
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        catalog = self.catalog
+        match = _fts_query(query)
+        if not match:
+            return []
+
+        rows = self._conn().execute(
+            "SELECT problem_id FROM problems_fts"
+            " WHERE problems_fts MATCH ? AND version = ?"
+            " ORDER BY bm25(problems_fts, 0, 0, 10.0, 2.0, 1.0) LIMIT ?",
+            (match, catalog.version, limit),
+        ).fetchall()
+
+        return [catalog.summary_by_id[row[0]] for row in rows if row[0] in catalog.summary_by_id]
+
+    # =====================================================
+    # WATCHER
+    # =====================================================
+    def start(self):
+        if self.task is None and self.poll_interval_sec > 0:
+            self.task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval_sec)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                print(f"[LOG] Problem watcher failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "version": self.catalog.version,
+            "problems": len(self.catalog),
+            "pinned_versions": list(self.pinned.keys()),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_reload": self.last_reload,
+        }
+
+
+def _fts_query(text: str) -> str:
+    # user text -> prefix terms ANDed together; quoting keeps FTS5 syntax
+    # characters ("-", ":", "*", quotes) from being parsed as operators
+    terms = [t.replace('"', '""') for t in text.split() if t.strip('"')]
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def create_problem_store() -> ProblemStore:
+    return ProblemStore(
+        json_path=os.getenv("PROBLEMS_PATH", DEFAULT_PROBLEMS_PATH),
+        db_path=os.getenv("PROBLEM_DB_PATH", os.getenv("ROOM_STORE_PATH", "arena.db")),
+        poll_interval_sec=float(os.getenv("PROBLEMS_RELOAD_INTERVAL_SEC", "2")),
+    )
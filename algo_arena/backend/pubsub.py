@@ -0,0 +1,116 @@
+"""
+AlgoArena Socket.IO Client Managers
+By default Socket.IO keeps its client list in-process, so sio.emit(...,
+room=room_id) only reaches sockets on the same worker. The SQLite manager is
+a local message bus stand-in: every worker appends its emits to a shared
+table and tails it for the others' messages, so room broadcasts reach every
+worker
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+
+class SQLitePubSubManager(AsyncPubSubManager):
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path="arena-bus.db",
+        channel="socketio",
+        poll_interval_sec=0.01,
+        retention_sec=60.0,
+        write_only=False,
+        logger=None,
+        json=None,
+    ):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.path = path
+        self.poll_interval_sec = poll_interval_sec
+        self.retention_sec = retention_sec
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                payload TEXT NOT NULL
+            )
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _insert(self, payload: str):
+        self._conn().execute(
+            "INSERT INTO messages (channel, created_at, payload) VALUES (?, ?, ?)",
+            (self.channel, time.time(), payload),
+        )
+
+    def _fetch(self, after_id: int):
+        return self._conn().execute(
+            "SELECT id, payload FROM messages WHERE id > ? AND channel = ? ORDER BY id",
+            (after_id, self.channel),
+        ).fetchall()
+
+    def _last_id(self) -> int:
+        row = self._conn().execute("SELECT MAX(id) FROM messages").fetchone()
+        return row[0] or 0
+
+    def _trim(self):
+        self._conn().execute(
+            "DELETE FROM messages WHERE created_at < ?", (time.time() - self.retention_sec,)
+        )
+
+    async def _publish(self, data):
+        await asyncio.to_thread(self._insert, self.json.dumps(data))
+
+    async def _listen(self):
+        # only messages published after this worker started are delivered
+        last_id = await asyncio.to_thread(self._last_id)
+        last_trim = time.monotonic()
+
+        while True:
+            rows = await asyncio.to_thread(self._fetch, last_id)
+            for row_id, payload in rows:
+                last_id = row_id
+                yield payload
+
+            if time.monotonic() - last_trim > self.retention_sec:
+                await asyncio.to_thread(self._trim)
+                last_trim = time.monotonic()
+
+            await asyncio.sleep(self.poll_interval_sec)
+
+
+def create_client_manager(kind: Optional[str] = None):
+    # None means Socket.IO's default in-process manager
+    kind = (kind or os.getenv("SOCKETIO_MANAGER", "local")).lower()
+
+    if kind == "local":
+        return None
+
+    if kind == "sqlite":
+        return SQLitePubSubManager(
+            path=os.getenv("SOCKETIO_BUS_PATH", "arena-bus.db"),
+            poll_interval_sec=float(os.getenv("SOCKETIO_BUS_POLL_SEC", "0.01")),
+        )
+
+    raise ValueError(f"Unknown SOCKETIO_MANAGER '{kind}' (expected 'local' or 'sqlite')")
@@ -0,0 +1,177 @@
+"""
+AlgoArena Rate Limiting
+Token buckets per username and per socket id. Every operation (REST endpoint
+or Socket.IO event) has a cost in tokens; buckets refill at a steady rate up
+to a burst size. Only active keys hold a bucket: one that has sat idle long
+enough to be full again is dropped, since a new bucket would be identical
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+DEFAULT_COSTS = {
+    "submit_code": 5,
+    "create_room": 2,
+    "join_room": 2,
+    "find_match": 2,
+    "default": 1,
+}
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        rate_per_sec: float = 1.0,
+        burst: float = 20.0,
+        costs: Optional[Dict[str, float]] = None,
+        idle_ttl_sec: Optional[float] = None,
+        enabled: bool = True,
+    ):
+        self.rate = rate_per_sec
+        self.burst = burst
+        self.costs = dict(costs if costs is not None else DEFAULT_COSTS)
+        self.default_cost = self.costs.pop("default", 1)
+        self.enabled = enabled
+        for operation, cost in {**self.costs, "default": self.default_cost}.items():
+            if cost > burst:
+                raise ValueError(f"Cost of {operation} ({cost}) is above the burst size ({burst})")
+
+        # after burst / rate seconds every bucket is full again, evicting sooner would forgive debt
+        self.idle_ttl_sec = max(idle_ttl_sec or 0, burst / rate_per_sec)
+
+        # key -> [tokens, last refill], least recently used first
+        self.buckets: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        # REST handlers run in FastAPI's threadpool, sockets on the event loop
+        self._lock = threading.Lock()
+
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+    def cost(self, operation: str) -> float:
+        return self.costs.get(operation, self.default_cost)
+
+    def acquire(self, keys: Iterable[Tuple[str, str]], operation: str, now: Optional[float] = None) -> float:
+        # takes the operation's cost from every key's bucket, or from none of them;
+        # returns 0 when allowed, otherwise seconds until it would be
+        if not self.enabled:
+            return 0.0
+        cost = self.cost(operation)
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            self._evict_idle(now)
+            buckets = [self._refill(key, now) for key in keys]
+            short = max((cost - bucket[0] for bucket in buckets), default=0)
+            if short > 0:
+                self.limited += 1
+                return short / self.rate
+
+            for bucket in buckets:
+                bucket[0] -= cost
+            self.allowed += 1
+            return 0.0
+
+    def _refill(self, key, now) -> list:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [self.burst, now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self.buckets.move_to_end(key)
+        return bucket
+
+    def _evict_idle(self, now):
+        # oldest first, so this stops at the first bucket still in use
+        while self.buckets:
+            key, bucket = next(iter(self.buckets.items()))
+            if now - bucket[1] < self.idle_ttl_sec:
+                break
+            del self.buckets[key]
+            self.evicted += 1
+
+    def forget(self, key: Tuple[str, str]):
+        # a disconnected socket's bucket will never be used again
+        with self._lock:
+            self.buckets.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "rate_per_sec": self.rate,
+            "burst": self.burst,
+            "costs": {**self.costs, "default": self.default_cost},
+            "idle_ttl_sec": self.idle_ttl_sec,
+            "buckets": len(self.buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "evicted": self.evicted,
+        }
+
+
+# =====================================================
+# SOCKET.IO
+# =====================================================
+def limit_socketio(
+    sio,
+    limiter: RateLimiter,
+    on_limited: Optional[Callable[[str], None]] = None,
+    namespace: str = "/",
+    exempt: Iterable[str] = ("connect", "disconnect"),
+):
+    # wraps every handler registered so far; call after the last @sio.event
+    for event, handler in list(sio.handlers.get(namespace, {}).items()):
+        if event not in exempt:
+            sio.handlers[namespace][event] = _limited_handler(sio, limiter, event, handler, on_limited)
+
+
+def _limited_handler(sio, limiter, event, handler, on_limited):
+    # functools.wraps keeps the handler's signature visible to other wrappers
+    @functools.wraps(handler)
+    async def wrapper(sid, *args):
+        session = await sio.get_session(sid)
+        keys = [("sid", sid)]
+        if session.get("username"):
+            keys.append(("user", session["username"]))
+
+        retry_after = limiter.acquire(keys, event)
+        if retry_after:
+            if on_limited is not None:
+                on_limited(event)
+            await sio.emit("rate_limited", {"event": event, "retry_after": round(retry_after, 2)}, to=sid)
+            return None
+
+        result = handler(sid, *args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    return wrapper
+
+
+# =====================================================
+# FACTORY
+# =====================================================
+def parse_costs(raw: str) -> Dict[str, float]:
+    # "submit_code=10,join_room=3" on top of the defaults
+    costs = dict(DEFAULT_COSTS)
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        operation, _, cost = item.partition("=")
+        costs[operation.strip()] = float(cost)
+    return costs
+
+
+def create_rate_limiter() -> RateLimiter:
+    return RateLimiter(
+        rate_per_sec=float(os.getenv("RATE_LIMIT_PER_SEC", "1")),
+        burst=float(os.getenv("RATE_LIMIT_BURST", "20")),
+        costs=parse_costs(os.getenv("RATE_LIMIT_COSTS", "")),
+        idle_ttl_sec=float(os.getenv("RATE_LIMIT_IDLE_SEC", "0")),
+        enabled=os.getenv("RATE_LIMIT_ENABLED", "1").lower() not in ("0", "false", "no", "off"),
+    )
@@ -0,0 +1,302 @@
+"""
+AlgoArena Ratings
+Elo ratings updated one match at a time, persisted to SQLite and mirrored in
+an in-memory rank index so the leaderboard and "what's my rank" never have
+to sort or scan every player
+"""
+
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+# =====================================================
+# ELO
+# =====================================================
+def expected_score(rating: float, opponent: float) -> float:
+    return 1.0 / (1.0 + math.pow(10, (opponent - rating) / 400.0))
+
+
+def elo_update(rating_a: float, rating_b: float, score_a: float, k: float = 32.0):
+    # score_a: 1 = a won, 0 = b won, 0.5 = draw
+    delta = k * (score_a - expected_score(rating_a, rating_b))
+    return rating_a + delta, rating_b - delta
+
+
+# =====================================================
+# RANK INDEX (indexable skip list)
+# =====================================================
+class _Node:
+    __slots__ = ("key", "value", "next", "width")
+
+    def __init__(self, key, value, levels):
+        self.key = key
+        self.value = value
+        self.next = [None] * levels
+        self.width = [0] * levels
+
+
+_MAX_LEVELS = 32
+_TAIL = _Node(None, None, 0)
+
+
+class RankIndex:
+    """
+    Keys kept in ascending order; every link also stores how many entries it
+    skips, so insert, remove, rank_of and the offset lookup are all O(log n)
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.head = _Node(None, None, _MAX_LEVELS)
+        self.head.next = [_TAIL] * _MAX_LEVELS
+        self.head.width = [1] * _MAX_LEVELS
+
+    def __len__(self):
+        return self.size
+
+    def _random_levels(self) -> int:
+        levels = 1
+        while levels < _MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        return levels
+
+    def insert(self, key, value):
+        chain = [None] * _MAX_LEVELS
+        steps_at_level = [0] * _MAX_LEVELS
+        node = self.head
+        for level in reversed(range(_MAX_LEVELS)):
+            while node.next[level] is not _TAIL and node.next[level].key < key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_levels()
+        new = _Node(key, value, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, _MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain = [None] * _MAX_LEVELS
+        node = self.head
+        for level in reversed(range(_MAX_LEVELS)):
+            while node.next[level] is not _TAIL and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is _TAIL or target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), _MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def rank_of(self, key) -> Optional[int]:
+        # 0-based position of key, None if it isn't indexed
+        position = 0
+        node = self.head
+        for level in reversed(range(_MAX_LEVELS)):
+            while node.next[level] is not _TAIL and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        target = node.next[0]
+        if target is _TAIL or target.key != key:
+            return None
+        return position
+
+    def slice(self, offset: int, limit: int) -> list:
+        # jumps straight to `offset`, then walks `limit` entries
+        if offset < 0 or offset >= self.size or limit <= 0:
+            return []
+        node = self.head
+        remaining = offset + 1
+        for level in reversed(range(_MAX_LEVELS)):
+            while node.next[level] is not _TAIL and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+
+        items = []
+        while node is not _TAIL and len(items) < limit:
+            items.append(node.value)
+            node = node.next[0]
+        return items
+
+
+# =====================================================
+# RATING SERVICE
+# =====================================================
+class RatingService:
+    """
+    SQLite is the source of truth (so several workers can share it); each
+    process mirrors it in a RankIndex and pulls in rows other workers changed
+    by following the `seq` column
+    """
+
+    def __init__(self, path: str = "arena.db", initial_rating: float = 1200.0, k_factor: float = 32.0):
+        self.path = path
+        self.initial_rating = initial_rating
+        self.k_factor = k_factor
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self.players: Dict[str, dict] = {}
+        self.index = RankIndex()
+        self._seq = 0
+        self.matches_recorded = 0
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS ratings (
+                username TEXT PRIMARY KEY,
+                rating REAL NOT NULL,
+                games INTEGER NOT NULL,
+                wins INTEGER NOT NULL,
+                losses INTEGER NOT NULL,
+                draws INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ratings_seq ON ratings (seq);
+            """
+        )
+        # the only full read: loading the index at startup
+        self.sync()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(player: dict):
+        # highest rating first, username breaks ties
+        return (-player["rating"], player["username"])
+
+    def sync(self) -> int:
+        # applies rows changed since the last sync (ours or another worker's). Fetching
+        # under the lock too: a concurrent sync can't apply an older batch after a newer one
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT username, rating, games, wins, losses, draws, seq FROM ratings"
+                " WHERE seq > ? ORDER BY seq",
+                (self._seq,),
+            ).fetchall()
+            for username, rating, games, wins, losses, draws, seq in rows:
+                old = self.players.get(username)
+                if old is not None:
+                    self.index.remove(self._key(old))
+                player = {
+                    "username": username,
+                    "rating": rating,
+                    "games": games,
+                    "wins": wins,
+                    "losses": losses,
+                    "draws": draws,
+                }
+                self.players[username] = player
+                self.index.insert(self._key(player), player)
+                self._seq = max(self._seq, seq)
+        return len(rows)
+
+    def record_match(self, player_a: str, player_b: str, winner: Optional[str]) -> Dict[str, dict]:
+        # winner None means a draw; returns {username: {old, new, delta}}
+        score_a = 0.5 if winner is None else (1.0 if winner == player_a else 0.0)
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = {
+                row[0]: row
+                for row in conn.execute(
+                    "SELECT username, rating, games, wins, losses, draws FROM ratings"
+                    " WHERE username IN (?, ?)",
+                    (player_a, player_b),
+                )
+            }
+            old_a = rows[player_a][1] if player_a in rows else self.initial_rating
+            old_b = rows[player_b][1] if player_b in rows else self.initial_rating
+            new_a, new_b = elo_update(old_a, old_b, score_a, self.k_factor)
+
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM ratings").fetchone()[0]
+            now = time.time()
+            for username, new_rating, score in ((player_a, new_a, score_a), (player_b, new_b, 1.0 - score_a)):
+                seq += 1
+                _, _, games, wins, losses, draws = rows.get(username, (username, None, 0, 0, 0, 0))
+                conn.execute(
+                    "INSERT OR REPLACE INTO ratings"
+                    " (username, rating, games, wins, losses, draws, seq, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        username,
+                        new_rating,
+                        games + 1,
+                        wins + (score == 1.0),
+                        losses + (score == 0.0),
+                        draws + (score == 0.5),
+                        seq,
+                        now,
+                    ),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        self.sync()
+        self.matches_recorded += 1
+        return {
+            player_a: {"old": round(old_a, 1), "new": round(new_a, 1), "delta": round(new_a - old_a, 1)},
+            player_b: {"old": round(old_b, 1), "new": round(new_b, 1), "delta": round(new_b - old_b, 1)},
+        }
+
+    def leaderboard(self, offset: int = 0, limit: int = 20) -> List[dict]:
+        with self._lock:
+            page = self.index.slice(offset, limit)
+        return [{"rank": offset + i + 1, **p, "rating": round(p["rating"], 1)} for i, p in enumerate(page)]
+
+    def rank(self, username: str) -> Optional[dict]:
+        with self._lock:
+            player = self.players.get(username)
+            if player is None:
+                return None
+            position = self.index.rank_of(self._key(player))
+        return {"rank": position + 1, **player, "rating": round(player["rating"], 1)}
+
+    def __len__(self):
+        return len(self.index)
+
+    def stats(self) -> dict:
+        return {"players": len(self.index), "matches_recorded": self.matches_recorded}
+
+
+def create_rating_service() -> RatingService:
+    return RatingService(
+        path=os.getenv("RATINGS_DB_PATH", os.getenv("ROOM_STORE_PATH", "arena.db")),
+        initial_rating=float(os.getenv("RATING_INITIAL", "1200")),
+        k_factor=float(os.getenv("RATING_K_FACTOR", "32")),
+    )
@@ -0,0 +1,67 @@
+"""
+AlgoArena Submission Result Cache
+LRU + TTL cache of judge results, keyed on what actually decides the verdict:
+problem id, test-suite version and the normalized source code
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_code(code: str) -> str:
+    # whitespace-only edits shouldn't force a new judge run
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+class SubmissionCache:
+    def __init__(self, max_entries=1024, ttl_sec=600.0):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.entries = OrderedDict()  # key -> (expires_at, result)
+        self.catalog_version = None
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, problem_id: str, suite_version: str, code: str, language: str = "python") -> str:
+        code_hash = hashlib.sha256(normalize_code(code).encode()).hexdigest()
+        if language != "python":
+            code_hash = f"{language}:{code_hash}"
+        return f"{problem_id}:{suite_version}:{code_hash}"
+
+    def sync_catalog(self, catalog):
+        # the problem bank changed (new problems.json loaded): drop everything
+        if catalog.version != self.catalog_version:
+            self.entries.clear()
+            self.catalog_version = catalog.version
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, result: dict):
+        self.entries[key] = (time.monotonic() + self.ttl_sec, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_sec": self.ttl_sec,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
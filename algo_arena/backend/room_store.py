@@ -0,0 +1,386 @@
+"""
+AlgoArena Room Store
+Where rooms and socket presence live. The in-memory store keeps the old
+single-process behaviour; the SQLite (WAL) store can be shared by several
+uvicorn workers and survives a worker restart
+
+Rooms returned by get() must be treated as read-only: every change goes
+through join / leave / submit so it is applied atomically in either backend,
+and each one bumps room["version"] (see room_sync.py)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAX_PLAYERS = 2
+
+
+class RoomError(Exception):
+    pass
+
+
+class RoomNotFound(RoomError):
+    pass
+
+
+class RoomFull(RoomError):
+    pass
+
+
+class RoomNotActive(RoomError):
+    pass
+
+
+# =====================================================
+# ROOM RULES (shared by every backend)
+# =====================================================
+def _bump_version(room: dict):
+    # rooms stored before versioning start counting from 0
+    room["version"] = room.get("version", 0) + 1
+
+
+def _apply_join(room: dict, username: str):
+    player_names = [p["username"] for p in room["players"]]
+
+    if username not in player_names:
+        if len(room["players"]) >= MAX_PLAYERS:
+            raise RoomFull(room["room_id"])
+        room["players"].append({"username": username, "joined_at": datetime.now()})
+
+    # a full lobby starts the match; finished/abandoned rooms never restart
+    if len(room["players"]) == MAX_PLAYERS and room["status"] == "waiting":
+        room["status"] = "active"
+    _bump_version(room)
+
+
+def _apply_leave(room: dict, username: str):
+    old_status = room["status"]  # Remember what it was
+
+    # Remove the player
+    room["players"] = [p for p in room["players"] if p["username"] != username]
+    _bump_version(room)
+
+    if old_status == "finished":
+        # results are final, leaving doesn't change them
+        return
+    if len(room["players"]) == 0:
+        room["status"] = "abandoned"
+    elif old_status == "active":
+        # If they were mid-game, don't let a new person join an old match
+        room["status"] = "abandoned"
+    elif old_status == "waiting":
+        # If they were just waiting in the lobby, stay in waiting mode
+        room["status"] = "waiting"
+
+
+def _apply_submit(room: dict, username: str, submission: dict) -> bool:
+    # returns True only for the submission that finishes the match,
+    # so match_ended is emitted exactly once even across workers
+    if room["status"] != "active":
+        raise RoomNotActive(room["room_id"])
+
+    room.setdefault("submissions", {})[username] = submission
+    _bump_version(room)
+
+    if len(room["submissions"]) == len(room["players"]):
+        room["status"] = "finished"
+        return True
+    return False
+
+
+# =====================================================
+# BASE
+# =====================================================
+class RoomStore:
+    name = "base"
+
+    def create(self, room: dict) -> dict:
+        raise NotImplementedError
+
+    def get(self, room_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def join(self, room_id: str, username: str) -> dict:
+        raise NotImplementedError
+
+    def leave(self, room_id: str, username: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def submit(self, room_id: str, username: str, submission: dict) -> Tuple[dict, bool]:
+        raise NotImplementedError
+
+    # presence: which socket belongs to which username
+    def set_online(self, sid: str, username: str):
+        raise NotImplementedError
+
+    def set_offline(self, sid: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def online_count(self) -> int:
+        raise NotImplementedError
+
+    def count_by_status(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    # housekeeping (see sweeper.py)
+    def evict_expired(self, ttl_by_status: Dict[str, float], now: Optional[float] = None) -> List[dict]:
+        # removes rooms idle longer than their status' TTL and returns them
+        raise NotImplementedError
+
+    def prune_presence(self, live_sids: Iterable[str], ttl_sec: float, now: Optional[float] = None) -> int:
+        # refreshes this worker's live sockets, drops entries nobody refreshed
+        raise NotImplementedError
+
+
+# =====================================================
+# IN-MEMORY (single process)
+# =====================================================
+class InMemoryRoomStore(RoomStore):
+    name = "memory"
+
+    def __init__(self):
+        self.rooms = {}
+        self.online_users = {}
+        self.touched = {}  # room_id -> time of last change
+        # sync endpoints run in FastAPI's threadpool, sockets on the event loop
+        self._lock = threading.Lock()
+
+    def create(self, room: dict) -> dict:
+        with self._lock:
+            self.rooms[room["room_id"]] = room
+            self.touched[room["room_id"]] = time.time()
+        return room
+
+    def get(self, room_id: str) -> Optional[dict]:
+        return self.rooms.get(room_id)
+
+    def _room(self, room_id):
+        room = self.rooms.get(room_id)
+        if room is None:
+            raise RoomNotFound(room_id)
+        return room
+
+    def join(self, room_id: str, username: str) -> dict:
+        with self._lock:
+            room = self._room(room_id)
+            _apply_join(room, username)
+            self.touched[room_id] = time.time()
+            return room
+
+    def leave(self, room_id: str, username: str) -> Optional[dict]:
+        with self._lock:
+            room = self.rooms.get(room_id)
+            if room is not None:
+                _apply_leave(room, username)
+                self.touched[room_id] = time.time()
+            return room
+
+    def submit(self, room_id: str, username: str, submission: dict) -> Tuple[dict, bool]:
+        with self._lock:
+            room = self._room(room_id)
+            finished = _apply_submit(room, username, submission)
+            self.touched[room_id] = time.time()
+            return room, finished
+
+    def set_online(self, sid: str, username: str):
+        with self._lock:
+            self.online_users[sid] = username
+
+    def set_offline(self, sid: str) -> Optional[str]:
+        with self._lock:
+            return self.online_users.pop(sid, None)
+
+    def online_count(self) -> int:
+        return len(self.online_users)
+
+    def count_by_status(self) -> Dict[str, int]:
+        counts = {}
+        with self._lock:
+            for room in self.rooms.values():
+                counts[room["status"]] = counts.get(room["status"], 0) + 1
+        return counts
+
+    def evict_expired(self, ttl_by_status: Dict[str, float], now: Optional[float] = None) -> List[dict]:
+        now = now or time.time()
+        evicted = []
+        with self._lock:
+            for room_id, room in list(self.rooms.items()):
+                ttl = ttl_by_status.get(room["status"])
+                if ttl is not None and now - self.touched.get(room_id, now) > ttl:
+                    evicted.append(self.rooms.pop(room_id))
+                    self.touched.pop(room_id, None)
+        return evicted
+
+    def prune_presence(self, live_sids: Iterable[str], ttl_sec: float, now: Optional[float] = None) -> int:
+        # single process: anything not connected right now is stale
+        live = set(live_sids)
+        with self._lock:
+            stale = [sid for sid in self.online_users if sid not in live]
+            for sid in stale:
+                self.online_users.pop(sid, None)
+        return len(stale)
+
+
+# =====================================================
+# SQLITE (shared by several worker processes)
+# =====================================================
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot store {type(value).__name__} in a room")
+
+
+class SQLiteRoomStore(RoomStore):
+    name = "sqlite"
+
+    def __init__(self, path: str = "arena.db"):
+        self.path = path
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rooms (
+                room_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS rooms_status ON rooms (status, updated_at);
+            CREATE TABLE IF NOT EXISTS presence (
+                sid TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread; transactions are opened explicitly
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _update(self, room_id: str, apply, missing_ok=False):
+        # read-modify-write under a write lock so joins/submits from
+        # different workers can't interleave
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM rooms WHERE room_id = ?", (room_id,)).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                if missing_ok:
+                    return None, None
+                raise RoomNotFound(room_id)
+
+            room = json.loads(row[0])
+            outcome = apply(room)
+            conn.execute(
+                "UPDATE rooms SET status = ?, updated_at = ?, data = ? WHERE room_id = ?",
+                (room["status"], time.time(), json.dumps(room, default=_encode), room_id),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return room, outcome
+
+    def create(self, room: dict) -> dict:
+        self._conn().execute(
+            "INSERT INTO rooms (room_id, status, updated_at, data) VALUES (?, ?, ?, ?)",
+            (room["room_id"], room["status"], time.time(), json.dumps(room, default=_encode)),
+        )
+        return room
+
+    def get(self, room_id: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT data FROM rooms WHERE room_id = ?", (room_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def join(self, room_id: str, username: str) -> dict:
+        room, _ = self._update(room_id, lambda r: _apply_join(r, username))
+        return room
+
+    def leave(self, room_id: str, username: str) -> Optional[dict]:
+        room, _ = self._update(room_id, lambda r: _apply_leave(r, username), missing_ok=True)
+        return room
+
+    def submit(self, room_id: str, username: str, submission: dict) -> Tuple[dict, bool]:
+        return self._update(room_id, lambda r: _apply_submit(r, username, submission))
+
+    def set_online(self, sid: str, username: str):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO presence (sid, username, updated_at) VALUES (?, ?, ?)",
+            (sid, username, time.time()),
+        )
+
+    def set_offline(self, sid: str) -> Optional[str]:
+        conn = self._conn()
+        row = conn.execute("DELETE FROM presence WHERE sid = ? RETURNING username", (sid,)).fetchone()
+        return row[0] if row else None
+
+    def online_count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM presence").fetchone()[0]
+
+    def count_by_status(self) -> Dict[str, int]:
+        # answered from the (status, updated_at) index
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM rooms GROUP BY status")
+        return {status: count for status, count in rows}
+
+    def evict_expired(self, ttl_by_status: Dict[str, float], now: Optional[float] = None) -> List[dict]:
+        now = now or time.time()
+        conn = self._conn()
+        evicted = []
+        for status, ttl in ttl_by_status.items():
+            rows = conn.execute(
+                "DELETE FROM rooms WHERE status = ? AND updated_at < ? RETURNING data",
+                (status, now - ttl),
+            ).fetchall()
+            evicted.extend(json.loads(row[0]) for row in rows)
+        return evicted
+
+    def prune_presence(self, live_sids: Iterable[str], ttl_sec: float, now: Optional[float] = None) -> int:
+        # every worker refreshes its own sockets; rows left behind by a
+        # crashed worker stop being refreshed and age out
+        now = now or time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE presence SET updated_at = ? WHERE sid = ?",
+                [(now, sid) for sid in live_sids],
+            )
+            pruned = conn.execute(
+                "DELETE FROM presence WHERE updated_at < ?", (now - ttl_sec,)
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return pruned
+
+
+# =====================================================
+# FACTORY
+# =====================================================
+def create_room_store(kind: Optional[str] = None) -> RoomStore:
+    kind = (kind or os.getenv("ROOM_STORE", "memory")).lower()
+
+    if kind == "memory":
+        return InMemoryRoomStore()
+
+    if kind == "sqlite":
+        return SQLiteRoomStore(os.getenv("ROOM_STORE_PATH", "arena.db"))
+
+    raise ValueError(f"Unknown ROOM_STORE '{kind}' (expected 'memory' or 'sqlite')")
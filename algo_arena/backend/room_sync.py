@@ -0,0 +1,128 @@
+"""
+AlgoArena Room Sync
+Versioned room state for sockets: a `room_snapshot` when a player joins,
+then numbered `room_delta` events holding only what changed. The version
+lives on the room itself (bumped by every join / leave / submit in the room
+store), so deltas line up even when several workers change the same room.
+Changes that land while a room is inside its emit window go out as one delta
+
+A client keeps the version it has applied and, for each delta:
+    delta["base"] == version    -> apply it, version = delta["version"]
+    version >= delta["version"] -> already seen, ignore
+    otherwise                   -> missed something, emit `room_sync` for a new snapshot
+"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict
+
+# what opponents and spectators see of a submission (no code, no per-test output)
+SUBMISSION_FIELDS = (
+    "status",
+    "total_passed",
+    "total_tests",
+    "execution_time_ms",
+    "peak_memory_kb",
+    "submitted_at",
+)
+
+
+def submission_summary(entry: dict) -> dict:
+    summary = {field: entry.get(field) for field in SUBMISSION_FIELDS}
+    submitted_at = summary["submitted_at"]
+    if hasattr(submitted_at, "isoformat"):
+        summary["submitted_at"] = submitted_at.isoformat()
+    return summary
+
+
+def submission_summaries(room: dict) -> Dict[str, dict]:
+    return {user: submission_summary(entry) for user, entry in room.get("submissions", {}).items()}
+
+
+def room_snapshot(room: dict) -> dict:
+    return {
+        "room_id": room["room_id"],
+        "version": room.get("version", 0),
+        "status": room["status"],
+        "players": [p["username"] for p in room["players"]],
+        "problem": room["problem"],
+        "language": room.get("language", "python"),
+        "time_limit_sec": room["time_limit_sec"],
+        "submissions": submission_summaries(room),
+    }
+
+
+def merge_changes(delta: dict, changes: dict):
+    # later values win; submissions are merged per player
+    for key, value in changes.items():
+        if key == "submissions":
+            delta.setdefault("submissions", {}).update(value)
+        else:
+            delta[key] = value
+
+
+class RoomBroadcaster:
+    """
+    Throttles room_delta per room: a change goes out at once unless the room
+    emitted within the last `window_sec`, in which case it waits for the
+    window to close and leaves together with anything else that arrived
+    """
+
+    def __init__(self, emit: Callable[[str, dict, str], Awaitable], window_sec: float = 0.02):
+        self.emit = emit  # async emit(event, payload, room_id)
+        self.window_sec = window_sec
+        self.pending: Dict[str, dict] = {}  # room_id -> delta waiting for the window to close
+        self.cooldowns: Dict[str, asyncio.TimerHandle] = {}  # rooms that emitted within the window
+
+        self.published = 0
+        self.emitted = 0
+        self.coalesced = 0
+        self.bytes_emitted = 0
+
+    async def publish(self, room_id: str, version: int, changes: dict):
+        delta = self.pending.get(room_id)
+        if delta is not None and delta["version"] != version - 1:
+            # another worker changed the room in between; only contiguous versions merge
+            await self.flush(room_id)
+            delta = None
+
+        if delta is None:
+            delta = self.pending[room_id] = {"room_id": room_id, "base": version - 1, "version": version}
+        else:
+            self.coalesced += 1
+        merge_changes(delta, changes)
+        delta["version"] = version
+        self.published += 1
+
+        if room_id not in self.cooldowns:
+            await self.flush(room_id)
+
+    def _cooldown_over(self, room_id: str):
+        del self.cooldowns[room_id]
+        if room_id in self.pending:
+            asyncio.ensure_future(self.flush(room_id))
+
+    async def flush(self, room_id: str):
+        # also called before events that must arrive after the state they depend on (match_ended)
+        delta = self.pending.pop(room_id, None)
+        if delta is None:
+            return
+
+        if self.window_sec > 0 and room_id not in self.cooldowns:
+            self.cooldowns[room_id] = asyncio.get_running_loop().call_later(
+                self.window_sec, self._cooldown_over, room_id
+            )
+        self.emitted += 1
+        self.bytes_emitted += len(json.dumps(delta))
+        await self.emit("room_delta", delta, room_id)
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": round(self.window_sec * 1000, 1),
+            "pending_rooms": len(self.pending),
+            "rooms_in_window": len(self.cooldowns),
+            "deltas_published": self.published,
+            "deltas_emitted": self.emitted,
+            "coalesced": self.coalesced,
+            "bytes_emitted": self.bytes_emitted,
+        }
@@ -0,0 +1,286 @@
+"""
+AlgoArena Sandbox Worker
+What a LocalExecutor pool worker runs. Each worker is a fresh interpreter
+started on this file, with only JOB_ENV of the environment, that imports
+nothing of the server but harness and comparators: jobs are forked from a
+process that never held the server's modules, problem bank, rooms or secrets
+
+Each job is forked again from the worker, resource-limited and run in its
+own temp dir, so nothing a submission does outlives it
+
+    python sandbox.py <connection fd> <limits json> <suite cache size>
+"""
+
+import builtins
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+from collections import OrderedDict
+from multiprocessing.connection import Connection
+
+from harness import run_tests
+
+# address space a compiled program gets on top of its memory limit (libc, libstdc++, stack)
+NATIVE_BASE_MEMORY_MB = 64
+# the same for a JVM (needs_threads): code cache, class space, thread stacks, malloc
+# arenas and its own libraries, once JavaAdapter's flags have shrunk them
+JVM_BASE_MEMORY_MB = 1024
+# threads a JVM may start on top of what its user already runs (RLIMIT_NPROC counts both)
+JVM_TASKS = 64
+# each thread's malloc arena reserves 64 MB of address space, keep a JVM to a couple
+JVM_ENV = {"MALLOC_ARENA_MAX": "2"}
+# all a worker gets of the server's environment; the rest may hold secrets
+JOB_ENV = ("PATH", "LANG", "LC_ALL", "TZ")
+
+
+def job_env() -> dict:
+    return {name: os.environ[name] for name in JOB_ENV if name in os.environ}
+
+
+def user_tasks() -> int:
+    # processes + threads running as this uid: what RLIMIT_NPROC is checked against.
+    # a /proc/<pid>/task dir links once per thread on top of its own 2
+    uid, count = os.getuid(), 0
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            if entry.stat().st_uid == uid:
+                count += os.stat(os.path.join(entry.path, "task")).st_nlink - 2
+        except OSError:
+            pass  # exited while we looked
+    return count
+
+
+def nproc_limit(tasks: int) -> tuple:
+    # never above the hard limit we were given, setrlimit can't raise it
+    hard = resource.getrlimit(resource.RLIMIT_NPROC)[1]
+    if hard != resource.RLIM_INFINITY:
+        tasks = min(tasks, hard)
+    return tasks, tasks
+
+
+def _vm_size_bytes():
+    # current virtual memory size, so the memory limit is relative to what
+    # the forked worker already has mapped
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError):
+        return 0
+
+
+def _run_job_child(code, workdir, limits, stdout_fd, suite=None, native=None):
+    # runs inside the per-job fork: never returns. `native` ({argv, stdin, needs_threads})
+    # replaces this process with a compiled program once the limits are in place
+    exit_code = 1
+    try:
+        os.setsid()
+        os.chdir(workdir)
+
+        if native is not None:
+            with open("stdin.txt", "wb") as f:
+                f.write(native["stdin"])
+            os.dup2(os.open("stdin.txt", os.O_RDONLY), 0)
+        err_fd = os.open("stderr.txt", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.dup2(stdout_fd, 1)
+        os.dup2(err_fd, 2)
+
+        # drop everything inherited from the server (sockets, pipes, ...)
+        os.closerange(3, resource.getrlimit(resource.RLIMIT_NOFILE)[0])
+
+        cpu = limits["cpu_sec"]
+        threaded = native is not None and native["needs_threads"]
+        # a fresh program doesn't carry this worker's address space, just its own libraries
+        if native is None:
+            base = _vm_size_bytes()
+        else:
+            base = (JVM_BASE_MEMORY_MB if threaded else NATIVE_BASE_MEMORY_MB) * 1024 * 1024
+        memory = base + limits["memory_mb"] * 1024 * 1024
+        output = limits["output_kb"] * 1024
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (output, output))
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        if native is not None:
+            # a Python judge forks its player first, the player drops NPROC itself.
+            # a JVM needs its own threads, but no more than JVM_TASKS of them
+            resource.setrlimit(resource.RLIMIT_NPROC, nproc_limit(user_tasks() + JVM_TASKS if threaded else 0))
+
+        # the worker may have inherited replaced streams, rebind to the new fds
+        sys.stdin = open(os.devnull)
+        sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", closefd=False)
+        namespace = {"__name__": "__main__", "__builtins__": builtins}
+        try:
+            if native is not None:
+                env = {**os.environ, **JVM_ENV} if threaded else os.environ
+                os.execve(native["argv"][0], native["argv"], env)
+            if suite is not None:
+                # warm job: `code` is only the user's, the tests are already decoded
+                run_tests(code, *suite)
+            else:
+                exec(compile(code, "<submission>", "exec"), namespace)
+            exit_code = 0
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 0
+        except BaseException:
+            traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+
+
+def _read_capped(path, limit):
+    try:
+        with open(path, "rb") as f:
+            return f.read(limit).decode("utf-8", errors="replace")
+    except OSError:
+        return ""
+
+
+def _kill_job(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _execute_job(code, limits, send_line=None, control=None, suite=None, native=None):
+    # runs inside a pool worker: fork a throwaway child so user code
+    # can never pollute the warm worker. stdout comes back over a pipe so
+    # it can be forwarded line by line while the job is still running.
+    # A "cancel" message on `control` (the worker's pipe) kills the job
+    workdir = tempfile.mkdtemp(prefix="algoarena-")
+    read_fd, write_fd = os.pipe()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            _run_job_child(code, workdir, limits, write_fd, suite, native)
+        os.close(write_fd)
+
+        output_cap = limits["output_kb"] * 1024
+        deadline = time.monotonic() + limits["timeout_sec"]
+        chunks, size, pending = [], 0, b""
+        verdict = None
+
+        while verdict is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                verdict = "Time limit exceeded"
+                break
+            watched = [read_fd, control] if control is not None else [read_fd]
+            ready, _, _ = select.select(watched, [], [], remaining)
+            if not ready:
+                continue
+            if control is not None and control in ready:
+                try:
+                    message = control.recv()
+                except (EOFError, OSError):
+                    message = "cancel"  # the server went away
+                if message == "cancel":
+                    verdict = "Cancelled"
+                    break
+                continue
+            data = os.read(read_fd, 65536)
+            if not data:
+                break  # child closed stdout (normally: it exited)
+            size += len(data)
+            if size > output_cap:
+                verdict = "Output limit exceeded"
+                break
+            chunks.append(data)
+            if send_line:
+                *lines, pending = (pending + data).split(b"\n")
+                for line in lines:
+                    send_line(line.decode("utf-8", errors="replace"))
+
+        if verdict:
+            _kill_job(pid)
+
+        status = None
+        while status is None:
+            done_pid, raw_status = os.waitpid(pid, os.WNOHANG)
+            if done_pid:
+                status = raw_status
+            elif time.monotonic() > deadline:
+                verdict = verdict or "Time limit exceeded"
+                _kill_job(pid)
+            else:
+                time.sleep(0.001)
+
+        if send_line and pending and not verdict:
+            send_line(pending.decode("utf-8", errors="replace"))
+
+        result = {
+            "stdout": b"".join(chunks).decode("utf-8", errors="replace"),
+            "stderr": verdict or _read_capped(os.path.join(workdir, "stderr.txt"), output_cap),
+            "code": None,
+            "signal": None,
+        }
+        if os.WIFSIGNALED(status):
+            sig = signal.Signals(os.WTERMSIG(status))
+            result["signal"] = sig.name
+            if sig == signal.SIGXCPU:
+                result["stderr"] = result["stderr"] or "Time limit exceeded"
+            elif not result["stderr"]:
+                result["stderr"] = f"Process killed by {sig.name}"
+        else:
+            result["code"] = os.WEXITSTATUS(status)
+        return result
+    finally:
+        os.close(read_fd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def worker_main(conn, limits, suite_cache_size):
+    # pool worker loop: one job in, optional ("stdout", line) messages out,
+    # then exactly one ("result", run_dict). Jobs are ("run", harness, stream),
+    # ("suite", user_code, key, tests or None, options, stream)
+    # or ("exec", argv, stdin, needs_threads, stream) for compiled languages
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # decoded test suites, least recently used first; _Worker.suites mirrors the keys
+    suites = OrderedDict()
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        if job == "cancel":
+            continue  # arrived after its job had already finished
+
+        kind, code, *rest, stream = job
+        send_line = (lambda line: conn.send(("stdout", line))) if stream else None
+        try:
+            suite = native = None
+            if kind == "exec":
+                native = {"argv": code, "stdin": rest[0], "needs_threads": rest[1]}
+                code = None
+            elif kind == "suite":
+                key, tests, options = rest
+                if tests is not None:
+                    suites[key] = tests
+                    if len(suites) > suite_cache_size:
+                        suites.popitem(last=False)
+                suites.move_to_end(key)
+                suite = (suites[key], *options)
+            result = _execute_job(code, limits, send_line, control=conn, suite=suite, native=native)
+        except Exception as e:
+            result = {"stdout": "", "stderr": f"Sandbox failure: {e}", "code": None, "signal": None}
+        conn.send(("result", result))
+
+
+if __name__ == "__main__":
+    worker_main(Connection(int(sys.argv[1])), json.loads(sys.argv[2]), int(sys.argv[3]))
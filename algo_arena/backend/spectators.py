@@ -0,0 +1,205 @@
+"""
+AlgoArena Spectators
+Watchers of a room live on their own Socket.IO channel (spectator_channel)
+and never take a player seat. They get `spectator_update`: the room's whole
+public state (room_snapshot fields, each player's latest test_progress and,
+once over, the match result), at most once per `interval_sec` per room,
+counted from the end of the previous send: however long a fan-out takes, the
+room stays quiet for a full interval after it.
+
+Publishing only merges into that state and arms a timer, the emit itself runs
+in a background task: a player's handler never waits on the fan-out to
+hundreds of sockets. With local delivery the update goes out to
+`batch_size` sockets at a time, pausing `batch_pause_sec` in between so the
+socket writes of one batch drain before the next: player events don't queue
+behind the whole fan-out of a big room. While a room's previous
+update is still going out, newer changes keep merging and leave together afterwards.
+
+Clients merge each update into what they hold (keys present replace theirs,
+`progress` per player): a worker only keeps state for rooms it has watchers
+for or sent to within the last interval, so an update can be partial
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+
+class SpectatorsFull(Exception):
+    pass
+
+
+def spectator_channel(room_id: str) -> str:
+    return f"spectators:{room_id}"
+
+
+class SpectatorFeed:
+    def __init__(
+        self,
+        emit: Callable[[str, dict, str], Awaitable],
+        interval_sec: float = 0.25,
+        max_per_room: int = 5000,
+        watched_only: bool = True,
+        batch_size: int = 100,
+        batch_pause_sec: float = 0.005,
+    ):
+        self.emit = emit  # async emit(event, payload, to): to is the channel or a list of sids
+        self.interval_sec = interval_sec
+        self.max_per_room = max_per_room
+        self.batch_size = max(1, batch_size)
+        self.batch_pause_sec = batch_pause_sec
+        # with a single worker, rooms nobody here watches cost nothing; with a
+        # cross-worker bus the watchers may sit on another worker, so publish all
+        self.watched_only = watched_only
+
+        self.spectators: Dict[str, Set[str]] = {}  # room_id -> sids on this worker
+        self.watching: Dict[str, str] = {}  # sid -> room_id, one room per socket
+        self.state: Dict[str, dict] = {}  # room_id -> latest public state
+        self.dirty: Set[str] = set()  # rooms with changes not sent yet
+        self.timers: Dict[str, asyncio.TimerHandle] = {}
+        self.sending: Dict[str, asyncio.Task] = {}
+        self.last_sent: Dict[str, float] = {}
+
+        self.published = 0
+        self.coalesced = 0
+        self.emitted = 0
+        self.emit_errors = 0
+        self.emit_sec = 0.0
+
+    # =====================================================
+    # SPECTATORS
+    # =====================================================
+    def add(self, room_id: str, sid: str) -> Optional[str]:
+        # raises SpectatorsFull; returns the other room this socket stopped watching, if any
+        previous = self.watching.get(sid)
+        if previous == room_id:
+            return None
+        if len(self.spectators.get(room_id, ())) >= self.max_per_room:
+            raise SpectatorsFull(room_id)
+        if previous is not None:
+            self.remove(sid)
+        self.spectators.setdefault(room_id, set()).add(sid)
+        self.watching[sid] = room_id
+        return previous
+
+    def remove(self, sid: str) -> Optional[str]:
+        # returns the room the socket was watching
+        room_id = self.watching.pop(sid, None)
+        if room_id is None:
+            return None
+        watchers = self.spectators[room_id]
+        watchers.discard(sid)
+        if not watchers:
+            del self.spectators[room_id]
+            self.discard(room_id)
+        return room_id
+
+    def current(self, room_id: str) -> dict:
+        # what a new spectator is sent right away: merge it over a fresh room_snapshot
+        return {**self.state.get(room_id, {}), "spectators": len(self.spectators.get(room_id, ()))}
+
+    # =====================================================
+    # UPDATES
+    # =====================================================
+    def wants(self, room_id: str) -> bool:
+        # lets callers skip building an update nobody would get
+        return not self.watched_only or room_id in self.spectators
+
+    def publish(self, room_id: str, changes: dict):
+        # never awaits: the update leaves from its own task after the interval
+        if not self.wants(room_id):
+            return
+        state = self.state.setdefault(room_id, {"room_id": room_id})
+        for key, value in changes.items():
+            if key == "progress":
+                state.setdefault("progress", {}).update(value)
+            else:
+                state[key] = value
+        self.published += 1
+        if room_id in self.dirty:
+            self.coalesced += 1
+        self.dirty.add(room_id)
+        self._schedule(room_id)
+
+    def discard(self, room_id: str):
+        # nobody here watches anymore: forget the state, drop what wasn't sent
+        self.state.pop(room_id, None)
+        self.dirty.discard(room_id)
+        if room_id not in self.sending:
+            self.last_sent.pop(room_id, None)
+            timer = self.timers.pop(room_id, None)
+            if timer is not None:
+                timer.cancel()
+
+    def _schedule(self, room_id: str):
+        if room_id in self.timers or room_id in self.sending:
+            return  # the pending send (or the one after the current) picks this up
+        wait = self.last_sent.get(room_id, float("-inf")) + self.interval_sec - time.monotonic()
+        self.timers[room_id] = asyncio.get_running_loop().call_later(max(wait, 0), self._send, room_id)
+
+    def _send(self, room_id: str):
+        self.timers.pop(room_id, None)
+        if room_id not in self.dirty:
+            # a quiet interval: rooms only published for other workers' watchers are let go
+            if room_id not in self.spectators:
+                self.state.pop(room_id, None)
+                self.last_sent.pop(room_id, None)
+            return
+        self.dirty.discard(room_id)
+        self.sending[room_id] = asyncio.ensure_future(self._emit(room_id, self.current(room_id)))
+
+    async def _emit(self, room_id: str, payload: dict):
+        start = time.perf_counter()
+        try:
+            if self.watched_only:
+                # every watcher is on this worker: send in batches, letting other events run between
+                sids = sorted(self.spectators.get(room_id, ()))
+                for first in range(0, len(sids), self.batch_size):
+                    if first:
+                        await asyncio.sleep(self.batch_pause_sec)
+                    await self.emit("spectator_update", payload, sids[first : first + self.batch_size])
+            else:
+                await self.emit("spectator_update", payload, spectator_channel(room_id))
+            self.emitted += 1
+        except Exception as e:
+            self.emit_errors += 1
+            print(f"[LOG] Spectator update for room {room_id} failed: {e}")
+        finally:
+            self.emit_sec += time.perf_counter() - start
+            del self.sending[room_id]
+            self.last_sent[room_id] = time.monotonic()
+            # the next send (or the cleanup) once this room's interval is over
+            self.timers[room_id] = asyncio.get_running_loop().call_later(self.interval_sec, self._send, room_id)
+
+    async def stop(self):
+        # lets updates already going out finish, drops the ones still waiting
+        if self.sending:
+            await asyncio.gather(*self.sending.values(), return_exceptions=True)
+        for timer in self.timers.values():
+            timer.cancel()
+        self.timers.clear()
+
+    def stats(self) -> dict:
+        return {
+            "interval_ms": round(self.interval_sec * 1000, 1),
+            "watched_rooms": len(self.spectators),
+            "spectators": sum(len(sids) for sids in self.spectators.values()),
+            "updates_published": self.published,
+            "updates_emitted": self.emitted,
+            "coalesced": self.coalesced,
+            "emit_errors": self.emit_errors,
+            "emit_sec": round(self.emit_sec, 3),
+            "rooms_sending": len(self.sending),
+        }
+
+
+def create_spectator_feed(emit, watched_only: bool = True) -> SpectatorFeed:
+    return SpectatorFeed(
+        emit,
+        interval_sec=float(os.getenv("SPECTATOR_UPDATE_INTERVAL_MS", "250")) / 1000,
+        max_per_room=int(os.getenv("SPECTATOR_MAX_PER_ROOM", "5000")),
+        watched_only=watched_only,
+        batch_size=int(os.getenv("SPECTATOR_BATCH_SIZE", "100")),
+        batch_pause_sec=float(os.getenv("SPECTATOR_BATCH_PAUSE_MS", "5")) / 1000,
+    )
@@ -0,0 +1,108 @@
+"""
+AlgoArena Room Sweeper
+One background task that evicts idle rooms by status-specific TTLs,
+optionally archives them to disk first, and prunes stale presence entries
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+
+
+class RoomSweeper:
+    def __init__(
+        self,
+        store,
+        ttl_by_status: Dict[str, float],
+        interval_sec: float = 30.0,
+        presence_ttl_sec: float = 120.0,
+        archive_dir: Optional[str] = None,
+        live_sids: Optional[Callable[[], Iterable[str]]] = None,
+    ):
+        self.store = store
+        self.ttl_by_status = ttl_by_status
+        self.interval_sec = interval_sec
+        self.presence_ttl_sec = presence_ttl_sec
+        self.archive_dir = archive_dir
+        self.live_sids = live_sids or (lambda: [])
+        self.task = None
+
+        self.sweeps = 0
+        self.rooms_evicted = 0
+        self.presence_pruned = 0
+        self.bytes_reclaimed = 0
+        self.last_sweep = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval_sec)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"[LOG] Sweeper failed: {e}")
+
+    async def sweep(self) -> dict:
+        # store calls and archive writes are blocking, keep them off the event loop
+        live = list(self.live_sids())
+        return await asyncio.to_thread(self._sweep, live)
+
+    def _sweep(self, live_sids) -> dict:
+        start = time.perf_counter()
+        evicted = self.store.evict_expired(self.ttl_by_status)
+
+        # serialized size is our estimate of what each room was holding
+        lines = [json.dumps(room, default=str) for room in evicted]
+        reclaimed = sum(len(line) for line in lines)
+        if self.archive_dir and lines:
+            self._archive(lines)
+
+        pruned = self.store.prune_presence(live_sids, self.presence_ttl_sec)
+
+        self.sweeps += 1
+        self.rooms_evicted += len(evicted)
+        self.presence_pruned += pruned
+        self.bytes_reclaimed += reclaimed
+        self.last_sweep = {
+            "at": datetime.now().isoformat(),
+            "rooms_evicted": len(evicted),
+            "presence_pruned": pruned,
+            "bytes_reclaimed": reclaimed,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+        if evicted or pruned:
+            print(
+                f"[LOG] Sweeper evicted {len(evicted)} rooms (~{reclaimed / 1024:.1f} KB), "
+                f"pruned {pruned} presence entries"
+            )
+        return self.last_sweep
+
+    def _archive(self, lines):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"rooms-{datetime.now():%Y%m%d}.jsonl")
+        with open(path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def stats(self) -> dict:
+        return {
+            "interval_sec": self.interval_sec,
+            "ttl_by_status": self.ttl_by_status,
+            "archive_dir": self.archive_dir,
+            "sweeps": self.sweeps,
+            "rooms_evicted": self.rooms_evicted,
+            "presence_pruned": self.presence_pruned,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "last_sweep": self.last_sweep,
+        }
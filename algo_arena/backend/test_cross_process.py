@@ -0,0 +1,126 @@
+"""
+AlgoArena Cross-Process Integration Test
+Two uvicorn processes share the SQLite room store and the SQLite Socket.IO
+bus; Alice connects to one, Bob to the other, and both must see every
+room_delta and match_ended
+
+    python -m pytest test_cross_process.py -q
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+import socketio
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def two_workers(tmp_path):
+    env = dict(
+        os.environ,
+        JUDGE_EXECUTOR="local",
+        LOCAL_EXECUTOR_WORKERS="1",
+        ROOM_STORE="sqlite",
+        ROOM_STORE_PATH=str(tmp_path / "arena.db"),
+        SOCKETIO_MANAGER="sqlite",
+        SOCKETIO_BUS_PATH=str(tmp_path / "arena-bus.db"),
+    )
+    ports = [free_port(), free_port()]
+    servers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:socket_app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        for port in ports
+    ]
+    urls = [f"http://127.0.0.1:{port}" for port in ports]
+    try:
+        for url in urls:
+            for _ in range(100):
+                try:
+                    httpx.get(f"{url}/health")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+        yield urls
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+
+async def connect_player(url, username, events):
+    client = socketio.AsyncClient(reconnection=False)
+    for name in ("room_snapshot", "room_delta", "match_ended", "test_progress", "error"):
+        client.on(name, lambda data, name=name: events.append((name, data)))
+    identified = asyncio.Event()
+    client.on("identified", lambda data: identified.set())
+
+    await client.connect(url, transports=["websocket"])
+    await client.emit("identify", {"username": username})
+    await asyncio.wait_for(identified.wait(), timeout=5)
+    return client
+
+
+async def wait_for(events, name, predicate=lambda data: True, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for event, data in events:
+            if event == name and predicate(data):
+                return data
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"never received {name}: {events}")
+
+
+def test_players_on_different_workers_see_each_other(two_workers):
+    url_a, url_b = two_workers
+
+    async def scenario():
+        room = httpx.post(f"{url_a}/rooms", json={"username": "alice", "difficulty": "easy"}).json()
+        room_id = room["room_id"]
+
+        alice_events, bob_events = [], []
+        alice = await connect_player(url_a, "alice", alice_events)
+        bob = await connect_player(url_b, "bob", bob_events)
+        try:
+            await alice.emit("join_room", {"room_id": room_id})
+            snapshot = await wait_for(alice_events, "room_snapshot")
+            await bob.emit("join_room", {"room_id": room_id})
+
+            # Bob's join happens on worker B, Alice hears about it on worker A
+            update = await wait_for(alice_events, "room_delta", lambda d: d.get("status") == "active")
+            assert update["players"] == ["alice", "bob"]
+            # versions come from the shared room, so they line up across workers
+            assert update["base"] == snapshot["version"]
+
+            await bob.emit("submit_code", {"room_id": room_id, "code": "def solution(**kw):\n    return None"})
+            delta = await wait_for(alice_events, "room_delta", lambda d: "bob" in d.get("submissions", {}))
+            assert delta["base"] == update["version"]
+            assert "code" not in delta["submissions"]["bob"]
+            await wait_for(alice_events, "test_progress", lambda d: d["username"] == "bob")
+
+            await alice.emit("submit_code", {"room_id": room_id, "code": "def solution(**kw):\n    return None"})
+            ended_a = await wait_for(alice_events, "match_ended")
+            ended_b = await wait_for(bob_events, "match_ended")
+            assert ended_a == ended_b
+            assert set(ended_a["final_scores"]) == {"alice", "bob"}
+        finally:
+            await alice.disconnect()
+            await bob.disconnect()
+
+    asyncio.run(scenario())
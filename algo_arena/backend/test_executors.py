@@ -0,0 +1,210 @@
+"""
+AlgoArena Local Executor Tests
+Runs the judge against the pre-forked sandbox pool, no Piston server needed
+
+    python -m pytest test_executors.py -q
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+import pytest
+
+os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "rooms.db"))
+
+import main  # noqa: F401  (the server is loaded in this process, never in the sandbox)
+from executors import ExecutorError, FakeExecutor, LocalExecutor, PistonExecutor
+from harness import build_harness, suite_job
+from test_harness import SNOOPING
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def with_executor(fn, workers=2, **kwargs):
+    executor = LocalExecutor(workers=workers, **kwargs)
+    await executor.start()
+    try:
+        return await fn(executor)
+    finally:
+        await executor.close()
+
+
+# =====================================================
+# TESTS
+# =====================================================
+def test_runs_code_and_captures_stdout():
+    result = run(with_executor(lambda ex: ex.run("print('hello')\nprint(1 + 1)")))
+    assert result["stdout"] == "hello\n2\n"
+    assert result["stderr"] == ""
+    assert result["code"] == 0
+
+
+def test_exception_goes_to_stderr():
+    result = run(with_executor(lambda ex: ex.run("raise ValueError('boom')")))
+    assert "ValueError: boom" in result["stderr"]
+    assert result["code"] == 1
+
+
+def test_infinite_loop_is_killed():
+    result = run(with_executor(lambda ex: ex.run("while True:\n    pass"), timeout_sec=0.5))
+    assert result["stderr"] == "Time limit exceeded"
+
+
+def test_memory_limit():
+    code = "x = bytearray(512 * 1024 * 1024)\nprint('allocated')"
+    result = run(with_executor(lambda ex: ex.run(code), memory_mb=64))
+    assert "MemoryError" in result["stderr"]
+    assert "allocated" not in result["stdout"]
+
+
+def test_runs_in_temp_dir():
+    code = "import os\nprint(os.path.basename(os.getcwd()))"
+    result = run(with_executor(lambda ex: ex.run(code)))
+    assert result["stdout"].startswith("algoarena-")
+
+
+def test_jobs_never_see_the_server_process():
+    # main is loaded here and ROOM_STORE_PATH is set: neither may reach a submission
+    code = (
+        "import os, sys\n"
+        "with open('/proc/self/environ', 'rb') as f:\n"
+        "    print('main' in sys.modules, 'ROOM_STORE_PATH' in os.environ, b'ROOM_STORE_PATH' in f.read())"
+    )
+    result = run(with_executor(lambda ex: ex.run(code)))
+    assert result["stdout"] == "False False False\n"
+
+
+def test_worker_state_does_not_leak_between_runs():
+    async def two_runs(ex):
+        await ex.run("import sys\nsys.modules['leak'] = 1")
+        return await ex.run("import sys\nprint('leak' in sys.modules)")
+
+    # single worker so both runs hit the same warm process
+    executor_result = run(with_executor(two_runs, workers=1))
+    assert executor_result["stdout"] == "False\n"
+
+
+def test_concurrent_runs_share_the_pool():
+    async def many(ex):
+        return await asyncio.gather(*[ex.run(f"print({n})") for n in range(10)])
+
+    results = run(with_executor(many))
+    assert [r["stdout"] for r in results] == [f"{n}\n" for n in range(10)]
+
+
+def test_stream_yields_lines_before_the_result():
+    code = "import time\nfor n in range(3):\n    print(n, flush=True)\n    time.sleep(0.05)"
+
+    async def collect(ex):
+        events = []
+        async for kind, value in ex.stream(code):
+            events.append((kind, value))
+        return events
+
+    events = run(with_executor(collect))
+    assert events[:3] == [("stdout", "0"), ("stdout", "1"), ("stdout", "2")]
+    assert events[3][0] == "result"
+    assert events[3][1]["stdout"] == "0\n1\n2\n"
+
+
+def test_cancelled_run_frees_the_worker():
+    async def cancel_then_run(ex):
+        job = asyncio.ensure_future(ex.run("import time\ntime.sleep(30)"))
+        await asyncio.sleep(0.2)  # running in the only worker
+        started = time.monotonic()
+        job.cancel()
+        result = await ex.run("print('next')")
+        return result, time.monotonic() - started
+
+    result, elapsed = run(with_executor(cancel_then_run, workers=1, timeout_sec=30))
+    assert result["stdout"] == "next\n"
+    assert elapsed < 5  # the sleeping job was killed, not waited out
+
+
+def test_warm_workers_judge_suite_jobs_like_the_cold_harness():
+    tests = [{"input": {"s": "ab"}, "expected": "ba"}, {"input": {"s": "x"}, "expected": "y"}]
+    code = "def solution(s):\n    return s[::-1]"
+
+    async def both(ex):
+        cold = await ex.run(build_harness(code, tests))
+        warm = [await ex.run(suite_job(code, "rev", "v1", tests)) for _ in range(3)]
+        # another version of the same problem is a different suite
+        bumped = await ex.run(suite_job(code, "rev", "v2", tests[:1]))
+        return cold, warm, bumped
+
+    cold, warm, bumped = run(with_executor(both, workers=1, preload_suites=True))
+
+    def verdicts(result):
+        return [json.loads(line)["ok"] for line in result["stdout"].splitlines()[:-1]]
+
+    assert verdicts(cold) == [1, 0]
+    assert all(verdicts(w) == [1, 0] for w in warm)
+    assert json.loads(warm[0]["stdout"].splitlines()[-1]) == {"bitmap": "1", "passed": 1, "total": 2}
+    assert verdicts(bumped) == [1]
+    assert LocalExecutor(preload_suites=True).name == "warm"
+
+
+def test_warm_suites_stay_out_of_the_player():
+    tests = [{"input": {"n": n}, "expected": f"secret-{n}"} for n in range(3)]
+    result = run(with_executor(lambda ex: ex.run(suite_job(SNOOPING, "snoop", "v1", tests)), preload_suites=True))
+    assert json.loads(result["stdout"].splitlines()[-1])["passed"] == 0
+
+
+def test_warm_suites_cross_the_pipe_once_per_worker():
+    tests = [{"input": {"n": n}, "expected": n} for n in range(5)]
+
+    async def judge(ex):
+        for _ in range(4):
+            await ex.run(suite_job("def solution(n):\n    return n", "same", "v1", tests))
+        await ex.run(suite_job("def solution(n):\n    return n", "other", "v1", tests))
+        return ex.stats()
+
+    stats = run(with_executor(judge, workers=1, preload_suites=True, suite_cache_size=1))
+    assert stats["suite_misses"] == 2
+    assert stats["suite_hits"] == 3
+
+
+def test_output_limit():
+    code = "while True:\n    print('x' * 1000)"
+    result = run(with_executor(lambda ex: ex.run(code), output_kb=16))
+    assert result["stderr"] == "Output limit exceeded"
+
+
+def test_fake_executor_answers_like_the_harness():
+    tests = [{"input": {"x": 1}, "expected": True}, {"input": {"x": 2}, "expected": None}]
+    # same embedding build_harness uses
+    harness = f"def solution(x):\n    pass\n\ntests = json.loads({json.dumps(tests)!r})\n"
+
+    start = time.perf_counter()
+    result = run(FakeExecutor(latency_ms=30).run(harness))
+    assert time.perf_counter() - start >= 0.03
+
+    lines = [json.loads(line) for line in result["stdout"].splitlines()]
+    assert [line["ok"] for line in lines[:2]] == [1, 1]
+    assert lines[2] == {"bitmap": "3", "passed": 2, "total": 2}
+
+    failing = run(FakeExecutor(latency_ms=0, pass_rate=0.0).run(harness))
+    assert json.loads(failing["stdout"].splitlines()[-1]) == {"bitmap": "0", "passed": 0, "total": 2}
+
+
+def test_piston_http_errors_are_engine_errors():
+    async def scenario(status, body):
+        executor = PistonExecutor("http://piston.test/api/v2/execute")
+        executor.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda _: httpx.Response(status, json=body)))
+        executor._slots = asyncio.Semaphore(1)
+        try:
+            return await executor.run("print(1)")
+        finally:
+            await executor.close()
+
+    with pytest.raises(ExecutorError):
+        run(scenario(429, {"message": "Requests are being rate limited"}))
+    with pytest.raises(ExecutorError):
+        run(scenario(200, {"message": "runtime unknown"}))
+    assert run(scenario(200, {"run": {"stdout": "1\n", "stderr": "", "code": 0}}))["stdout"] == "1\n"
@@ -0,0 +1,130 @@
+"""
+AlgoArena Harness Tests
+Runs real harnesses in a subprocess: comparators, the pass/fail bitmap,
+capped diffs and runs that die part way
+
+    python -m pytest test_harness.py -q
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from comparators import comparator_spec, compare, diff
+from harness import build_harness, grade_run
+
+
+def judge(code, tests, comparator=None, **kwargs):
+    harness = build_harness(code, tests, comparator, **kwargs)
+    proc = subprocess.run([sys.executable, "-c", harness], capture_output=True, text=True, timeout=30)
+    lines = proc.stdout.strip().split("\n")
+    return grade_run(tests, lines)[0], lines
+
+
+def test_comparators():
+    assert compare("exact", [0, 1], [0, 1], 0) and not compare("exact", [1, 0], [0, 1], 0)
+    assert compare("float", {"x": [0.1 + 0.2]}, {"x": [0.3]}, 1e-9)
+    assert not compare("float", 0.31, 0.3, 1e-3)
+    assert not compare("float", True, 1, 1e-3)  # bools are never numbers here
+    assert compare("unordered", [[1, 2], 3], [3, [1, 2]], 0)
+    assert not compare("unordered", [1, 1, 2], [1, 2, 2], 0)
+    assert compare("set", {1, 2}, [2, 1, 1], 0)
+    assert not compare("set", "12", ["1", "2"], 0)
+
+    assert diff("unordered", [1, 1, 3], [1, 2, 3], 100) == {"actual": [1, 1, 3], "missing": [2], "extra": [1]}
+    capped = diff("exact", "x" * 1000, "y", 10)
+    assert capped == {"actual": '"xxxxxxxxx...', "truncated": True}
+
+    with pytest.raises(ValueError):
+        comparator_spec("fuzzy")
+    assert comparator_spec({"type": "float", "epsilon": 0.01}) == {"type": "float", "epsilon": 0.01}
+
+
+def test_harness_prints_verdicts_not_answers():
+    tests = [{"input": {"n": n}, "expected": list(range(n))} for n in range(1, 5)]
+    code = "def solution(n):\n    return list(range(n)) if n % 2 else list(range(n))[::-1] + ['x' * 5000]"
+
+    results, lines = judge(code, tests, "unordered", max_diffs=1, diff_max_chars=50)
+    assert [r["passed"] for r in results] == [True, False, True, False]
+    assert lines[-1] == '{"bitmap": "5", "passed": 2, "total": 4}'
+    # passing tests never echo the answer, failures are capped in count and size
+    assert results[0]["actual"] is None
+    assert results[1]["truncated"] is True and len(results[1]["actual"]) == 53
+    assert results[1]["extra"].startswith('["xxx') and results[1]["missing"] == []
+    assert "actual" not in lines[3]
+    assert all(len(line) < 400 for line in lines)
+
+
+def test_exceptions_and_runs_that_die():
+    tests = [{"input": {"n": n}, "expected": None} for n in range(3)]
+
+    results, _ = judge("def solution(n):\n    return 1 / n and None", tests)
+    assert [r["passed"] for r in results] == [False, True, True]
+    assert results[0]["error"] == "division by zero"
+
+    # the process exits before the second test: no summary, remaining tests are errors
+    results, _ = judge("import os\ndef solution(n):\n    if n:\n        os._exit(0)", tests)
+    assert [r["passed"] for r in results] == [True, False, False]
+    assert results[2]["error"] == "Execution Error"
+
+
+def test_submissions_cannot_forge_verdicts():
+    tests = [{"input": {"n": n}, "expected": n + 1} for n in range(3)]
+
+    # prints never reach the judge's stdout, exiting only cuts the run short
+    forged = 'import os\nprint(\'{"ok": 1}\\n\' * 500, flush=True)\nos._exit(0)'
+    results, lines = judge(forged, tests)
+    assert not any(r["passed"] for r in results) and lines == [""]
+
+    # the comparator lives in another process
+    patched = (
+        "import sys\n"
+        "globals()['_arena_compare'] = lambda *a: True\n"
+        "sys.modules['__main__']._arena_compare = lambda *a: True\n"
+        "def solution(n):\n    print('{\"ok\": 1}')\n    return n"
+    )
+    results, lines = judge(patched, tests)
+    assert [r["passed"] for r in results] == [False, False, False]
+    assert lines[-1] == '{"bitmap": "0", "passed": 0, "total": 3}'
+
+
+# looks for the answer in every frame above solution() and every object the gc tracks
+SNOOPING = """
+import gc, json, sys
+
+def solution(n):
+    frame, seen = sys._getframe(), []
+    while frame:
+        seen += frame.f_locals.values()
+        frame = frame.f_back
+    for obj in seen + gc.get_objects():
+        if isinstance(obj, list) and obj and isinstance(obj[0], dict) and "expected" in obj[0]:
+            return obj[n]["expected"]
+        if isinstance(obj, str) and '"expected"' in obj:
+            return json.loads(obj)[n]["expected"]
+    return None
+"""
+
+
+def test_the_player_never_holds_the_expected_answers():
+    tests = [{"input": {"n": n}, "expected": f"secret-{n}"} for n in range(3)]
+    results, lines = judge(SNOOPING, tests)
+    assert [r["passed"] for r in results] == [False, False, False]
+    assert lines[-1] == '{"bitmap": "0", "passed": 0, "total": 3}'
+
+
+def test_a_complete_run_is_one_line_per_test_and_a_matching_summary():
+    tests = [{"input": {}, "expected": 1}, {"input": {}, "expected": 2}]
+    ok = '{"ok": 1, "time_ms": 1.0}'
+    summary = '{"bitmap": "3", "passed": 2, "total": 2}'
+
+    results, complete = grade_run(tests, [ok, ok, summary])
+    assert complete and all(r["passed"] for r in results)
+    # died part way: the lines printed stand, the run isn't complete
+    results, complete = grade_run(tests, [ok])
+    assert not complete and [r["passed"] for r in results] == [True, False]
+    # an extra line, or a summary that disagrees with the lines, fails the whole run
+    for lines in ([ok, ok, summary, ok], [ok, '{"ok": 0}', summary]):
+        results, complete = grade_run(tests, lines)
+        assert not complete and not any(r["passed"] for r in results)
@@ -0,0 +1,125 @@
+"""
+AlgoArena Submission History Tests
+Batched background writes, keyset pagination and the player endpoint
+
+    python -m pytest test_history.py -q
+"""
+
+import asyncio
+import os
+import tempfile
+from datetime import datetime
+
+os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "arena.db"))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from catalog import InvalidCursor
+from history import SubmissionHistory
+
+
+def submission(n, username="alice"):
+    return {
+        "submission_id": f"{username}-{n}",
+        "username": username,
+        "room_id": "room-1",
+        "problem_id": "two_sum",
+        "status": "passed",
+        "total_passed": n,
+        "total_tests": 5,
+        "code": f"# attempt {n}",
+        "test_results": [{"passed": True}],
+        "submitted_at": datetime(2026, 1, 1, 12, 0, n % 60),
+    }
+
+
+def test_writer_batches_rows_and_flushes_on_stop(tmp_path):
+    history = SubmissionHistory(str(tmp_path / "arena.db"), batch_size=10, flush_interval_sec=10)
+
+    async def scenario():
+        history.start()
+        for n in range(25):
+            assert history.record(submission(n))
+        # 25 rows >= batch size wakes the writer long before the 10s interval
+        for _ in range(100):
+            if history.written >= 20:
+                break
+            await asyncio.sleep(0.01)
+        assert history.written >= 20
+        await history.stop()
+
+    asyncio.run(scenario())
+    assert history.written == 25
+    assert history.batches == 3
+    assert history.pending == []
+
+    # another process opening the same file sees everything
+    items, _ = SubmissionHistory(history.path).for_player("alice", limit=100, include_private=True)
+    assert len(items) == 25
+    assert items[0]["test_results"] == [{"passed": True}]
+    assert items[0]["submitted_at"].startswith("2026-01-01T12:00")
+
+
+def test_keyset_pages_newest_first(tmp_path):
+    history = SubmissionHistory(str(tmp_path / "arena.db"))
+    for n in range(7):
+        history.record(submission(n))
+        history.record(submission(n, "bob"))
+    asyncio.run(history.flush())
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = history.for_player("alice", cursor, limit=3)
+        seen.extend(item["submission_id"] for item in items)
+        if cursor is None:
+            break
+    assert seen == [f"alice-{n}" for n in reversed(range(7))]
+
+    # rows written after the first page don't shift later pages
+    first, cursor = history.for_player("alice", limit=3)
+    history.record(submission(99))
+    asyncio.run(history.flush())
+    second, _ = history.for_player("alice", cursor, limit=3)
+    assert [i["submission_id"] for i in second] == ["alice-3", "alice-2", "alice-1"]
+
+    with pytest.raises(InvalidCursor):
+        history.for_player("bob", cursor)  # cursors are bound to the player
+    with pytest.raises(InvalidCursor):
+        history.for_player("alice", "not-a-cursor")
+
+
+def test_full_backlog_drops_instead_of_blocking(tmp_path):
+    history = SubmissionHistory(str(tmp_path / "arena.db"), max_pending=2)
+    assert history.record(submission(1))
+    assert history.record(submission(2))
+    assert history.record(submission(3)) is False
+    assert history.stats()["dropped"] == 1
+
+
+def test_player_submissions_endpoint():
+    client = TestClient(main.app)
+    for n in range(3):
+        main.submission_history.record(submission(n, "carol"))
+    asyncio.run(main.submission_history.flush())
+
+    page = client.get("/players/carol/submissions?limit=2").json()
+    assert [i["submission_id"] for i in page["items"]] == ["carol-2", "carol-1"]
+    rest = client.get(f"/players/carol/submissions?limit=2&cursor={page['next_cursor']}").json()
+    assert [i["submission_id"] for i in rest["items"]] == ["carol-0"]
+    assert rest["next_cursor"] is None
+
+    assert client.get("/players/carol/submissions?cursor=bogus").status_code == 400
+    assert client.get("/players/nobody/submissions").json()["items"] == []
+
+
+def test_player_submissions_endpoint_hides_code_and_test_results():
+    # anyone can list a player's history: no source, no hidden tests' inputs or answers
+    client = TestClient(main.app)
+    main.submission_history.record(submission(1, "dave"))
+    asyncio.run(main.submission_history.flush())
+
+    item = client.get("/players/dave/submissions").json()["items"][0]
+    assert item["submission_id"] == "dave-1" and item["total_passed"] == 1
+    assert "code" not in item and "test_results" not in item
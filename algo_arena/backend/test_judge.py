@@ -0,0 +1,83 @@
+"""
+AlgoArena Judge Result Tests
+Totals in a judge result come from what the harness measured, memory counts
+only what the submission added, and equal scores are decided on runtime
+
+    python -m pytest test_judge.py -q
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "arena.db"))
+
+import main
+from executors import Executor
+from harness import build_harness
+
+PROBLEM = {
+    "id": "double",
+    "public_tests": [{"input": {"n": 1}, "expected": 2}],
+    "hidden_tests": [{"input": {"n": 2}, "expected": 4}],
+}
+
+
+class ScriptedExecutor(Executor):
+    # answers every run with the harness output it was given
+    def __init__(self, lines):
+        self.stdout = "\n".join(json.dumps(line) for line in lines) + "\n"
+
+    async def run(self, code):
+        return {"stdout": self.stdout, "stderr": "", "code": 0, "signal": None}
+
+
+def judge_with(lines):
+    saved = main.judge_executor
+    main.judge_executor = ScriptedExecutor(lines)
+    try:
+        return asyncio.run(main.run_judge(PROBLEM, "def solution(n):\n    return 2 * n"))
+    finally:
+        main.judge_executor = saved
+
+
+def test_totals_are_what_the_harness_measured():
+    result = judge_with(
+        [
+            {"ok": 1, "time_ms": 1.25, "cpu_ms": 1.0, "rss_kb": 300},
+            {"ok": 1, "time_ms": 2.5, "cpu_ms": 0.5, "rss_kb": 1200},
+            {"bitmap": "3", "passed": 2, "total": 2},
+        ]
+    )
+    assert result["status"] == "passed"
+    assert result["execution_time_ms"] == 3.75
+    assert result["cpu_time_ms"] == 1.5
+    assert result["peak_memory_kb"] == 1200
+    assert [t["time_ms"] for t in result["test_results"]] == [1.25, 2.5]
+
+
+def test_memory_is_what_the_submission_added():
+    tests = [{"input": {"mb": 0}, "expected": 0}, {"input": {"mb": 64}, "expected": 64}]
+    code = "def solution(mb):\n    data = bytearray(mb * 1024 * 1024)\n    return len(data) // (1024 * 1024)"
+    proc = subprocess.run([sys.executable, "-c", build_harness(code, tests)], capture_output=True, text=True)
+    small, large = (json.loads(line) for line in proc.stdout.splitlines()[:2])
+
+    # the interpreter and the harness itself don't count, 64 MB touched does
+    assert small["ok"] == 1 and small["rss_kb"] < 8 * 1024
+    assert large["ok"] == 1 and large["rss_kb"] >= 60 * 1024
+
+
+def test_equal_scores_go_to_the_faster_runtime():
+    def submission(passed, ms):
+        return {"total_passed": passed, "execution_time_ms": ms}
+
+    assert main.decide_winner({"alice": submission(3, 10.0), "bob": submission(3, 12.5)}) == ("alice", "execution_time")
+    assert main.decide_winner({"alice": submission(3, 12.5), "bob": submission(3, 10.0)}) == ("bob", "execution_time")
+    # a better score always wins, however slow
+    assert main.decide_winner({"alice": submission(2, 1.0), "bob": submission(3, 99.0)}) == ("bob", None)
+    # same score and runtime, or nothing passed: a tie
+    assert main.decide_winner({"alice": submission(3, 10.0), "bob": submission(3, 10.0)}) == (None, None)
+    assert main.decide_winner({"alice": submission(0, 1.0), "bob": submission(0, 5.0)}) == (None, None)
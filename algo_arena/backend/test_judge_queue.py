@@ -0,0 +1,144 @@
+"""
+AlgoArena Judge Queue Tests
+
+    python -m pytest test_judge_queue.py -q
+"""
+
+import asyncio
+
+import pytest
+
+from judge_queue import InFlightSubmissions, JudgeQueue, JudgeQueueFull, SubmissionSuperseded
+
+
+def test_workers_cap_concurrency():
+    running = 0
+    peak = 0
+
+    async def job(n):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return n * 2
+
+    async def main():
+        queue = JudgeQueue(workers=3, max_depth=100)
+        results = await asyncio.gather(*[queue.submit(job, n) for n in range(10)])
+        await queue.stop()
+        return results, queue.stats()
+
+    results, stats = asyncio.run(main())
+    assert results == [n * 2 for n in range(10)]
+    assert peak == 3
+    assert stats["completed"] == 10
+    assert stats["wait_ms_max"] > 0
+
+
+def test_full_queue_is_refused_with_retry_hint():
+    async def slow():
+        await asyncio.sleep(0.05)
+
+    async def main():
+        queue = JudgeQueue(workers=1, max_depth=2)
+        first = [asyncio.ensure_future(queue.submit(slow))]
+        await asyncio.sleep(0.01)  # running
+        first += [asyncio.ensure_future(queue.submit(slow)) for _ in range(2)]
+        await asyncio.sleep(0)  # two waiting
+        with pytest.raises(JudgeQueueFull) as busy:
+            await queue.submit(slow)
+        await asyncio.gather(*first)
+        await queue.stop()
+        return busy.value, queue.stats()
+
+    busy, stats = asyncio.run(main())
+    assert busy.retry_after >= 1
+    assert stats["rejected"] == 1
+    assert stats["accepted"] == 3
+
+
+def test_job_errors_reach_the_submitter():
+    async def broken():
+        raise ValueError("boom")
+
+    async def main():
+        queue = JudgeQueue(workers=1)
+        with pytest.raises(ValueError):
+            await queue.submit(broken)
+        await queue.stop()
+
+    asyncio.run(main())
+
+
+def test_cancelling_the_submitter_cancels_the_running_job():
+    state = {"cancelled": False}
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def main():
+        queue = JudgeQueue(workers=1)
+        running = asyncio.ensure_future(queue.submit(slow))
+        queued = asyncio.ensure_future(queue.submit(slow))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        running.cancel()
+        await asyncio.sleep(0.01)
+        # the worker is free again
+        assert await queue.submit(asyncio.sleep, 0, "done") == "done"
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(main())
+    assert state["cancelled"]
+    assert stats["cancelled_running"] == 1
+    assert stats["cancelled_queued"] == 1
+    assert stats["completed"] == 1
+    assert stats["wasted_run_sec"] > 0
+
+
+def test_newer_submission_supersedes_the_older_one():
+    async def judge(verdict, delay):
+        await asyncio.sleep(delay)
+        return verdict
+
+    async def main():
+        inflight = InFlightSubmissions()
+        first = asyncio.ensure_future(inflight.run(("room", "alice"), judge("old", 10)))
+        await asyncio.sleep(0.01)
+        other = asyncio.ensure_future(inflight.run(("room", "bob"), judge("bob", 0.02)))
+        second = await inflight.run(("room", "alice"), judge("new", 0.01))
+        with pytest.raises(SubmissionSuperseded):
+            await first
+        return second, await other, inflight.stats()
+
+    second, other, stats = asyncio.run(main())
+    assert (second, other) == ("new", "bob")
+    assert stats == {"in_flight": 0, "superseded": 1}
+
+
+def test_superseded_runs_are_not_counted_as_completed():
+    async def judge(verdict, delay):
+        await asyncio.sleep(delay)
+        return verdict
+
+    async def main():
+        queue = JudgeQueue(workers=2)
+        inflight = InFlightSubmissions()
+        first = asyncio.ensure_future(inflight.run(("room", "alice"), queue.submit(judge, "old", 10)))
+        await asyncio.sleep(0.01)
+        second = await inflight.run(("room", "alice"), queue.submit(judge, "new", 0))
+        with pytest.raises(SubmissionSuperseded):
+            await first
+        await queue.stop()
+        return second, queue.stats()
+
+    second, stats = asyncio.run(main())
+    assert second == "new"
+    assert stats["completed"] == 1
+    assert stats["cancelled_running"] == 1
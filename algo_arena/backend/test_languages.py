@@ -0,0 +1,184 @@
+"""
+AlgoArena Language Tests
+Test encoding and server-side grading for compiled languages, and C++
+submissions judged end to end on the local sandbox (skipped without g++)
+
+    python -m pytest test_languages.py -q
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "rooms.db"))
+
+import main
+from executors import LocalExecutor
+from languages import CompileCache, CompileError, LanguageAdapter, NativeGrader, encode_tests, signature_spec
+from sandbox import JVM_BASE_MEMORY_MB, JVM_TASKS
+
+TWO_SUM = {
+    "id": "two_sum",
+    "signature": {"params": {"nums": "int[]", "target": "int"}, "returns": "int[]"},
+    "comparator": "unordered",
+    "public_tests": [{"input": {"nums": [2, 7, 11, 15], "target": 9}, "expected": [0, 1]}],
+    "hidden_tests": [
+        {"input": {"nums": [3, 2, 4], "target": 6}, "expected": [1, 2]},
+        {"input": {"nums": [3, 3], "target": 6}, "expected": [0, 1]},
+    ],
+}
+
+CPP_TWO_SUM = """
+vector<int> solution(vector<int> nums, int target) {
+    for (int i = 0; i < (int)nums.size(); i++)
+        for (int j = i + 1; j < (int)nums.size(); j++)
+            if (nums[i] + nums[j] == target) return {j, i};
+    return {};
+}
+"""
+
+JAVA_TWO_SUM = """
+class Solution {
+    public int[] solution(int[] nums, int target) {
+        for (int i = 0; i < nums.length; i++)
+            for (int j = i + 1; j < nums.length; j++)
+                if (nums[i] + nums[j] == target) return new int[] {j, i};
+        return new int[0];
+    }
+}
+"""
+
+needs_gpp = pytest.mark.skipif(shutil.which("g++") is None, reason="g++ not installed")
+needs_javac = pytest.mark.skipif(shutil.which("javac") is None, reason="javac not installed")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def judge_native(codes, language="cpp", problem=TWO_SUM):
+    # swaps main's executor and compile cache for a local pool + a fresh cache
+    executor = LocalExecutor(workers=1, timeout_sec=5)
+    cache = CompileCache(tempfile.mkdtemp())
+    saved = main.judge_executor, main.compile_cache
+    main.judge_executor, main.compile_cache = executor, cache
+    await executor.start()
+    try:
+        return [await main.run_judge(problem, code, language=language) for code in codes], cache.stats()
+    finally:
+        main.judge_executor, main.compile_cache = saved
+        await executor.close()
+
+
+# =====================================================
+# TESTS
+# =====================================================
+def test_encode_tests_writes_length_prefixed_tokens():
+    signature = signature_spec({"params": {"words": "string[]", "flag": "bool"}, "returns": "int"})
+    data = encode_tests([{"input": {"words": ["hé", ""], "flag": True}}], signature)
+    assert data == "1\n2\n3:hé\n0:\n1\n".encode()
+
+    with pytest.raises(ValueError):
+        signature_spec({"params": {"x": "float"}, "returns": "int"})
+
+
+def test_native_grader_compares_on_the_server():
+    grader = NativeGrader(TWO_SUM["public_tests"] + TWO_SUM["hidden_tests"], "unordered")
+    assert json.loads(grader.line('{"actual": [1, 0], "time_ms": 1.5}'))["ok"] == 1
+    wrong = json.loads(grader.line('{"actual": [0, 2], "time_ms": 1.0}'))
+    assert wrong["ok"] == 0 and "diff" in wrong
+    # the last test never printed: no summary until every test reported
+    assert len(grader.translate([])) == 2
+
+    # translate() takes the whole stdout and only grades the lines line() hasn't seen
+    lines = grader.translate(["seen", "seen", '{"error": "std::out_of_range"}'])
+    assert json.loads(lines[2])["error"] == "std::out_of_range"
+    assert json.loads(lines[3]) == {"bitmap": "1", "passed": 1, "total": 3}
+
+
+@needs_gpp
+def test_cpp_submission_is_compiled_once_and_judged():
+    wrong = CPP_TWO_SUM.replace("return {j, i};", "return {i, i};")
+    (passed, again, failed), stats = run(judge_native([CPP_TWO_SUM, CPP_TWO_SUM, wrong]))
+
+    assert passed["status"] == "passed" and passed["total_passed"] == 3
+    assert again["status"] == "passed"
+    assert failed["status"] == "failed" and failed["total_passed"] == 0
+    assert failed["test_results"][0]["actual"] == [0, 0]
+    assert stats["misses"] == 2 and stats["hits"] == 1
+
+
+@needs_gpp
+def test_cpp_compile_errors_and_crashes():
+    broken = "vector<int> solution(vector<int> nums, int target) { return nums }"
+    crash = "vector<int> solution(vector<int> nums, int target) { return {nums.at(target)}; }"
+    (compile_error, crashed), stats = run(judge_native([broken, crash]))
+
+    assert compile_error["status"] == "error"
+    assert compile_error["message"].startswith("Compilation failed:") and "error" in compile_error["message"]
+    assert stats["compile_failures"] == 1
+
+    # an exception inside solution() fails that test, the rest still run
+    assert crashed["status"] == "failed"
+    assert "range_check" in crashed["test_results"][0]["error"]
+
+
+@needs_javac
+def test_java_submission_is_compiled_once_and_judged():
+    wrong = JAVA_TWO_SUM.replace("new int[] {j, i}", "new int[] {i, i}")
+    hog = JAVA_TWO_SUM.replace("for (int i = 0;", "long[] big = new long[1 << 28];\n        for (int i = 0;")
+    (passed, again, failed, hogged), stats = run(judge_native([JAVA_TWO_SUM, JAVA_TWO_SUM, wrong, hog], "java"))
+
+    assert passed["status"] == "passed" and passed["total_passed"] == 3
+    assert again["status"] == "passed"
+    assert failed["status"] == "failed" and failed["test_results"][0]["actual"] == [0, 0]
+    # 2 GB is past the heap: each test fails with an OutOfMemoryError, the JVM survives
+    assert hogged["status"] == "failed"
+    assert "OutOfMemoryError" in hogged["test_results"][0]["error"]
+    assert stats["misses"] == 3 and stats["hits"] == 1
+
+
+class EnvAdapter(LanguageAdapter):
+    # a "compiler" whose diagnostics are its environment
+    name = "env"
+
+    def toolchain_version(self):
+        return "env"
+
+    def compile_argv(self):
+        return ["/bin/sh", "-c", "env; exit 1"]
+
+
+def test_compilers_see_no_more_of_the_environment_than_a_worker(monkeypatch):
+    monkeypatch.setenv("ARENA_TEST_SECRET", "hunter2")
+    with pytest.raises(CompileError) as error:
+        run(CompileCache(tempfile.mkdtemp()).get(EnvAdapter(), {"main.sh": ""}))
+    assert "PATH=" in error.value.output and "hunter2" not in error.value.output
+
+
+def test_threaded_runtimes_are_limited_too():
+    # what a JVM gets: an address space and a thread count with room for its own, two malloc arenas
+    job = {
+        "kind": "native",
+        "argv": ["/bin/sh", "-c", "cat /proc/self/limits; echo arenas $MALLOC_ARENA_MAX"],
+        "stdin": b"",
+        "needs_threads": True,
+    }
+
+    async def run_job(ex):
+        await ex.start()
+        try:
+            return await ex.run(job)
+        finally:
+            await ex.close()
+
+    result = run(run_job(LocalExecutor(workers=1, memory_mb=256)))
+    # /proc/<pid>/limits: a 26 column name, then soft, hard and units
+    limits = {line[:26].strip(): line[26:].split() for line in result["stdout"].splitlines()}
+    assert int(limits["Max address space"][0]) == (256 + JVM_BASE_MEMORY_MB) * 1024 * 1024
+    assert int(limits["Max processes"][0]) >= JVM_TASKS
+    assert result["stdout"].endswith("arenas 2\n")
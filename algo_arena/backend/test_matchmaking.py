@@ -0,0 +1,178 @@
+"""
+AlgoArena Matchmaking Tests
+Includes a simulated load test with thousands of clients on the queues
+
+    python -m pytest test_matchmaking.py -q -s
+"""
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "arena.db"))
+
+import main
+from matchmaking import Matchmaker
+
+
+def test_first_player_waits_second_is_matched():
+    mm = Matchmaker()
+    assert mm.find("s1", "alice", "easy") is None
+    assert mm.waiting("easy") == 1
+
+    opponent = mm.find("s2", "bob", "easy")
+    assert opponent["sid"] == "s1"
+    assert opponent["username"] == "alice"
+    assert mm.waiting("easy") == 0
+    assert mm.stats()["matches"] == 1
+
+
+def test_difficulties_do_not_mix():
+    mm = Matchmaker()
+    mm.find("s1", "alice", "easy")
+    assert mm.find("s2", "bob", "medium") is None
+    assert mm.stats()["waiting"] == {"easy": 1, "medium": 1}
+
+
+def test_fifo_order():
+    mm = Matchmaker()
+    mm.find("s1", "alice", "easy")
+    mm.find("s2", "bob", "medium")
+    mm.find("s3", "carol", "easy")  # pairs with alice
+    mm.find("s4", "dave", "easy")
+    assert mm.find("s5", "erin", "easy")["username"] == "dave"
+
+
+def test_same_user_is_not_paired_with_itself():
+    mm = Matchmaker()
+    mm.find("tab1", "alice", "easy")
+    assert mm.find("tab2", "alice", "easy") is None
+    assert mm.find("s3", "bob", "easy")["sid"] == "tab1"
+
+
+def test_cancel_and_requeue():
+    mm = Matchmaker()
+    mm.find("s1", "alice", "easy")
+    assert mm.cancel("s1")
+    assert not mm.cancel("s1")
+    assert mm.find("s2", "bob", "easy") is None
+
+    # asking again moves the player to the new difficulty, no duplicates
+    mm.find("s2", "bob", "medium")
+    assert mm.stats()["waiting"] == {"easy": 0, "medium": 1}
+
+
+def test_dropped_players_are_skipped():
+    mm = Matchmaker()
+    mm.find("s1", "alice", "easy")
+    mm.find("s2", "bob", "easy", is_live=lambda sid: True)
+    mm.find("s3", "carol", "easy")
+    # dave would be paired with carol, but her socket is gone
+    assert mm.find("s4", "dave", "easy", is_live=lambda sid: sid != "s3") is None
+    assert mm.find("s5", "erin", "easy", is_live=lambda sid: True)["sid"] == "s4"
+    assert mm.cancelled == 1
+
+
+class FakeSockets:
+    # the parts of main.sio find_match touches, with sockets that can drop mid-handler
+    def __init__(self, monkeypatch, **usernames):
+        self.sessions = {sid: {"username": name} for sid, name in usernames.items()}
+        self.live = set(usernames)
+        self.emitted = []
+        monkeypatch.setattr(main, "matchmaker", Matchmaker())
+        monkeypatch.setattr(main, "is_connected", self.live.__contains__)
+        monkeypatch.setattr(main.sio, "get_session", self.get_session)
+        monkeypatch.setattr(main.sio, "save_session", self.save_session)
+        monkeypatch.setattr(main.sio, "enter_room", self.enter_room)
+        monkeypatch.setattr(main.sio, "emit", self.emit)
+
+    async def get_session(self, sid):
+        return self.sessions[sid]
+
+    async def save_session(self, sid, session):
+        self.sessions[sid] = session
+
+    async def enter_room(self, sid, room_id):
+        assert sid in self.live
+
+    async def emit(self, event, payload, to=None, room=None):
+        self.emitted.append((event, to or room))
+
+    def events(self, event):
+        return [target for name, target in self.emitted if name == event]
+
+
+def test_find_match_validates_and_clamps_the_time_limit(monkeypatch):
+    sockets = FakeSockets(monkeypatch, s1="alice", s2="bob")
+    asyncio.run(main.find_match("s1", {"difficulty": "easy", "time_limit_sec": "600"}))
+    assert sockets.events("error") == ["s1"]
+    assert main.matchmaker.waiting("easy") == 0
+
+    asyncio.run(main.find_match("s1", {"difficulty": "easy", "time_limit_sec": 10**9}))
+    asyncio.run(main.find_match("s2", {"difficulty": "easy", "time_limit_sec": -5}))
+    room = main.room_store.get(sockets.sessions["s2"]["room_id"])
+    assert room["time_limit_sec"] == main.MATCH_TIME_LIMIT_MIN_SEC
+
+    asyncio.run(main.find_match("s1", {"difficulty": "easy", "time_limit_sec": 10**9}))
+    asyncio.run(main.find_match("s2", {"difficulty": "easy"}))
+    assert main.room_store.get(sockets.sessions["s2"]["room_id"])["time_limit_sec"] == 600
+
+
+def test_an_opponent_who_dropped_is_never_matched(monkeypatch):
+    sockets = FakeSockets(monkeypatch, s1="alice", s2="bob")
+    asyncio.run(main.find_match("s1", {"difficulty": "easy"}))
+    sockets.live.discard("s1")  # gone, but the disconnect handler hasn't run yet
+
+    asyncio.run(main.find_match("s2", {"difficulty": "easy"}))
+    assert sockets.events("match_found") == []
+    assert sockets.events("match_queued") == ["s1", "s2"]
+    assert main.matchmaker.waiting("easy") == 1
+
+
+def test_an_opponent_dropping_while_the_room_is_written_requeues_the_caller(monkeypatch):
+    sockets = FakeSockets(monkeypatch, s1="alice", s2="bob")
+    created = []
+    create = main.room_store.create
+
+    def create_and_drop(room):
+        created.append(create(room))
+        sockets.live.discard("s1")
+        return created[-1]
+
+    monkeypatch.setattr(main.room_store, "create", create_and_drop)
+    asyncio.run(main.find_match("s1", {"difficulty": "easy"}))
+    asyncio.run(main.find_match("s2", {"difficulty": "easy"}))
+
+    assert main.room_store.get(created[0]["room_id"])["status"] == "abandoned"
+    assert sockets.events("match_found") == []
+    assert sockets.events("match_queued") == ["s1", "s2"]
+    assert "room_id" not in sockets.sessions["s2"]
+
+
+def test_load_thousands_of_clients():
+    random.seed(7)
+    mm = Matchmaker()
+    clients = 20_000
+    matched = set()
+
+    start = time.perf_counter()
+    for n in range(clients):
+        sid = f"sid-{n}"
+        if n % 10 == 9:
+            # some players give up before being matched
+            mm.cancel(f"sid-{n - 1}")
+        opponent = mm.find(sid, f"user-{n}", random.choice(["easy", "medium", "hard"]))
+        if opponent:
+            assert opponent["sid"] not in matched
+            matched.update((sid, opponent["sid"]))
+    elapsed = time.perf_counter() - start
+
+    stats = mm.stats()
+    print(f"\n{clients} clients in {elapsed * 1000:.1f} ms ({clients / elapsed:,.0f} ops/s), {stats}")
+
+    waiting = sum(stats["waiting"].values())
+    assert len(matched) == stats["matches"] * 2
+    assert len(matched) + waiting + stats["cancelled"] == clients
+    assert waiting <= 3  # at most one leftover per difficulty
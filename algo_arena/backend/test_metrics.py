@@ -0,0 +1,113 @@
+"""
+AlgoArena Metrics Tests
+Exposition format, the Socket.IO / executor wrappers and the /metrics endpoint
+
+    python -m pytest test_metrics.py -q
+"""
+
+import asyncio
+import os
+import tempfile
+
+os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "arena.db"))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from executors import Executor, ExecutorError, FakeExecutor
+from metrics import Registry, instrument_executor, instrument_socketio
+
+
+def test_histogram_and_gauge_render_prometheus_text():
+    registry = Registry()
+    latency = registry.histogram("x_seconds", "help", ["route"], buckets=(0.1, 1.0))
+    registry.gauge("x_rooms", "rooms", lambda: {"active": 2}, ["status"])
+    registry.gauge("x_broken", "raises", lambda: 1 / 0)
+
+    latency.observe(0.05, route="/a")
+    latency.observe(0.1, route="/a")
+    latency.observe(5, route="/a")
+
+    text = registry.render()
+    assert "# TYPE x_seconds histogram" in text
+    assert 'x_seconds_bucket{route="/a",le="0.1"} 2' in text
+    assert 'x_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'x_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'x_seconds_count{route="/a"} 3' in text
+    assert 'x_rooms{status="active"} 2' in text
+    assert "# TYPE x_broken gauge" in text  # a failing collector doesn't break the scrape
+
+
+def test_socket_wrapper_times_handlers_and_trims_args():
+    registry = Registry()
+    seconds = registry.histogram("ev_seconds", "h", ["event"])
+    errors = registry.counter("ev_errors_total", "h", ["event"])
+
+    calls = []
+
+    async def disconnect(sid):
+        calls.append(sid)
+
+    async def submit_code(sid, data):
+        raise RuntimeError("boom")
+
+    class FakeSio:
+        handlers = {"/": {"disconnect": disconnect, "submit_code": submit_code}}
+
+    instrument_socketio(FakeSio, seconds, errors)
+
+    # Socket.IO passes a disconnect reason the handler doesn't declare
+    asyncio.run(FakeSio.handlers["/"]["disconnect"]("sid1", "client disconnect"))
+    assert calls == ["sid1"]
+    with pytest.raises(RuntimeError):
+        asyncio.run(FakeSio.handlers["/"]["submit_code"]("sid1", {}))
+
+    assert sum(seconds.counts[("disconnect",)]) == 1
+    assert sum(seconds.counts[("submit_code",)]) == 1
+    assert errors.values == {("submit_code",): 1}
+
+
+def test_executor_wrapper_counts_runs_once_and_errors():
+    registry = Registry()
+    seconds = registry.histogram("judge_seconds", "h", ["executor"])
+    errors = registry.counter("executor_errors_total", "h", ["executor"])
+
+    fake = FakeExecutor(latency_ms=0)
+    instrument_executor(fake, seconds, errors)
+
+    async def drain():
+        return [item async for item in fake.stream("print(1)")]
+
+    asyncio.run(fake.run("print(1)"))
+    asyncio.run(drain())  # base stream() goes through run(): still one observation
+    assert sum(seconds.counts[("fake",)]) == 2
+
+    class Down(Executor):
+        name = "down"
+
+        async def run(self, code):
+            raise ExecutorError("unreachable")
+
+    down = Down()
+    instrument_executor(down, seconds, errors)
+    with pytest.raises(ExecutorError):
+        asyncio.run(down.run("x"))
+    assert errors.values == {("down",): 1}
+
+
+def test_metrics_endpoint_labels_requests_by_route():
+    client = TestClient(main.app)
+    room = client.post("/rooms", json={"username": "alice", "difficulty": "easy"}).json()
+    client.get(f"/rooms/{room['room_id']}")
+    client.get("/no/such/path")
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'arena_http_request_seconds_count{method="GET",route="/rooms/{room_id}",status="200"} 1' in text
+    assert 'route="unmatched",status="404"' in text
+    assert room["room_id"] not in text
+    assert 'arena_rooms{status="waiting"}' in text
+    assert "arena_judge_queue_depth 0" in text
+    assert "arena_connected_sockets 0" in text
@@ -0,0 +1,105 @@
+"""
+AlgoArena Problem Endpoint Tests
+Cursor pagination and ETag / If-None-Match handling for /problems,
+run in-process (no server needed)
+
+    python -m pytest test_problem_endpoints.py -q
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "arena.db"))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from catalog import InvalidCursor, ProblemCatalog
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def make_catalog(size):
+    return ProblemCatalog(
+        [{"id": f"p{n}", "title": f"P{n}", "difficulty": ["Easy", "Hard"][n % 2]} for n in range(size)]
+    )
+
+
+def test_cursor_walks_every_problem_once():
+    catalog = make_catalog(25)
+    seen, cursor = [], None
+    while True:
+        page, cursor = catalog.page_summaries("easy", cursor, 4)
+        seen.extend(p["id"] for p in page)
+        if cursor is None:
+            break
+    assert seen == [f"p{n}" for n in range(0, 25, 2)]
+
+    # cursors are pinned to the filter and the catalog version
+    _, cursor = catalog.page_summaries("easy", None, 4)
+    with pytest.raises(InvalidCursor):
+        catalog.page_summaries("hard", cursor, 4)
+    with pytest.raises(InvalidCursor):
+        make_catalog(26).page_summaries("easy", cursor, 4)
+    with pytest.raises(InvalidCursor):
+        catalog.page_summaries("easy", "not-a-cursor!", 4)
+
+
+def test_problem_list_pages_and_revalidates(client):
+    first = client.get("/problems", params={"limit": 3})
+    assert first.status_code == 200
+    body = first.json()
+    assert body["count"] == 3 and body["next_cursor"]
+    assert first.headers["cache-control"].startswith("public")
+
+    again = client.get("/problems", params={"limit": 3}, headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == first.headers["etag"]
+
+    second = client.get("/problems", params={"limit": 3, "cursor": body["next_cursor"]})
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    first_ids = {p["id"] for p in body["items"]}
+    assert not first_ids & {p["id"] for p in second.json()["items"]}
+
+    assert client.get("/problems", params={"cursor": "bogus"}).status_code == 400
+
+
+def test_problem_details_etag(client):
+    problem_id = main.problem_store.catalog.problems[0]["id"]
+    first = client.get(f"/problems/{problem_id}")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    assert client.get(f"/problems/{problem_id}", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get(f"/problems/{problem_id}", headers={"If-None-Match": '"stale"'}).status_code == 200
+    assert client.get("/problems/missing", headers={"If-None-Match": "*"}).status_code == 404
+
+
+def test_prerendered_bodies_match_the_response_models(client):
+    problem = main.problem_store.catalog.problems[0]
+    body = client.get(f"/problems/{problem['id']}").json()
+    assert body == main.ProblemDetailsResponse.model_validate(problem).model_dump(mode="json")
+    assert "hidden_tests" not in body
+
+    hits = main.problem_render_cache.hits
+    client.get(f"/problems/{problem['id']}")
+    assert main.problem_render_cache.hits == hits + 1
+
+    # the OpenAPI schema still advertises the response models
+    paths = client.get("/openapi.json").json()["paths"]
+    for path, model in (("/problems", "ProblemResponse"), ("/problems/{problem_id}", "ProblemDetailsResponse")):
+        schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema["$ref"] == f"#/components/schemas/{model}"
+
+
+def test_search_endpoint(client):
+    first = main.problem_store.catalog.problems[0]
+    body = client.get("/problems/search", params={"q": first["title"]}).json()
+    assert body["items"][0]["id"] == first["id"]
+    assert client.get("/problems/search", params={"q": ""}).status_code == 422
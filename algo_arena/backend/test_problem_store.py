@@ -0,0 +1,103 @@
+"""
+AlgoArena Problem Store Tests
+Import into SQLite, FTS5 search, hot reload and version pinning
+
+    python -m pytest test_problem_store.py -q
+"""
+
+import json
+import os
+
+import pytest
+
+from problem_store import ProblemStore
+
+
+def problem(pid, title, description="", constraints=(), expected=1):
+    return {
+        "id": pid,
+        "title": title,
+        "difficulty": "Easy",
+        "description": description,
+        "starter_code": "def solution():\n    pass",
+        "constraints": list(constraints),
+        "public_tests": [{"input": {}, "expected": expected}],
+        "hidden_tests": [],
+    }
+
+
+def write_bank(path, problems):
+    # write + rename, the way an editor or deploy would replace the file
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(problems, f)
+    os.replace(tmp, path)
+    # make sure the mtime moves even on coarse-grained filesystems
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def bank(tmp_path):
+    path = str(tmp_path / "problems.json")
+    write_bank(
+        path,
+        [
+            problem("two_sum", "Two Sum", "Find two numbers that add up to a target.", ["n <= 10^4"]),
+            problem("reverse", "Reverse String", "Reverse the characters of a string."),
+            problem("max", "Find Max", "Return the largest number.", ["list is not empty"]),
+        ],
+    )
+    return path
+
+
+def test_search_ranks_title_matches_first(bank, tmp_path):
+    store = ProblemStore(bank, str(tmp_path / "arena.db"), poll_interval_sec=0)
+
+    # "find" is in Find Max's title but only in Two Sum's description
+    assert [p["id"] for p in store.search("find")] == ["max", "two_sum"]
+    assert {p["id"] for p in store.search("numbers")} == {"two_sum", "max"}  # stemmed
+    assert [p["id"] for p in store.search("revers")] == ["reverse"]  # prefix match
+    assert [p["id"] for p in store.search("empty")] == ["max"]  # constraints are indexed
+    assert store.search("two target") == [store.catalog.summary_by_id["two_sum"]]
+    # FTS5 syntax in user input is treated as text, not operators
+    assert store.search('"OR * - :') == []
+    assert store.search("   ") == []
+
+
+def test_reload_swaps_bank_and_pins_old_version(bank, tmp_path):
+    db = str(tmp_path / "arena.db")
+    store = ProblemStore(bank, db, poll_interval_sec=0)
+    old_version = store.catalog.version
+    assert store.reload_if_changed() is False
+
+    write_bank(bank, [problem("two_sum", "Two Sum II", "Sorted input.", expected=2), problem("new", "Brand New")])
+    assert store.reload_if_changed() is True
+
+    assert store.catalog.version != old_version
+    assert store.catalog.get("new") is not None
+    assert [p["id"] for p in store.search("brand")] == ["new"]
+    assert store.search("reverse") == []  # search follows the current bank only
+
+    # a room created before the reload still judges against its own tests
+    assert store.catalog_for(old_version).get("two_sum")["public_tests"][0]["expected"] == 1
+    assert store.catalog_for(None).get("two_sum")["public_tests"][0]["expected"] == 2
+
+    # another worker (or a restart) can load the pinned version back from SQLite
+    other = ProblemStore(bank, db, poll_interval_sec=0)
+    assert other.catalog_for(old_version).get("reverse") is not None
+
+
+def test_broken_file_keeps_current_bank(bank, tmp_path):
+    store = ProblemStore(bank, str(tmp_path / "arena.db"), poll_interval_sec=0)
+    version = store.catalog.version
+
+    with open(bank, "w") as f:
+        f.write('[{"id": "half-writ')
+    assert store.reload_if_changed() is False
+    assert store.catalog.version == version
+    assert store.reload_errors == 1
+
+    # not retried until the file changes again
+    assert store.reload_if_changed() is False
+    assert store.reload_errors == 1
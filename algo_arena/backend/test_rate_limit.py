@@ -0,0 +1,107 @@
+"""
+AlgoArena Rate Limit Tests
+Token bucket math, idle eviction, the Socket.IO wrapper and 429s on REST
+
+    python -m pytest test_rate_limit.py -q
+"""
+
+import asyncio
+import os
+import tempfile
+
+os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "arena.db"))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from rate_limit import RateLimiter, limit_socketio, parse_costs
+
+
+def test_bucket_refills_and_charges_every_key_or_none():
+    limiter = RateLimiter(rate_per_sec=2, burst=10, costs={"submit_code": 4, "default": 1})
+    alice, sid = ("user", "alice"), ("sid", "s1")
+
+    assert limiter.acquire([alice, sid], "submit_code", now=0) == 0
+    assert limiter.acquire([alice, sid], "submit_code", now=0) == 0
+    # 2 tokens left, 4 needed at 2 per second
+    assert limiter.acquire([alice, sid], "submit_code", now=0) == pytest.approx(1.0)
+    # a cheap event still fits, a fresh sid doesn't help alice
+    assert limiter.acquire([alice, sid], "identify", now=0) == 0
+    assert limiter.acquire([alice, ("sid", "s2")], "submit_code", now=0) > 0
+    # refused attempts took nothing from s2
+    assert limiter.buckets[("sid", "s2")][0] == 10
+
+    assert limiter.acquire([alice, sid], "submit_code", now=1.5) == 0
+    assert limiter.stats()["limited"] == 2
+
+    with pytest.raises(ValueError):
+        RateLimiter(burst=5, costs={"submit_code": 6})
+    assert parse_costs("submit_code=10, join_room=3")["submit_code"] == 10
+    assert RateLimiter(enabled=False).acquire([alice], "submit_code") == 0
+
+
+def test_idle_buckets_are_evicted_once_full_again():
+    limiter = RateLimiter(rate_per_sec=1, burst=5, costs={"default": 1})
+    for i in range(100):
+        limiter.acquire([("user", f"u{i}")], "identify", now=i * 0.01)
+    limiter.acquire([("user", "u0")], "identify", now=2)  # u0 is active again
+    assert len(limiter.buckets) == 100
+
+    # 5 seconds idle refills a 5-token bucket: dropping it changes nothing
+    limiter.acquire([("user", "late")], "identify", now=6.5)
+    assert set(limiter.buckets) == {("user", "u0"), ("user", "late")}
+    assert limiter.stats()["evicted"] == 99
+
+
+def test_socket_wrapper_refuses_with_retry_after():
+    limiter = RateLimiter(rate_per_sec=1, burst=2, costs={"submit_code": 2, "default": 1})
+    calls, emitted, refused = [], [], []
+
+    async def submit_code(sid, data):
+        calls.append(data)
+
+    async def disconnect(sid):
+        calls.append("bye")
+
+    class FakeSio:
+        handlers = {"/": {"submit_code": submit_code, "disconnect": disconnect}}
+
+        @staticmethod
+        async def get_session(sid):
+            return {"username": "alice"}
+
+        @staticmethod
+        async def emit(event, payload, to=None):
+            emitted.append((event, payload, to))
+
+    limit_socketio(FakeSio, limiter, on_limited=refused.append)
+
+    async def burst():
+        for i in range(3):
+            await FakeSio.handlers["/"]["submit_code"]("s1", i)
+            await FakeSio.handlers["/"]["disconnect"]("s1")
+
+    asyncio.run(burst())
+    assert calls == [0, "bye", "bye", "bye"]
+    assert refused == ["submit_code", "submit_code"]
+    assert emitted[0][0] == "rate_limited" and emitted[0][2] == "s1"
+    assert emitted[0][1]["event"] == "submit_code" and emitted[0][1]["retry_after"] > 0
+    assert ("user", "alice") in limiter.buckets
+
+
+def test_rest_submit_gets_429_when_over_budget(monkeypatch):
+    monkeypatch.setattr(
+        main, "rate_limiter", RateLimiter(rate_per_sec=0.01, burst=4, costs={"create_room": 2, "default": 1})
+    )
+    client = TestClient(main.app)
+    body = {"username": "spammer", "difficulty": "easy"}
+
+    assert client.post("/rooms", json=body).status_code == 201
+    assert client.post("/rooms", json=body).status_code == 201
+    response = client.post("/rooms", json=body)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    # other users keep their own budget
+    assert client.post("/rooms", json={**body, "username": "calm"}).status_code == 201
+    assert client.get("/rate_limits/stats").json()["limited"] == 1
@@ -0,0 +1,131 @@
+"""
+AlgoArena Ratings Tests
+Checks the Elo maths, the skip-list rank index against a plain sorted list,
+and that two workers sharing one SQLite file agree on the leaderboard
+
+    python -m pytest test_ratings.py -q
+"""
+
+import random
+import threading
+import time
+import types
+
+import pytest
+
+from ratings import RankIndex, RatingService, elo_update
+
+
+def test_elo_update_is_zero_sum_and_favours_the_underdog():
+    a, b = elo_update(1200, 1200, 1.0)
+    assert a == pytest.approx(1216)
+    assert b == pytest.approx(1184)
+
+    # an upset moves ratings more than an expected win
+    upset, _ = elo_update(1000, 1400, 1.0)
+    expected, _ = elo_update(1400, 1000, 1.0)
+    assert upset - 1000 > expected - 1400 > 0
+
+    draw_a, draw_b = elo_update(1300, 1100, 0.5)
+    assert draw_a < 1300 and draw_b > 1100
+    assert draw_a + draw_b == pytest.approx(2400)
+
+
+def test_rank_index_matches_sorted_list():
+    rng = random.Random(7)
+    index = RankIndex()
+    expected = []
+
+    for step in range(3000):
+        if expected and rng.random() < 0.3:
+            key = expected.pop(rng.randrange(len(expected)))
+            index.remove(key)
+        else:
+            key = (rng.randint(0, 500), step)
+            expected.append(key)
+            index.insert(key, key)
+        expected.sort()
+
+    assert len(index) == len(expected)
+    for position in rng.sample(range(len(expected)), 50):
+        assert index.rank_of(expected[position]) == position
+        assert index.slice(position, 5) == expected[position : position + 5]
+    assert index.rank_of((999, -1)) is None
+    assert index.slice(len(expected), 5) == []
+
+
+def test_leaderboard_and_rank(tmp_path):
+    service = RatingService(str(tmp_path / "ratings.db"))
+    service.record_match("alice", "bob", "alice")
+    service.record_match("alice", "carol", "alice")
+    changes = service.record_match("bob", "carol", "bob")
+
+    assert changes["bob"]["delta"] == -changes["carol"]["delta"]
+
+    board = service.leaderboard(0, 10)
+    assert [p["username"] for p in board] == ["alice", "bob", "carol"]
+    assert [p["rank"] for p in board] == [1, 2, 3]
+    assert board[0]["wins"] == 2 and board[0]["games"] == 2
+    assert board[2]["losses"] == 2
+
+    assert service.leaderboard(1, 1)[0]["username"] == "bob"
+    assert service.rank("carol")["rank"] == 3
+    assert service.rank("nobody") is None
+
+
+def test_ratings_survive_restart_and_sync_across_workers(tmp_path):
+    path = str(tmp_path / "ratings.db")
+    worker_a = RatingService(path)
+    worker_b = RatingService(path)
+
+    worker_a.record_match("alice", "bob", "alice")
+    # worker B sees A's match only after it syncs
+    assert worker_b.rank("alice") is None
+    worker_b.sync()
+    assert worker_b.rank("alice")["rating"] == worker_a.rank("alice")["rating"]
+
+    # B builds on A's ratings, not on fresh defaults
+    worker_b.record_match("alice", "bob", "bob")
+    worker_a.sync()
+    assert worker_a.rank("alice") == worker_b.rank("alice")
+    assert worker_a.rank("alice")["games"] == 2
+
+    restarted = RatingService(path)
+    assert restarted.leaderboard(0, 10) == worker_b.leaderboard(0, 10)
+
+
+
+def test_a_slow_sync_cant_apply_its_rows_after_a_newer_one(tmp_path):
+    # record_match runs in to_thread while /leaderboard syncs in the threadpool
+    path = str(tmp_path / "ratings.db")
+    service, other_worker = RatingService(path), RatingService(path)
+    other_worker.record_match("alice", "bob", "alice")
+    fetched, release = threading.Event(), threading.Event()
+    connect = service._conn
+
+    class Paused:
+        # the "slow" thread's sync stops between fetching its rows and applying them
+        def __init__(self, conn):
+            self.conn = conn
+
+        def execute(self, *args):
+            rows = self.conn.execute(*args).fetchall()
+            fetched.set()
+            release.wait(5)
+            return types.SimpleNamespace(fetchall=lambda: rows)
+
+    service._conn = lambda: Paused(connect()) if threading.current_thread().name == "slow" else connect()
+    slow = threading.Thread(target=service.sync, name="slow")
+    slow.start()
+    fetched.wait(5)
+    other_worker.record_match("alice", "bob", "alice")
+    newer = threading.Thread(target=service.sync)
+    newer.start()
+    time.sleep(0.1)
+    release.set()
+    slow.join()
+    newer.join()
+    service.sync()
+
+    assert service.rank("alice") == other_worker.rank("alice")
+    assert service.rank("alice")["games"] == 2
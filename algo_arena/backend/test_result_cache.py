@@ -0,0 +1,70 @@
+"""
+AlgoArena Submission Cache Tests
+
+    python -m pytest test_result_cache.py -q
+"""
+
+import time
+
+from catalog import ProblemCatalog
+from result_cache import SubmissionCache, normalize_code
+
+
+def make_catalog(expected="olleh"):
+    return ProblemCatalog(
+        [
+            {
+                "id": "easy_reverse_string",
+                "title": "Reverse a String",
+                "difficulty": "easy",
+                "public_tests": [{"input": {"s": "hello"}, "expected": expected}],
+            }
+        ]
+    )
+
+
+def test_whitespace_only_edits_share_a_key():
+    cache = SubmissionCache()
+    a = cache.key("p", "v1", "def solution(s):\n    return s[::-1]\n")
+    b = cache.key("p", "v1", "def solution(s):   \r\n    return s[::-1]\r\n\r\n")
+    assert a == b
+    assert normalize_code("x = 1  \n\n") == "x = 1"
+
+
+def test_hit_and_miss_counters():
+    cache = SubmissionCache()
+    key = cache.key("p", "v1", "code")
+    assert cache.get(key) is None
+    cache.put(key, {"status": "passed"})
+    assert cache.get(key) == {"status": "passed"}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = SubmissionCache(max_entries=2)
+    cache.put("a", {})
+    cache.put("b", {})
+    cache.get("a")
+    cache.put("c", {})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+
+def test_ttl_expiry():
+    cache = SubmissionCache(ttl_sec=0.01)
+    cache.put("a", {})
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_suite_change_changes_key_and_clears_cache():
+    cache = SubmissionCache()
+    old, new = make_catalog("olleh"), make_catalog("changed")
+    assert old.suite_version("easy_reverse_string") != new.suite_version("easy_reverse_string")
+
+    cache.sync_catalog(old)
+    cache.put(cache.key("easy_reverse_string", old.suite_version("easy_reverse_string"), "x"), {})
+    cache.sync_catalog(new)
+    assert cache.stats()["entries"] == 0
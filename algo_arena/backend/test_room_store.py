@@ -0,0 +1,259 @@
+"""
+AlgoArena Room Store Tests
+Includes a multi-process load test: several worker processes race to join
+and submit on the same SQLite (WAL) rooms
+
+    python -m pytest test_room_store.py -q -s
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+os.environ.setdefault("ROOM_STORE_PATH", os.path.join(tempfile.mkdtemp(), "arena.db"))
+
+import main
+from room_store import (
+    InMemoryRoomStore,
+    SQLiteRoomStore,
+    RoomFull,
+    RoomNotActive,
+    RoomNotFound,
+)
+
+PROCESSES = 6
+ROOMS = 40
+
+
+def new_room(room_id, host="host"):
+    return {
+        "room_id": room_id,
+        "status": "waiting",
+        "created_at": datetime.now(),
+        "time_limit_sec": 600,
+        "problem": {"id": "easy_reverse_string", "title": "Reverse a String", "difficulty": "easy"},
+        "players": [{"username": host, "joined_at": datetime.now()}],
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryRoomStore()
+    return SQLiteRoomStore(str(tmp_path / "arena.db"))
+
+
+# =====================================================
+# ROOM RULES (both backends)
+# =====================================================
+def test_join_fills_room_and_starts_match(store):
+    store.create(new_room("r1", "alice"))
+    room = store.join("r1", "bob")
+    assert [p["username"] for p in room["players"]] == ["alice", "bob"]
+    assert room["status"] == "active"
+
+    # rejoining is a no-op, a third player is refused
+    assert len(store.join("r1", "bob")["players"]) == 2
+    with pytest.raises(RoomFull):
+        store.join("r1", "carol")
+    with pytest.raises(RoomNotFound):
+        store.join("nope", "carol")
+
+
+def test_submit_finishes_exactly_once(store):
+    store.create(new_room("r1", "alice"))
+    store.join("r1", "bob")
+
+    room, finished = store.submit("r1", "alice", {"total_passed": 1})
+    assert not finished
+    assert room["version"] == 2  # join + submit, numbers the room_delta events
+    room, finished = store.submit("r1", "bob", {"total_passed": 2})
+    assert finished
+    assert room["status"] == "finished"
+
+    with pytest.raises(RoomNotActive):
+        store.submit("r1", "alice", {"total_passed": 3})
+    assert store.get("r1")["version"] == 3  # a refused change doesn't count
+
+
+def test_leaving_mid_match_abandons_room(store):
+    store.create(new_room("r1", "alice"))
+    store.join("r1", "bob")
+    room = store.leave("r1", "alice")
+    assert room["status"] == "abandoned"
+    assert store.leave("nope", "alice") is None
+
+    store.create(new_room("r2", "carol"))
+    assert store.count_by_status() == {"abandoned": 1, "waiting": 1}
+
+
+def test_presence(store):
+    store.set_online("sid1", "alice")
+    store.set_online("sid2", "bob")
+    assert store.online_count() == 2
+    assert store.set_offline("sid1") == "alice"
+    assert store.set_offline("sid1") is None
+    assert store.online_count() == 1
+
+
+def test_sqlite_rooms_survive_a_restart(tmp_path):
+    path = str(tmp_path / "arena.db")
+    SQLiteRoomStore(path).create(new_room("r1", "alice"))
+    room = SQLiteRoomStore(path).join("r1", "bob")
+    assert room["status"] == "active"
+
+
+def test_handlers_wait_for_the_write_lock_off_the_event_loop(tmp_path):
+    store = SQLiteRoomStore(str(tmp_path / "arena.db"))
+    store.create(new_room("r1", "alice"))
+    # another worker's transaction holds the write lock
+    other = sqlite3.connect(store.path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    # POST /rooms/{room_id}/join (main.join_room is the socket handler of the same name)
+    rest_join = next(r.endpoint for r in main.app.routes if getattr(r, "path", None) == "/rooms/{room_id}/join")
+
+    async def scenario():
+        join = asyncio.ensure_future(rest_join("r1", main.JoinRoomRequest(username="bob")))
+        started = time.monotonic()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        # the loop kept ticking while the join waited
+        ticked = time.monotonic() - started
+        assert not join.done()
+        other.execute("COMMIT")
+        return await join, ticked
+
+    saved, main.room_store = main.room_store, store
+    try:
+        room, ticked = asyncio.run(scenario())
+    finally:
+        main.room_store = saved
+        other.close()
+    assert ticked < 1 and room["status"] == "active"
+
+
+# =====================================================
+# MULTI-PROCESS LOAD TEST
+# =====================================================
+def race_worker(path, worker_no, results):
+    store = SQLiteRoomStore(path)
+    joined = 0
+    finished = 0
+
+    for n in range(ROOMS):
+        try:
+            store.join(f"room-{n}", f"w{worker_no}-{n}")
+            joined += 1
+        except RoomFull:
+            pass
+
+    # every worker submits for both players of every room
+    for n in range(ROOMS):
+        room = store.get(f"room-{n}")
+        for player in room["players"]:
+            try:
+                _, done = store.submit(f"room-{n}", player["username"], {"by": worker_no})
+                finished += done
+            except RoomNotActive:
+                pass
+
+    results.put((joined, finished))
+
+
+def test_multi_process_join_and_submit_race(tmp_path):
+    path = str(tmp_path / "arena.db")
+    store = SQLiteRoomStore(path)
+    for n in range(ROOMS):
+        store.create(new_room(f"room-{n}"))
+
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    workers = [ctx.Process(target=race_worker, args=(path, w, results)) for w in range(PROCESSES)]
+
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    outcomes = [results.get(timeout=60) for _ in workers]
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    total_joined = sum(j for j, _ in outcomes)
+    total_finished = sum(f for _, f in outcomes)
+    print(f"\n{PROCESSES} processes, {ROOMS} rooms: {elapsed * 1000:.0f} ms")
+
+    # exactly one process won each free seat, and each match ended once
+    assert total_joined == ROOMS
+    assert total_finished == ROOMS
+    for n in range(ROOMS):
+        room = store.get(f"room-{n}")
+        assert len(room["players"]) == 2
+        assert room["status"] == "finished"
+
+
+# =====================================================
+# EVICTION
+# =====================================================
+def test_evict_expired_uses_status_ttls(store):
+    store.create(new_room("old-waiting"))
+    store.create(new_room("finished", "alice"))
+    store.join("finished", "bob")
+    store.submit("finished", "alice", {})
+    store.submit("finished", "bob", {})
+
+    ttls = {"finished": 60, "waiting": 3600}
+    assert store.evict_expired(ttls) == []
+
+    evicted = store.evict_expired(ttls, now=time.time() + 120)
+    assert [r["room_id"] for r in evicted] == ["finished"]
+    assert store.get("finished") is None
+    assert store.get("old-waiting") is not None
+
+
+def test_prune_presence_drops_dead_sockets(store):
+    store.set_online("alive", "alice")
+    store.set_online("dead", "bob")
+    pruned = store.prune_presence(["alive"], ttl_sec=60, now=time.time() + 120)
+    assert pruned == 1
+    assert store.online_count() == 1
+    assert store.set_offline("alive") == "alice"
+
+
+def test_presence_can_be_pruned_while_handlers_change_it():
+    # handlers call set_online / set_offline from to_thread while the sweeper prunes
+    store = InMemoryRoomStore()
+    live = [f"live-{n}" for n in range(100000)]
+    for sid in live:
+        store.set_online(sid, "user")
+    stop = threading.Event()
+
+    def churn(worker):
+        n = 0
+        while not stop.is_set():
+            store.set_online(f"{worker}-{n}", "user")
+            store.set_offline(f"{worker}-{n - 50}")
+            n += 1
+
+    threads = [threading.Thread(target=churn, args=(w,)) for w in range(4)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(20):
+            store.prune_presence(live, ttl_sec=0)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        sys.setswitchinterval(interval)
+    assert store.online_count() >= len(live)
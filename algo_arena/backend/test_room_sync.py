@@ -0,0 +1,94 @@
+"""
+AlgoArena Room Sync Tests
+Snapshots, delta numbering and coalescing of room broadcasts
+
+    python -m pytest test_room_sync.py -q
+"""
+
+import asyncio
+from datetime import datetime
+
+from room_sync import RoomBroadcaster, room_snapshot
+
+
+def recorder():
+    sent = []
+
+    async def emit(event, payload, room_id):
+        sent.append((event, dict(payload)))
+
+    return sent, emit
+
+
+def test_snapshot_carries_summaries_not_code():
+    room = {
+        "room_id": "r1",
+        "version": 3,
+        "status": "active",
+        "time_limit_sec": 600,
+        "problem": {"id": "two_sum", "title": "Two Sum", "difficulty": "easy"},
+        "players": [{"username": "alice", "joined_at": datetime.now()}, {"username": "bob"}],
+        "submissions": {
+            "alice": {
+                "status": "passed",
+                "total_passed": 5,
+                "total_tests": 5,
+                "code": "def solution(): ...",
+                "test_results": [{"passed": True}] * 5,
+                "submitted_at": datetime(2026, 1, 1, 12, 0),
+            }
+        },
+    }
+    snapshot = room_snapshot(room)
+    assert snapshot["version"] == 3
+    assert snapshot["players"] == ["alice", "bob"]
+    assert snapshot["submissions"]["alice"]["submitted_at"] == "2026-01-01T12:00:00"
+    assert "code" not in snapshot["submissions"]["alice"]
+    assert "test_results" not in snapshot["submissions"]["alice"]
+
+
+def test_changes_inside_the_window_share_one_delta():
+    sent, emit = recorder()
+    broadcaster = RoomBroadcaster(emit, window_sec=0.05)
+
+    async def scenario():
+        # the first change goes straight out and opens the window
+        await broadcaster.publish("r1", 1, {"status": "active", "players": ["alice", "bob"]})
+        assert len(sent) == 1
+        await broadcaster.publish("r1", 2, {"submissions": {"alice": {"total_passed": 1}}})
+        await broadcaster.publish("r1", 3, {"submissions": {"bob": {"total_passed": 2}}, "status": "finished"})
+        await broadcaster.publish("r2", 1, {"status": "active"})  # other rooms aren't held back
+        assert len(sent) == 2
+        await asyncio.sleep(0.2)  # the window closes, its flush opens one more
+
+    asyncio.run(scenario())
+    assert [payload for _, payload in sent] == [
+        {"room_id": "r1", "base": 0, "version": 1, "status": "active", "players": ["alice", "bob"]},
+        {"room_id": "r2", "base": 0, "version": 1, "status": "active"},
+        {
+            "room_id": "r1",
+            "base": 1,
+            "version": 3,
+            "submissions": {"alice": {"total_passed": 1}, "bob": {"total_passed": 2}},
+            "status": "finished",
+        },
+    ]
+    assert broadcaster.stats()["coalesced"] == 1
+    assert broadcaster.pending == {} and broadcaster.cooldowns == {}
+
+
+def test_version_gap_and_explicit_flush():
+    sent, emit = recorder()
+    broadcaster = RoomBroadcaster(emit, window_sec=10)
+
+    async def scenario():
+        await broadcaster.publish("r1", 1, {"status": "active"})
+        await broadcaster.publish("r1", 2, {"players": ["alice"]})
+        # version 3 happened on another worker: 2 and 4 must not be merged
+        await broadcaster.publish("r1", 4, {"status": "abandoned"})
+        assert [(p["base"], p["version"]) for _, p in sent] == [(0, 1), (1, 2)]
+        # match_ended-style events flush the window early
+        await broadcaster.flush("r1")
+        assert [(p["base"], p["version"]) for _, p in sent] == [(0, 1), (1, 2), (3, 4)]
+
+    asyncio.run(scenario())
@@ -38,9 +38,14 @@ async def test_socket_flow():
         print(f"✅ Client 1 identified: {data}")
 
     @client1.event
-    async def room_update(data):
-        events_log.append(f"Client1: Room update - {data}")
-        print(f"📢 Client 1 received room update: {data}")
+    async def room_snapshot(data):
+        events_log.append(f"Client1: Room snapshot - {data}")
+        print(f"📢 Client 1 received room snapshot: {data}")
+
+    @client1.event
+    async def room_delta(data):
+        events_log.append(f"Client1: Room delta - {data}")
+        print(f"📢 Client 1 received room delta: {data}")
 
     @client1.event
     async def error(data):
@@ -59,9 +64,14 @@ async def test_socket_flow():
         print(f"✅ Client 2 identified: {data}")
 
     @client2.event
-    async def room_update(data):
-        events_log.append(f"Client2: Room update - {data}")
-        print(f"📢 Client 2 received room update: {data}")
+    async def room_snapshot(data):
+        events_log.append(f"Client2: Room snapshot - {data}")
+        print(f"📢 Client 2 received room snapshot: {data}")
+
+    @client2.event
+    async def room_delta(data):
+        events_log.append(f"Client2: Room delta - {data}")
+        print(f"📢 Client 2 received room delta: {data}")
 
     @client2.event
     async def error(data):
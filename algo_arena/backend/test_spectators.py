@@ -0,0 +1,106 @@
+"""
+AlgoArena Spectator Tests
+Seats, throttling and coalescing of the spectator channel
+
+    python -m pytest test_spectators.py -q
+"""
+
+import asyncio
+
+import pytest
+
+from spectators import SpectatorFeed, SpectatorsFull, spectator_channel
+
+
+def recorder(delay=0.0):
+    sent = []
+
+    async def emit(event, payload, to):
+        sent.append((event, to, dict(payload)))
+        await asyncio.sleep(delay)
+
+    return sent, emit
+
+
+def test_updates_are_coalesced_per_interval():
+    sent, emit = recorder()
+    feed = SpectatorFeed(emit, interval_sec=0.1, batch_size=1)
+
+    async def scenario():
+        feed.add("r1", "s1")
+        feed.add("r1", "s2")
+        feed.publish("r1", {"status": "active", "version": 1})
+        await asyncio.sleep(0.01)  # the first change leaves right away
+        for n in range(1, 6):
+            feed.publish("r1", {"progress": {"alice": {"test_index": n}}})
+        feed.publish("r1", {"progress": {"bob": {"test_index": 0}}, "version": 2})
+        assert len(sent) == 2  # one batch per socket
+        await asyncio.sleep(0.15)
+        feed.publish("r2", {"status": "active"})  # nobody watches r2 here: dropped
+        await asyncio.sleep(0.15)
+
+    asyncio.run(scenario())
+    assert [to for _, to, _ in sent] == [["s1"], ["s2"], ["s1"], ["s2"]]
+    assert sent[3][2] == {
+        "room_id": "r1",
+        "status": "active",
+        "version": 2,
+        "progress": {"alice": {"test_index": 5}, "bob": {"test_index": 0}},
+        "spectators": 2,
+    }
+    assert feed.stats()["coalesced"] == 5 and "r2" not in feed.state
+
+
+def test_publishing_never_waits_for_a_slow_fan_out():
+    sent, emit = recorder(delay=0.3)
+    feed = SpectatorFeed(emit, interval_sec=0.01)
+
+    async def scenario():
+        feed.add("r1", "s1")
+        feed.publish("r1", {"version": 1})
+        await asyncio.sleep(0.02)
+        # the first update is still going out: these return at once and merge
+        start = asyncio.get_running_loop().time()
+        for version in range(2, 50):
+            feed.publish("r1", {"version": version})
+        assert asyncio.get_running_loop().time() - start < 0.05
+        await asyncio.sleep(0.4)
+        await feed.stop()
+
+    asyncio.run(scenario())
+    assert [payload["version"] for _, _, payload in sent] == [1, 49]
+
+
+def test_cross_worker_feeds_publish_every_room_to_its_channel():
+    sent, emit = recorder()
+    feed = SpectatorFeed(emit, interval_sec=0.05, watched_only=False)
+
+    async def scenario():
+        # watchers may be on another worker: no local spectators needed
+        feed.publish("r1", {"status": "active"})
+        await asyncio.sleep(0.01)
+        assert sent == [
+            ("spectator_update", spectator_channel("r1"), {"room_id": "r1", "status": "active", "spectators": 0})
+        ]
+        # a quiet interval later this worker lets the room go
+        await asyncio.sleep(0.1)
+        assert "r1" not in feed.state
+
+    asyncio.run(scenario())
+
+
+def test_seats_are_capped_and_one_room_per_socket():
+    sent, emit = recorder()
+    feed = SpectatorFeed(emit, interval_sec=0.1, max_per_room=2)
+
+    assert feed.add("r1", "s1") is None
+    assert feed.add("r1", "s2") is None
+    assert feed.add("r1", "s2") is None  # already watching doesn't take another seat
+    with pytest.raises(SpectatorsFull):
+        feed.add("r1", "s3")
+
+    # moving to another room frees the seat
+    assert feed.add("r2", "s2") == "r1"
+    assert feed.add("r1", "s3") is None
+    assert feed.remove("s3") == "r1" and feed.remove("s1") == "r1"
+    assert "r1" not in feed.spectators and feed.stats()["spectators"] == 1